@@ -0,0 +1,176 @@
+"""
+----------------------------------------------------------------------------
+hash_sampler.py
+
+**Two-pass stratified sampler without window functions**
+
+Same strata (temporal_bin, cik_int, report_year, section), same bin allocation
+(modern bin in full, leftover split older_bin2_weight / older_bin1_weight) and
+same per-stratum sizes as STEP B4-B6 of 31_run_stratified.sql, but:
+
+    Pass 1: GROUP BY the strata -> stratum sizes (hash aggregate, no sort)
+    Pass 2: one streaming scan keeping a row when
+            hash(seed, sentenceID) < threshold(stratum)
+
+instead of ROW_NUMBER() OVER (PARTITION BY ... ORDER BY <hash>) plus
+COUNT(*) OVER (...), which sorts the whole corpus. The hash is the first 60
+bits of MD5('<seed>:<sentenceID>'), so a (seed, params) pair always selects
+the same rows, and rows never move in or out when other strata change.
+Each stratum is a Bernoulli draw at rate take/size: counts match the window
+method in expectation (within a few hundred rows on 1M), not row for row.
+
+Usage:
+    conn = duckdb.connect('sampler.duckdb')
+    n = run_hash_sampling(conn, 's3://.../sec_filings_large_full.parquet', sample_size=1_000_000, seed=42)
+    # -> table sample_sentenceIDs (sentenceID, cik_int, temporal_bin, sampling_rate_pct)
+----------------------------------------------------------------------------
+"""
+
+import math
+
+HASH_BITS = 60
+HASH_SPACE = 1 << HASH_BITS
+
+
+# ============================================================================
+# HASH SELECTION
+# ============================================================================
+
+def hash_sql(id_col, seed):
+    """
+    SQL: 60-bit unsigned hash of '<seed>:<id>' (first 15 hex digits of MD5).
+    seed is an int or a SQL expression such as "getvariable('sample_seed')".
+    Python twin: src/hash_sampling.py hash_value.
+    """
+    seed_sql = str(int(seed)) if isinstance(seed, int) else seed
+    return f"CAST('0x' || substr(md5(CAST({seed_sql} AS VARCHAR) || ':' || {id_col}), 1, 15) AS UBIGINT)"
+
+
+def threshold_sql(rate_expr):
+    """SQL: rows with hash < threshold are kept; rate 1.0 keeps everything"""
+    return f"CAST(FLOOR(LEAST({rate_expr}, 1.0) * {HASH_SPACE}) AS UBIGINT)"
+
+
+def threshold(rate):
+    """Python twin of threshold_sql (same IEEE double arithmetic)"""
+    return math.floor(min(rate, 1.0) * HASH_SPACE)
+
+
+# ============================================================================
+# PASSES
+# ============================================================================
+
+def tagged_sql(parquet_source, company_table='finrag_tgt_comps_75'):
+    """STEP B1 filters and temporal bins, key columns only (projection pushdown)"""
+    return f"""
+        SELECT
+            sentenceID,
+            CAST(cik AS INTEGER) as cik_int,
+            section,
+            YEAR(CAST(reportDate AS DATE)) as report_year,
+            CASE
+                WHEN YEAR(CAST(reportDate AS DATE)) BETWEEN 2006 AND 2009 THEN 'bin_2006_2009'
+                WHEN YEAR(CAST(reportDate AS DATE)) BETWEEN 2010 AND 2015 THEN 'bin_2010_2015'
+                WHEN YEAR(CAST(reportDate AS DATE)) BETWEEN 2016 AND 2020 THEN 'bin_2016_2020'
+            END as temporal_bin
+        FROM read_parquet('{str(parquet_source).replace("'", "''")}')
+        WHERE CAST(cik AS INTEGER) IN (SELECT cik_int FROM {company_table})
+          AND YEAR(CAST(reportDate AS DATE)) BETWEEN 2006 AND 2020
+          AND section IS NOT NULL
+          AND sentence IS NOT NULL
+          AND LENGTH(sentence) > 10"""
+
+
+def stratum_sizes_sql(source_sql):
+    """Pass 1: stratum populations"""
+    return f"""
+        CREATE OR REPLACE TABLE hash_strata AS
+        SELECT temporal_bin, cik_int, report_year, section, COUNT(*) as stratum_size
+        FROM ({source_sql})
+        GROUP BY ALL"""
+
+
+def allocation_sql():
+    """
+    STEP B4/B5 bin targets, then the STEP B6 per-stratum size
+    (GREATEST(1, ROUND(size * target / population)), or all rows when the bin fits),
+    turned into a hash threshold. Parameters: sample_size, bin2 weight, bin1 weight.
+    """
+    return f"""
+        CREATE OR REPLACE TABLE hash_strata AS {allocation_select('hash_strata')}"""
+
+
+def allocation_select(strata_table):
+    """allocation_sql's SELECT over any table of (temporal_bin, cik_int, report_year, section, stratum_size)"""
+    return f"""
+        WITH pops AS (
+            SELECT temporal_bin, SUM(stratum_size) as bin_population
+            FROM {strata_table} GROUP BY temporal_bin
+        ),
+        budget AS (
+            SELECT COALESCE(SUM(bin_population) FILTER (temporal_bin = 'bin_2016_2020'), 0) as modern_pop
+            FROM pops
+        ),
+        targets AS (
+            SELECT
+                p.temporal_bin,
+                p.bin_population,
+                CASE p.temporal_bin
+                    WHEN 'bin_2016_2020' THEN LEAST(b.modern_pop, $1)
+                    WHEN 'bin_2010_2015' THEN CAST(ROUND(GREATEST(0, $1 - b.modern_pop) * $2) AS INTEGER)
+                    WHEN 'bin_2006_2009' THEN CAST(ROUND(GREATEST(0, $1 - b.modern_pop) * $3) AS INTEGER)
+                END as bin_target
+            FROM pops p CROSS JOIN budget b
+        )
+        SELECT
+            s.temporal_bin, s.cik_int, s.report_year, s.section, s.stratum_size,
+            t.bin_target, t.bin_population,
+            ROUND(t.bin_target * 100.0 / t.bin_population, 2) as sampling_rate_pct,
+            CASE
+                WHEN t.bin_target <= 0 THEN 0
+                WHEN t.bin_target >= t.bin_population THEN s.stratum_size
+                ELSE GREATEST(1, CAST(ROUND(s.stratum_size * (t.bin_target * 1.0 / t.bin_population)) AS INTEGER))
+            END as stratum_take,
+            {threshold_sql('stratum_take * 1.0 / s.stratum_size')} as hash_threshold
+        FROM {strata_table} s
+        JOIN targets t USING (temporal_bin)"""
+
+
+def selection_sql(source_sql, seed):
+    """Pass 2: one scan, hash threshold per stratum -> sample_sentenceIDs (B6 output schema)"""
+    return f"""
+        CREATE OR REPLACE TABLE sample_sentenceIDs AS
+        SELECT
+            c.sentenceID,
+            c.cik_int,
+            c.temporal_bin,
+            s.sampling_rate_pct
+        FROM ({source_sql}) c
+        JOIN hash_strata s USING (temporal_bin, cik_int, report_year, section)
+        WHERE {hash_sql('c.sentenceID', seed)} < s.hash_threshold"""
+
+
+def stage_statements(seed="getvariable('sample_seed')", source_sql='SELECT * FROM corpus_tagged'):
+    """The three statements that replace the window-function sample_sentenceIDs in STEP B6"""
+    return [
+        stratum_sizes_sql(source_sql),
+        allocation_sql().replace('$1', "CAST(getvariable('sample_size_n') AS INTEGER)")
+                        .replace('$2', "CAST(getvariable('older_bin2_weight') AS DOUBLE)")
+                        .replace('$3', "CAST(getvariable('older_bin1_weight') AS DOUBLE)"),
+        selection_sql(source_sql, seed),
+    ]
+
+
+# ============================================================================
+# CORE FUNCTION
+# ============================================================================
+
+def run_hash_sampling(conn, parquet_source, sample_size=1_000_000, seed=42,
+                      older_bin2_weight=0.60, older_bin1_weight=0.40,
+                      company_table='finrag_tgt_comps_75'):
+    """Both passes straight over the source Parquet; returns the number of sampled sentenceIDs"""
+    source = tagged_sql(parquet_source, company_table)
+    conn.execute(stratum_sizes_sql(source))
+    conn.execute(allocation_sql(), [sample_size, older_bin2_weight, older_bin1_weight])
+    conn.execute(selection_sql(source, seed))
+    return conn.execute("SELECT COUNT(*) FROM sample_sentenceIDs").fetchone()[0]
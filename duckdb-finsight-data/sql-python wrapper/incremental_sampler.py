@@ -0,0 +1,288 @@
+"""
+----------------------------------------------------------------------------
+incremental_sampler.py
+
+**Incremental maintenance of sample_1m_finrag when new filings land**
+
+A sample drawn by either method of sample.py is a hash-threshold sample per stratum:
+a stratum holds exactly the rows with hash(seed, sentenceID) < applied_threshold
+(for the window method, the largest sampled hash + 1). sample_strata stores, per
+(temporal_bin, cik_int, report_year, section), the population, the rows sampled and
+that threshold. A refresh then touches only what changed:
+
+    1. Tag the new Parquet rows (STEP B1 filters), add their counts to sample_strata
+    2. Recompute bin targets / stratum thresholds from the stored counts (STEP B4-B6)
+    3. New rows are kept under their stratum's current threshold
+    4. A bin whose size drifts more than `tolerance` from its target is rebalanced:
+       every stratum in it moves to the recomputed threshold. A lower threshold deletes
+       sampled rows; a higher one tops up from the earlier sources, only for strata
+       not already taken in full.
+
+With tolerance=0 every bin is rebalanced and the result equals a full hash-method run
+over base + increments. Unlike STEP C1b (enable_incremental_injection), which appends a
+re-mapped external file as is, increments here share the corpus schema and go through
+the same filters, strata and weighting as the 71.8M-row run. New companies must be in
+the company table first.
+
+Usage:
+    conn = duckdb.connect('sampler.duckdb')
+    bootstrap(conn, base_source, base_fingerprint, seed=42)
+    report = refresh(conn, 'new_filings_2021.parquet', full_row_select, fingerprint, seed=42)
+----------------------------------------------------------------------------
+"""
+
+from contextlib import contextmanager
+
+from hash_sampler import allocation_select, hash_sql, tagged_sql
+
+STRATA_TABLE = 'sample_strata'
+SOURCES_TABLE = 'sample_sources'
+KEYS = 'temporal_bin, cik_int, report_year, section'
+KEY_MATCH = ' AND '.join(f"{{a}}.{k} = {{b}}.{k}" for k in KEYS.split(', '))
+
+# load_method of the rows the samplers own; C1b injected rows are left alone
+SAMPLED_ROWS = "load_method IN ('stratified_sampling', 'incremental_sampling')"
+# rows added by refresh(); Section D flags are computed for these after every refresh
+REFRESHED_ROWS = "load_method = 'incremental_sampling'"
+# sample_1m_finrag names the section column section_ID
+SAMPLE_KEYS = "temporal_bin, cik_int, report_year, section_ID as section"
+
+
+def _match(a, b):
+    return KEY_MATCH.format(a=a, b=b)
+
+
+def _sample_counts():
+    return f"SELECT {SAMPLE_KEYS}, COUNT(*) as n FROM sample_1m_finrag WHERE {SAMPLED_ROWS} GROUP BY ALL"
+
+
+@contextmanager
+def _transaction(conn):
+    """All-or-nothing: a failed refresh must not leave counts bumped without its sample_sources row"""
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def table_exists(conn, table):
+    return conn.execute(
+        "SELECT COUNT(*) FROM information_schema.tables WHERE table_name = ?", [table]).fetchone()[0] > 0
+
+
+# ============================================================================
+# STORED STATE
+# ============================================================================
+
+def reset(conn, sampling_method):
+    """Forget the stored counts (a full run_sampling replaces the sample they describe)"""
+    conn.execute(f"DROP TABLE IF EXISTS {STRATA_TABLE}")
+    conn.execute(f"DROP TABLE IF EXISTS {SOURCES_TABLE}")
+    if sampling_method != 'hash':
+        conn.execute("DROP TABLE IF EXISTS hash_strata")    # left over from an earlier hash run
+
+
+def bootstrap(conn, base_source, fingerprint, seed, company_table='finrag_tgt_comps_75'):
+    """
+    First refresh after a full run: sample_strata from hash_strata (hash method) or from
+    one GROUP BY over the base source (window method), thresholds read off the sample.
+    """
+    if table_exists(conn, STRATA_TABLE):
+        return False
+    with _transaction(conn):
+        _bootstrap(conn, base_source, fingerprint, seed, company_table)
+    return True
+
+
+def _bootstrap(conn, base_source, fingerprint, seed, company_table):
+    if table_exists(conn, 'hash_strata'):
+        populations = f"SELECT {KEYS}, stratum_size, hash_threshold FROM hash_strata"
+    else:
+        populations = f"""
+            SELECT {KEYS}, COUNT(*) as stratum_size, CAST(NULL AS UBIGINT) as hash_threshold
+            FROM ({tagged_sql(base_source, company_table)}) GROUP BY ALL"""
+    conn.execute(f"""
+        CREATE TABLE {STRATA_TABLE} AS
+        WITH sampled AS (
+            SELECT {SAMPLE_KEYS}, COUNT(*) as n, MAX({hash_sql('sentenceID', seed)}) + 1 as top
+            FROM sample_1m_finrag WHERE {SAMPLED_ROWS}
+            GROUP BY ALL
+        )
+        SELECT p.temporal_bin, p.cik_int, p.report_year, p.section, p.stratum_size,
+               COALESCE(s.n, 0) as sampled,
+               COALESCE(p.hash_threshold, s.top, 0) as applied_threshold
+        FROM ({populations}) p
+        LEFT JOIN sampled s USING ({KEYS})""")
+    conn.execute(f"""
+        CREATE TABLE {SOURCES_TABLE} (
+            source_path VARCHAR, fingerprint VARCHAR, new_rows BIGINT, applied_at TIMESTAMP
+        )""")
+    conn.execute(f"INSERT INTO {SOURCES_TABLE} VALUES (?, ?, NULL, CURRENT_TIMESTAMP)", [base_source, fingerprint])
+
+
+# ============================================================================
+# REFRESH
+# ============================================================================
+
+def _insert_rows(conn, full_row_select, source_path):
+    """
+    sample_delta -> full-schema rows of sample_1m_finrag, through the script's own STEP C1
+    SELECT (sample_sentenceIDs read as sample_delta) with source_path as the corpus.
+    """
+    conn.execute("SET VARIABLE parquet_source_path = ?", [source_path])
+    conn.execute(f"CREATE OR REPLACE TEMP TABLE sample_delta_rows AS {full_row_select}")
+    target = [r[0] for r in conn.execute("SELECT column_name FROM (DESCRIBE sample_1m_finrag)").fetchall()]
+    delta = {r[0] for r in conn.execute("SELECT column_name FROM (DESCRIBE sample_delta_rows)").fetchall()}
+    replaced = {
+        'sample_id': "sample_id + (SELECT COALESCE(MAX(sample_id), 0) FROM sample_1m_finrag) as sample_id",
+        'load_method': "'incremental_sampling' as load_method",
+    }
+    columns = ', '.join(replaced.get(c, c) for c in target if c in delta)
+    conn.execute("DELETE FROM sample_1m_finrag WHERE sentenceID IN (SELECT sentenceID FROM sample_delta)")
+    conn.execute(f"INSERT INTO sample_1m_finrag BY NAME SELECT {columns} FROM sample_delta_rows")
+    return conn.execute("SELECT COUNT(*) FROM sample_delta_rows").fetchone()[0]
+
+
+def _bin_counts(conn):
+    return dict(conn.execute(
+        f"SELECT temporal_bin, COUNT(*) FROM sample_1m_finrag WHERE {SAMPLED_ROWS} GROUP BY ALL").fetchall())
+
+
+def refresh(conn, new_source, full_row_select, fingerprint, seed=42, sample_size=1_000_000,
+            older_bin2_weight=0.60, older_bin1_weight=0.40, tolerance=0.02,
+            company_table='finrag_tgt_comps_75', feature_sql=()):
+    """
+    Fold one new Parquet file of corpus rows into sample_1m_finrag (bootstrap() first).
+    full_row_select: the STEP C1 SELECT reading sample_delta.
+    feature_sql: the Section D UPDATEs (restricted to REFRESHED_ROWS), run after the inserts,
+    since STEP C1 alone leaves the flags and retrieval_signal_score NULL. Returns a report dict.
+    Runs in one transaction: on any error nothing is applied and the file can be retried.
+    """
+    with _transaction(conn):
+        return _refresh(conn, new_source, full_row_select, fingerprint, seed, sample_size,
+                        older_bin2_weight, older_bin1_weight, tolerance, company_table, feature_sql)
+
+
+def _refresh(conn, new_source, full_row_select, fingerprint, seed, sample_size,
+             older_bin2_weight, older_bin1_weight, tolerance, company_table, feature_sql):
+    if conn.execute(f"SELECT COUNT(*) FROM {SOURCES_TABLE} WHERE fingerprint = ?", [fingerprint]).fetchone()[0]:
+        raise ValueError(f"{new_source} was already applied to this sample")
+    sources = [r[0] for r in conn.execute(f"SELECT source_path FROM {SOURCES_TABLE} ORDER BY applied_at").fetchall()]
+    bins_before = _bin_counts(conn)
+    h = hash_sql('sentenceID', seed)
+
+    # 1. New rows and their stratum counts
+    conn.execute(f"CREATE OR REPLACE TEMP TABLE refresh_rows AS "
+                 f"SELECT *, {h} as h FROM ({tagged_sql(new_source, company_table)})")
+    conn.execute(f"CREATE OR REPLACE TEMP TABLE refresh_counts AS "
+                 f"SELECT {KEYS}, COUNT(*) as n FROM refresh_rows GROUP BY ALL")
+    new_rows = conn.execute("SELECT COALESCE(SUM(n), 0) FROM refresh_counts").fetchone()[0]
+    conn.execute(f"INSERT INTO {STRATA_TABLE} SELECT {KEYS}, 0, 0, 0 FROM refresh_counts "
+                 f"ANTI JOIN {STRATA_TABLE} USING ({KEYS})")
+    conn.execute(f"UPDATE {STRATA_TABLE} s SET stratum_size = s.stratum_size + r.n "
+                 f"FROM refresh_counts r WHERE {_match('s', 'r')}")
+
+    # 2. Targets over the updated counts (same allocation as a full run)
+    conn.execute(f"CREATE OR REPLACE TEMP TABLE refresh_targets AS {allocation_select(STRATA_TABLE)}",
+                 [sample_size, older_bin2_weight, older_bin1_weight])
+
+    # 3-4. Bins out of tolerance if the new rows were kept under the current thresholds
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE refresh_bins AS
+        WITH kept AS (
+            SELECT r.temporal_bin, COUNT(*) as n
+            FROM refresh_rows r JOIN {STRATA_TABLE} s USING ({KEYS})
+            WHERE r.h < s.applied_threshold
+            GROUP BY ALL
+        ),
+        sampled AS (SELECT temporal_bin, SUM(sampled) as n FROM {STRATA_TABLE} GROUP BY ALL),
+        -- what a full run would take: bin_target plus the GREATEST(1, ...) rounding of small strata
+        targets AS (SELECT temporal_bin, SUM(stratum_take) as bin_target FROM refresh_targets GROUP BY ALL)
+        SELECT t.temporal_bin, t.bin_target,
+               COALESCE(s.n, 0) + COALESCE(k.n, 0) as projected,
+               ABS(COALESCE(s.n, 0) + COALESCE(k.n, 0) - t.bin_target) > ? * t.bin_target as rebalance
+        FROM targets t
+        LEFT JOIN sampled s USING (temporal_bin)
+        LEFT JOIN kept k USING (temporal_bin)""", [tolerance])
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE refresh_plan AS
+        SELECT s.temporal_bin, s.cik_int, s.report_year, s.section,
+               s.applied_threshold as old_threshold,
+               CASE WHEN b.rebalance OR s.stratum_size = COALESCE(c.n, 0) THEN t.hash_threshold
+                    ELSE s.applied_threshold END as new_threshold,
+               s.stratum_size - COALESCE(c.n, 0) as old_size,
+               s.sampled as old_sampled,
+               t.sampling_rate_pct
+        FROM {STRATA_TABLE} s
+        JOIN refresh_targets t USING ({KEYS})
+        JOIN refresh_bins b USING (temporal_bin)
+        LEFT JOIN refresh_counts c USING ({KEYS})""")
+
+    # Lower thresholds: drop the sampled rows above them (no source scan)
+    deleted = conn.execute(f"""
+        DELETE FROM sample_1m_finrag f USING refresh_plan p
+        WHERE f.temporal_bin = p.temporal_bin AND f.cik_int = p.cik_int
+          AND f.report_year = p.report_year AND f.section_ID = p.section
+          AND f.sentenceID IS NOT NULL AND f.{SAMPLED_ROWS}
+          AND p.new_threshold < p.old_threshold
+          AND {hash_sql('f.sentenceID', seed)} >= p.new_threshold""").fetchone()[0]
+
+    # New rows under the (possibly new) thresholds
+    conn.execute(f"""
+        CREATE OR REPLACE TEMP TABLE sample_delta AS
+        SELECT r.sentenceID, r.cik_int, r.temporal_bin, p.sampling_rate_pct
+        FROM refresh_rows r JOIN refresh_plan p USING ({KEYS})
+        WHERE r.h < p.new_threshold""")
+    inserted = _insert_rows(conn, full_row_select, new_source)
+
+    # Higher thresholds on strata not taken in full: top up from the earlier sources
+    topped_up = 0
+    top_up = "p.new_threshold > p.old_threshold AND p.old_sampled < p.old_size"
+    if conn.execute(f"SELECT COUNT(*) FROM refresh_plan p WHERE {top_up}").fetchone()[0]:
+        for source in sources:
+            conn.execute(f"""
+                CREATE OR REPLACE TEMP TABLE sample_delta AS
+                SELECT c.sentenceID, c.cik_int, c.temporal_bin, p.sampling_rate_pct
+                FROM ({tagged_sql(source, company_table)}) c
+                JOIN refresh_plan p USING ({KEYS})
+                WHERE {top_up}
+                  AND {hash_sql('c.sentenceID', seed)} >= p.old_threshold
+                  AND {hash_sql('c.sentenceID', seed)} < p.new_threshold""")
+            topped_up += _insert_rows(conn, full_row_select, source)
+
+    # Section D flags for the inserted rows
+    for stmt in feature_sql:
+        conn.execute(stmt)
+
+    # Stored state for the next refresh
+    conn.execute(f"""
+        CREATE OR REPLACE TABLE {STRATA_TABLE} AS
+        SELECT s.temporal_bin, s.cik_int, s.report_year, s.section, s.stratum_size,
+               COALESCE(n.n, 0) as sampled,
+               p.new_threshold as applied_threshold
+        FROM {STRATA_TABLE} s
+        JOIN refresh_plan p USING ({KEYS})
+        LEFT JOIN ({_sample_counts()}) n USING ({KEYS})""")
+    conn.execute(f"INSERT INTO {SOURCES_TABLE} VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+                 [new_source, fingerprint, new_rows])
+
+    bins = conn.execute("SELECT temporal_bin, bin_target, rebalance FROM refresh_bins ORDER BY temporal_bin").fetchall()
+    bins_after = _bin_counts(conn)
+    conn.execute("""
+        INSERT INTO execution_log VALUES
+            (12, 'INCREMENTAL_REFRESH', 'COMPLETE', ?, ?, CURRENT_TIMESTAMP)""",
+        [sum(bins_after.values()),
+         f"{new_rows} new rows: +{inserted} new, +{topped_up} top-up, -{deleted} trimmed from {new_source}"])
+    return {
+        'source': new_source,
+        'new_rows': new_rows,
+        'inserted': inserted,
+        'topped_up': topped_up,
+        'deleted': deleted,
+        'bins': {b: {'target': target, 'before': bins_before.get(b, 0), 'after': bins_after.get(b, 0),
+                     'rebalanced': rebalance}
+                 for b, target, rebalance in bins},
+    }
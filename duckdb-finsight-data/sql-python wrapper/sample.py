@@ -20,10 +20,19 @@ More usage instructions:
     # Cell 1: Install dependencies
     !pip install duckdb boto3
 
-    # Cell 2: Run sampling
+    # Cell 2: Run sampling (stage timings + row counts printed per execution_log step)
     from finrag_sampling import run_sampling
     row_count = run_sampling()
 
+    # After a failure: skip the stages already completed in CONFIG['database']
+    row_count = run_sampling(resume=True)
+
+    # Same rows again from the manifest written next to the export (sources must be unchanged)
+    row_count = rematerialize('s3://finrag-samples/sec_finrag_1M_sample.manifest.json')
+
+    # New filings (same schema as the source): update the sample instead of resampling 71.8M rows
+    report = refresh_sample('s3://finrag-data/new_filings_2021.parquet', tolerance=0.02)
+
     # Cell 3: Verify export
     import boto3
     s3 = boto3.client('s3')
@@ -31,10 +40,19 @@ More usage instructions:
     print("✓ File exported to S3")
 """
 
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass, field
+
 import duckdb
 from pathlib import Path
 from datetime import datetime
 
+import incremental_sampler
+from hash_sampler import stage_statements as hash_stage_statements
+
 # Optional Airflow imports
 try:
     from airflow import DAG
@@ -52,47 +70,447 @@ CONFIG = {
     'export_path': 's3://finrag-samples',
     'sql_script': '/home/ec2-user/finrag/duckdb/31_run_stratified.sql',
     'sample_size': 1000000,
+    # Persistent database: holds finrag_tgt_comps_75 / dim_sec_sections and every stage's
+    # tables, so a failed run resumes. The file stem must stay 'sampler' (the SQL reads
+    # sampler.main.dim_sec_sections). ':memory:' disables resume.
+    'database': '/home/ec2-user/finrag/duckdb/sampler.duckdb',
+    'profile_dir': '/home/ec2-user/finrag/duckdb/profiles',
+    'result_parquet_name': 'sec_finrag_1M_sample',
+    'sample_version': 'v1.0_prod',
+    'older_bin2_weight': 0.60,
+    'older_bin1_weight': 0.40,
+    'enable_incremental_injection': False,
+    'incremental_data_path': '',
+    # 'window': ROW_NUMBER() OVER (... ORDER BY hash) as in the SQL file, exact stratum sizes
+    # 'hash':   two-pass hash-threshold sampler (hash_sampler.py), no sort
+    # Both are seeded by sample_seed: same source + params + seed = same sample.
+    'sampling_method': 'window',
+    'sample_seed': 42,
+}
+
+# CONFIG key -> DuckDB variable in 31_run_stratified.sql. The runner binds these with
+# parameters and skips the script's own hard-coded SET VARIABLE for them.
+VARIABLES = {
+    'parquet_source': 'parquet_source_path',
+    'export_path': 'result_save_path',
+    'sample_size': 'sample_size_n',
+    'result_parquet_name': 'result_parquet_name',
+    'sample_version': 'sample_version',
+    'older_bin2_weight': 'older_bin2_weight',
+    'older_bin1_weight': 'older_bin1_weight',
+    'enable_incremental_injection': 'enable_incremental_injection',
+    'incremental_data_path': 'incremental_data_path',
+    'sample_seed': 'sample_seed',
 }
 
+# Everything that decides which rows are sampled; recorded in the manifest next to the export
+MANIFEST_KEYS = ('sample_size', 'older_bin2_weight', 'older_bin1_weight', 'enable_incremental_injection',
+                 'incremental_data_path', 'sampling_method', 'sample_seed', 'sample_version')
+
+LOG_INSERT = re.compile(r"INSERT\s+INTO\s+execution_log\s+(?:VALUES\s*\(|SELECT)\s*(\d+)\s*,\s*'(\w+)'", re.I)
+SET_VARIABLE = re.compile(r"^\s*SET\s+VARIABLE\s+(\w+)\s*=", re.I)
+TEMP_TABLE = re.compile(r"\bCREATE\s+(OR\s+REPLACE\s+)?TEMP(?:ORARY)?\s+TABLE\b", re.I)
+SAMPLE_IDS = re.compile(r"^\s*CREATE\s+(?:OR\s+REPLACE\s+)?(?:TEMP\s+)?TABLE\s+sample_sentenceIDs\b", re.I)
+FULL_ROWS = re.compile(r"^\s*CREATE\s+OR\s+REPLACE\s+TABLE\s+sample_1m_finrag\s+AS\s+", re.I)
+FEATURE_UPDATE = re.compile(r"^\s*UPDATE\s+sample_1m_finrag\s+SET\b", re.I)
+PROFILED = re.compile(r"^\s*(CREATE|INSERT|UPDATE|DELETE|COPY|EXECUTE)\b", re.I)
+
+LEADING_COMMENTS = re.compile(r"^(?:\s*(?:--[^\n]*(?:\n|$)|/\*.*?\*/))*\s*", re.S)
+
+STATE_TABLE = '_stage_runs'
+
+
+# ============================================================================
+# STAGES
+# ============================================================================
+
+@dataclass
+class Stage:
+    """Statements up to and including one execution_log INSERT (step_number, step_name)."""
+    index: int
+    step_number: int
+    step_name: str
+    statements: list = field(default_factory=list)
+
+    @property
+    def key(self):
+        return f"{self.index:02d}_{self.step_number}_{self.step_name}"
+
+    def fingerprint(self, params):
+        """
+        SQL text + the bound variables this stage reads; other parameter changes keep it valid.
+        The script's own SET VARIABLE defaults for bound variables are never executed, so they
+        do not count as reads (STEP 0 sets them all).
+        """
+        bound = {VARIABLES[k] for k in params if k in VARIABLES}
+        statements = [stmt for stmt in self.statements
+                      if not ((m := SET_VARIABLE.match(stmt)) and m.group(1) in bound)]
+        text = '\n'.join(statements)
+        used = {k: v for k, v in params.items() if VARIABLES.get(k) and VARIABLES[k] in text}
+        blob = json.dumps([statements, used], sort_keys=True, default=str)
+        return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def split_stages(conn, sql_script):
+    """
+    Split the script on its execution_log INSERTs (step IDs 0-11). Statements after the
+    last INSERT (execution log display) become a trailing REPORT stage.
+    """
+    stages, pending = [], []
+    for stmt in conn.extract_statements(sql_script):
+        pending.append(LEADING_COMMENTS.sub('', stmt.query).strip())
+        match = LOG_INSERT.search(stmt.query)
+        if match:
+            stages.append(Stage(len(stages), int(match.group(1)), match.group(2), pending))
+            pending = []
+    if pending:
+        stages.append(Stage(len(stages), -1, 'REPORT', pending))
+    return stages
+
+
+def use_hash_sampling(stages):
+    """Swap the window-function sample_sentenceIDs of STEP B6 for the two-pass hash sampler"""
+    stage = next(s for s in stages if s.step_name == 'SAMPLING_EXECUTION')
+    i = next(i for i, stmt in enumerate(stage.statements) if SAMPLE_IDS.match(stmt))
+    stage.statements[i:i + 1] = hash_stage_statements()
+    return stages
+
+
+def full_row_select(stages):
+    """STEP C1's SELECT (sampled IDs joined back to the corpus), reading sample_delta instead"""
+    stmt = next(s for stage in stages for s in stage.statements if FULL_ROWS.match(s))
+    return re.sub(r"\bsample_sentenceIDs\b", "sample_delta", FULL_ROWS.sub('', stmt))
+
+
+def feature_updates(stages):
+    """Section D flag + score UPDATEs, restricted to the rows a refresh added"""
+    stage = next(s for s in stages if s.step_name == 'FEATURE_ENGINEERING')
+    return [f"{stmt}\nWHERE {incremental_sampler.REFRESHED_ROWS}"
+            for stmt in stage.statements if FEATURE_UPDATE.match(stmt)]
+
+
+def _bind_variables(conn, params):
+    for key, name in VARIABLES.items():
+        if key in params:
+            conn.execute(f"SET VARIABLE {name} = ?", [params[key]])
+
+
+def _load_state(conn):
+    """{stage_key: (fingerprint, variables JSON or None)} of the COMPLETE stages"""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            stage_key VARCHAR, fingerprint VARCHAR, status VARCHAR,
+            seconds DOUBLE, row_count BIGINT, finished_at TIMESTAMP
+        )""")
+    conn.execute(f"ALTER TABLE {STATE_TABLE} ADD COLUMN IF NOT EXISTS variables VARCHAR")
+    rows = conn.execute(
+        f"SELECT stage_key, fingerprint, variables FROM {STATE_TABLE} WHERE status = 'COMPLETE'").fetchall()
+    return {key: (fingerprint, variables) for key, fingerprint, variables in rows}
+
+
+def _stage_variables(stage, bound):
+    """Variables the stage sets itself (constants and computed, e.g. rows_before_merge)"""
+    names = (SET_VARIABLE.match(stmt) for stmt in stage.statements)
+    return list(dict.fromkeys(m.group(1) for m in names if m and m.group(1) not in bound))
+
+
+def _save_variables(conn, names):
+    """{name: [value as VARCHAR, DuckDB type]} - enough to restore the exact value later"""
+    values = {}
+    for name in names:
+        value, type_name = conn.execute("SELECT getvariable(?)::VARCHAR, typeof(getvariable(?))",
+                                        [name, name]).fetchone()
+        values[name] = [value, type_name]
+    return json.dumps(values)
+
+
+def _restore_variables(conn, variables):
+    for name, (value, type_name) in json.loads(variables).items():
+        if value is None:
+            conn.execute(f"SET VARIABLE {name} = NULL")
+        else:
+            conn.execute(f"SET VARIABLE {name} = CAST(? AS {type_name})", [value])
+
+
+def _stage_rows(conn, stage):
+    row = conn.execute(
+        "SELECT row_count FROM execution_log WHERE step_number = ? AND step_name = ? "
+        "ORDER BY execution_time DESC LIMIT 1",
+        [stage.step_number, stage.step_name],
+    ).fetchone()
+    return row[0] if row else None
+
+
+def run_stages(conn, stages, params, resume=False, profile_dir=None, persistent=True):
+    """
+    Execute stages in order and return one report dict per stage.
+    - Bound variables replace the script's SET VARIABLE defaults.
+    - persistent=True turns TEMP tables into regular tables so they survive for resume.
+    - resume=True skips the leading stages already COMPLETE with the same SQL + params;
+      the first changed or unfinished stage and everything after it is re-run. Variables
+      are per-connection, so the values a skipped stage SET (constants and computed ones
+      like rows_before_merge) are restored from _stage_runs; a COMPLETE row recorded
+      without them re-runs its stage.
+    - profile_dir: DuckDB JSON profile (EXPLAIN ANALYZE tree) per heavy statement.
+    """
+    bound = {VARIABLES[k] for k in params if k in VARIABLES}
+    _bind_variables(conn, params)
+    done = _load_state(conn)
+    if not resume:
+        conn.execute(f"DELETE FROM {STATE_TABLE}")
+
+    report, skipping = [], resume
+    for stage in stages:
+        fingerprint = stage.fingerprint(params)
+        names = _stage_variables(stage, bound)
+        previous, variables = done.get(stage.key, (None, None))
+        if skipping and previous == fingerprint and (variables is not None or not names):
+            if variables is not None:
+                _restore_variables(conn, variables)
+            print(f"  [{stage.key}] ✓ skipped (completed in a previous run)")
+            report.append({'stage': stage.key, 'status': 'SKIPPED'})
+            continue
+        skipping = False
+
+        stage_dir = Path(profile_dir) / stage.key if profile_dir else None
+        if stage_dir:
+            stage_dir.mkdir(parents=True, exist_ok=True)
+        start = time.perf_counter()
+        slowest = (0.0, None)
+        for j, stmt in enumerate(stage.statements):
+            m = SET_VARIABLE.match(stmt)
+            if m and m.group(1) in bound:
+                continue
+            if persistent:
+                stmt = TEMP_TABLE.sub(lambda t: f"CREATE {t.group(1) or ''}TABLE", stmt)
+            profiled = stage_dir is not None and PROFILED.match(stmt)
+            if profiled:
+                conn.execute("PRAGMA enable_profiling = 'json'")
+                conn.execute("SET profiling_output = ?", [str(stage_dir / f"stmt_{j:03d}.json")])
+            t0 = time.perf_counter()
+            conn.execute(stmt)
+            elapsed = time.perf_counter() - t0
+            if profiled:
+                conn.execute("PRAGMA disable_profiling")
+            if elapsed > slowest[0]:
+                slowest = (elapsed, j)
+        seconds = time.perf_counter() - start
+
+        rows = _stage_rows(conn, stage) if stage.step_number >= 0 else None
+        conn.execute(f"DELETE FROM {STATE_TABLE} WHERE stage_key = ?", [stage.key])
+        conn.execute(f"INSERT INTO {STATE_TABLE} VALUES (?, ?, 'COMPLETE', ?, ?, CURRENT_TIMESTAMP, ?)",
+                     [stage.key, fingerprint, seconds, rows, _save_variables(conn, names)])
+        print(f"  [{stage.key}] {seconds:8.2f}s  rows={rows if rows is not None else '-'}"
+              f"  slowest=stmt_{slowest[1]:03d} ({slowest[0]:.2f}s)")
+        report.append({'stage': stage.key, 'status': 'COMPLETE', 'seconds': seconds, 'rows': rows,
+                       'slowest_statement': slowest[1], 'profile_dir': str(stage_dir) if stage_dir else None})
+    return report
+
+
+# ============================================================================
+# SAMPLE MANIFEST
+# ============================================================================
+# A sample is fully described by (source fingerprints, params, seed). The manifest is
+# written next to the export, so the Parquet can be dropped and regenerated row for row
+# with rematerialize(), as long as the sources are unchanged.
+
+def _connect(database, paths):
+    # Persistent file for resume; ':memory:' for a throwaway run.
+    # For MotherDuck: config['database'] = 'md:finrag_db?motherduck_token=xxx'
+    conn = duckdb.connect(database)
+    if any(str(p).startswith('s3://') for p in paths):
+        # Install S3 support
+        conn.execute("INSTALL httpfs; LOAD httpfs;")
+        conn.execute("SET s3_region = 'us-east-1';")
+    return conn
+
+
+def manifest_path(config):
+    return f"{config['export_path']}/{config['result_parquet_name']}.manifest.json"
+
+
+def source_fingerprint(conn, path):
+    """sha256 over the Parquet footers (file names, row groups, column chunk sizes); reads no data"""
+    rows = conn.execute(
+        "SELECT file_name, row_group_id, row_group_num_rows, path_in_schema, total_compressed_size "
+        "FROM parquet_metadata(?) ORDER BY ALL", [path]).fetchall()
+    rows = [(Path(r[0]).name, *r[1:]) for r in rows]    # local copy and S3 object fingerprint alike
+    return hashlib.sha256(json.dumps(rows, default=str).encode()).hexdigest()
+
+
+def _sources(config):
+    sources = {'parquet_source': config['parquet_source']}
+    if config['enable_incremental_injection']:
+        sources['incremental_data_path'] = config['incremental_data_path']
+    return sources
+
+
+def build_manifest(conn, config):
+    rows, digest = conn.execute(
+        "SELECT COUNT(*), md5(string_agg(sentenceID, ',' ORDER BY sentenceID)) FROM sample_1m_finrag"
+    ).fetchone()
+    allocations = conn.execute(
+        "SELECT temporal_bin, population, target_n FROM bin_allocations ORDER BY priority_order").fetchall()
+    return {
+        'sources': {k: {'path': path, 'fingerprint': source_fingerprint(conn, path)}
+                    for k, path in _sources(config).items()},
+        'params': {k: config[k] for k in MANIFEST_KEYS},
+        'bin_allocations': [dict(zip(('temporal_bin', 'population', 'target_n'), r)) for r in allocations],
+        'rows': rows,
+        'sentence_id_digest': digest,
+        'duckdb_version': duckdb.__version__,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def write_manifest(conn, manifest, path):
+    """COPY rather than open(), so an s3:// export path works through httpfs"""
+    path = str(path).replace("'", "''")
+    conn.execute(f"COPY (SELECT ?::JSON AS manifest) TO '{path}' (FORMAT JSON)", [json.dumps(manifest)])
+
+
+def read_manifest(conn, path):
+    content = conn.execute("SELECT content FROM read_text(?)", [str(path)]).fetchone()[0]
+    return json.loads(content)['manifest']
+
+
+def check_sources(conn, manifest):
+    """RuntimeError if any source changed since the manifest was written"""
+    for key, source in manifest['sources'].items():
+        if source_fingerprint(conn, source['path']) != source['fingerprint']:
+            raise RuntimeError(f"{key} changed since the sample was drawn: {source['path']}")
+
 
 # ============================================================================
 # CORE FUNCTION
 # ============================================================================
 
-def run_sampling(**kwargs):
-    """Execute DuckDB sampling pipeline"""
-    
+def run_sampling(resume=False, config=None, manifest=None, **kwargs):
+    """
+    Execute DuckDB sampling pipeline stage by stage (resumable with a database file).
+    With a manifest, its params replace CONFIG's, the sources must be unchanged and the
+    resulting sentenceIDs must match the recorded digest (RuntimeError otherwise).
+    """
+    config = {**CONFIG, **(config or {})}
+    if manifest:
+        config.update(manifest['params'])
+        config.update({k: s['path'] for k, s in manifest['sources'].items()})
+
     print(f"Starting sampling - {datetime.now()}")
-    
-    # Connect (use :memory: for cloud, or MotherDuck connection string)
-    conn = duckdb.connect(':memory:')
-    # For MotherDuck: conn = duckdb.connect('md:finrag_db?motherduck_token=xxx')
-    
-    # Install S3 support
-    conn.execute("INSTALL httpfs; LOAD httpfs;")
-    conn.execute(f"SET s3_region='us-east-1';")
-    
-    # Set variables
-    conn.execute(f"SET VARIABLE parquet_source_path = '{CONFIG['parquet_source']}';")
-    conn.execute(f"SET VARIABLE result_save_path = '{CONFIG['export_path']}';")
-    conn.execute(f"SET VARIABLE result_parquet_name = 'sec_finrag_1M_sample';")
-    conn.execute(f"SET VARIABLE sample_size_n = {CONFIG['sample_size']};")
-    conn.execute(f"SET VARIABLE sample_version = 'v1.0_prod';")
-    
-    # Load and execute SQL
-    with open(CONFIG['sql_script'], 'r') as f:
-        sql_script = f.read()
-    
-    conn.execute(sql_script)
-    
+
+    conn = _connect(config['database'], [config['parquet_source'], config['export_path']])
+    if manifest:
+        check_sources(conn, manifest)
+
+    # Variables are bound as parameters; the script is split and run by logged stage
+    with open(config['sql_script'], 'r') as f:
+        stages = split_stages(conn, f.read())
+    if config['sampling_method'] == 'hash':
+        stages = use_hash_sampling(stages)
+    params = {k: config[k] for k in VARIABLES if k in config}
+    report = run_stages(conn, stages, params, resume=resume, profile_dir=config.get('profile_dir'),
+                        persistent=config['database'] != ':memory:')
+
+    incremental_sampler.reset(conn, config['sampling_method'])
+
     # Get result count
-    row_count = conn.execute("SELECT COUNT(*) FROM sample_1m_finrag").fetchone()[0]
-    print(f"✓ Complete - Sampled {row_count:,} sentences")
-    
+    result = build_manifest(conn, config)
+    row_count = result['rows']
+    total = sum(r.get('seconds', 0.0) for r in report)
+    print(f"✓ Complete - Sampled {row_count:,} sentences in {total:.1f}s")
+
+    if manifest and manifest.get('increments'):
+        # rematerialize() replays the refreshes next and writes the manifest once at the end
+        conn.close()
+        return row_count
+    if manifest and result['sentence_id_digest'] != manifest['sentence_id_digest']:
+        conn.close()
+        raise RuntimeError(f"Rematerialized sample differs from the manifest "
+                           f"({row_count:,} rows vs {manifest['rows']:,})")
+    write_manifest(conn, result, manifest_path(config))
+    print(f"✓ Manifest: {manifest_path(config)}")
+
     conn.close()
     return row_count
 
 
+def refresh_sample(new_source, config=None, tolerance=0.02):
+    """
+    Fold a Parquet file of new corpus rows (same schema as the source) into sample_1m_finrag
+    without re-stratifying the full corpus (incremental_sampler.py). Bins are kept within
+    `tolerance` of their targets. Updates the manifest and re-exports the sample.
+    """
+    config = {**CONFIG, **(config or {})}
+    conn = _connect(config['database'], [config['parquet_source'], config['export_path'], new_source])
+    if not incremental_sampler.table_exists(conn, 'sample_1m_finrag'):
+        conn.close()
+        raise RuntimeError(f"No sample_1m_finrag in {config['database']} - run run_sampling() first")
+    manifest = read_manifest(conn, manifest_path(config))
+    report, result = _refresh(conn, config, manifest, new_source, tolerance)
+    write_manifest(conn, result, manifest_path(config))
+    conn.close()
+    return report
+
+
+def _refresh(conn, config, manifest, new_source, tolerance):
+    """One refresh on an open connection; returns (report, updated manifest) and writes no manifest"""
+    config = {**config, **manifest['params'], **{k: s['path'] for k, s in manifest['sources'].items()}}
+
+    with open(config['sql_script'], 'r') as f:
+        stages = split_stages(conn, f.read())
+    base = manifest['sources']['parquet_source']
+    incremental_sampler.bootstrap(conn, base['path'], base['fingerprint'], config['sample_seed'])
+    _bind_variables(conn, {k: config[k] for k in VARIABLES if k in config})
+    report = incremental_sampler.refresh(
+        conn, new_source, full_row_select(stages), source_fingerprint(conn, new_source),
+        seed=config['sample_seed'], sample_size=config['sample_size'],
+        older_bin2_weight=config['older_bin2_weight'], older_bin1_weight=config['older_bin1_weight'],
+        tolerance=tolerance, feature_sql=feature_updates(stages))
+    for name, b in report['bins'].items():
+        print(f"  {name}: {b['before']:>9,} -> {b['after']:>9,}  (target {b['target']:,})"
+              f"{'  rebalanced' if b['rebalanced'] else ''}")
+    print(f"✓ Refreshed - {report['new_rows']:,} new rows: +{report['inserted']:,} new, "
+          f"+{report['topped_up']:,} top-up, -{report['deleted']:,} trimmed")
+
+    path = f"{config['export_path']}/{config['result_parquet_name']}.parquet".replace("'", "''")
+    conn.execute(f"COPY sample_1m_finrag TO '{path}' (FORMAT PARQUET, COMPRESSION 'ZSTD')")
+    result = build_manifest(conn, config)
+    result['increments'] = manifest.get('increments', []) + [
+        {'path': new_source, 'fingerprint': source_fingerprint(conn, new_source), 'tolerance': tolerance}]
+    return report, result
+
+
+def rematerialize(path, config=None):
+    """Regenerate a sample from its manifest (e.g. after deleting the exported Parquet)"""
+    config = {**CONFIG, **(config or {})}
+    conn = _connect(':memory:', [path])
+    manifest = read_manifest(conn, path)
+    conn.close()
+    row_count = run_sampling(config=config, manifest=manifest)
+    increments = manifest.get('increments', [])
+    if not increments:
+        return row_count
+
+    # Replay the refreshes in order; each source must be unchanged
+    config = {**config, **manifest['params'], **{k: s['path'] for k, s in manifest['sources'].items()}}
+    conn = _connect(config['database'], [config['parquet_source'], config['export_path']]
+                    + [inc['path'] for inc in increments])
+    result = {**manifest, 'increments': []}
+    for inc in increments:
+        if source_fingerprint(conn, inc['path']) != inc['fingerprint']:
+            conn.close()
+            raise RuntimeError(f"increment changed since the sample was refreshed: {inc['path']}")
+        _, result = _refresh(conn, config, result, inc['path'], inc['tolerance'])
+    if result['sentence_id_digest'] != manifest['sentence_id_digest']:
+        conn.close()
+        raise RuntimeError(f"Rematerialized sample differs from the manifest "
+                           f"({result['rows']:,} rows vs {manifest['rows']:,})")
+    write_manifest(conn, result, manifest_path(config))
+    print(f"✓ Manifest: {manifest_path(config)}")
+    conn.close()
+    return result['rows']
+
+
 # ============================================================================
 # AIRFLOW DAG (Optional)
 # ============================================================================
@@ -118,7 +536,13 @@ def create_dag():
 
 # Standalone execution
 if __name__ == '__main__':
-    run_sampling()
+    import sys
+    if '--rematerialize' in sys.argv:
+        rematerialize(sys.argv[sys.argv.index('--rematerialize') + 1])
+    elif '--refresh' in sys.argv:
+        refresh_sample(sys.argv[sys.argv.index('--refresh') + 1])
+    else:
+        run_sampling(resume='--resume' in sys.argv)
 
 # Airflow auto-registration
 try:
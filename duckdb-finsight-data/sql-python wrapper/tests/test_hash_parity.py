@@ -0,0 +1,75 @@
+"""
+Hash Parity - DuckDB hash_sql and Python hash_value / hash_values must agree bit for bit
+A sample is described by (source fingerprint, params, seed) only while they do.
+
+python -m pytest "duckdb-finsight-data/sql-python wrapper/tests/test_hash_parity.py" -q
+"""
+
+import sys
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pyarrow as pa
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parents[3] / 'src'))
+import hash_sampler
+import hash_sampling
+
+
+IDS = ([f"{cik}_10K_{year}_{i}" for cik in (320193, 1652044) for year in (2006, 2020) for i in range(500)]
+       + ['', 'x', 'Café ✓', "o'brien", '0' * 200] + [str(i) for i in range(1000)])
+SEEDS = [0, 42, 7919, 2 ** 31 - 1]
+
+
+def duckdb_hashes(ids, seed):
+    with duckdb.connect() as conn:
+        conn.execute("CREATE TABLE ids AS SELECT * FROM UNNEST(?) t(id)", [ids])
+        rows = conn.execute(f"SELECT id, {hash_sampler.hash_sql('id', seed)} FROM ids").fetchall()
+    return dict(rows)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_hash_sql_equals_hash_value(seed):
+    sql = duckdb_hashes(IDS, seed)
+    assert all(sql[i] == hash_sampling.hash_value(i, seed) for i in IDS)
+    assert max(sql.values()) < hash_sampling.HASH_SPACE
+
+
+def test_hash_sql_seed_expression():
+    with duckdb.connect() as conn:
+        conn.execute("SET VARIABLE sample_seed = 42")
+        h = conn.execute(f"SELECT {hash_sampler.hash_sql(repr('s1'), 'getvariable(' + repr('sample_seed') + ')')}"
+                         ).fetchone()[0]
+    assert h == hash_sampling.hash_value('s1', 42)
+
+
+@pytest.mark.parametrize('backend', ['duckdb', 'polars_hash', 'hashlib'])
+def test_hash_values_backends(monkeypatch, backend):
+    if backend == 'polars_hash' and not hash_sampling.POLARS_HASH_AVAILABLE:
+        pytest.skip('polars-hash not installed')
+    monkeypatch.setattr(hash_sampling, 'DUCKDB_AVAILABLE', backend == 'duckdb')
+    monkeypatch.setattr(hash_sampling, 'POLARS_HASH_AVAILABLE', backend == 'polars_hash')
+
+    sql = duckdb_hashes(IDS, 42)
+    expected = np.array([sql[i] for i in IDS], dtype=np.uint64)
+    for ids in (IDS, np.array(IDS), pa.array(IDS), pa.chunked_array([IDS[:700], IDS[700:]])):
+        got = hash_sampling.hash_values(ids, seed=42)
+        assert got.dtype == np.uint64 and (got == expected).all()
+    assert len(hash_sampling.hash_values([], seed=42)) == 0
+
+
+def test_integer_ids_hash_as_their_text():
+    ints = list(range(1000))
+    assert (hash_sampling.hash_values(ints, seed=42)
+            == hash_sampling.hash_values([str(i) for i in ints], seed=42)).all()
+
+
+@pytest.mark.parametrize('rate', [0.0, 1e-9, 0.05, 0.3333333333, 0.999, 1.0, 2.5])
+def test_thresholds_agree(rate):
+    with duckdb.connect() as conn:
+        sql = conn.execute(f"SELECT {hash_sampler.threshold_sql(repr(rate) + '::DOUBLE')}").fetchone()[0]
+    assert sql == hash_sampler.threshold(rate) == hash_sampling.threshold(rate)
+    assert hash_sampler.HASH_BITS == hash_sampling.HASH_BITS
@@ -0,0 +1,181 @@
+"""
+Incremental Sampler - refresh() against a full hash-method run over base + increment
+Runs 31_run_stratified.sql on a small synthetic corpus in a local DuckDB file (no S3).
+
+python -m pytest "duckdb-finsight-data/sql-python wrapper/tests/test_incremental_sampler.py" -q
+"""
+
+import sys
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import polars as pl
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+import incremental_sampler
+import sample
+from hash_sampler import run_hash_sampling
+
+
+SQL_SCRIPT = Path(__file__).parents[2] / 'sql' / '31_run_stratified.sql'
+SEED = 42
+
+
+def write_corpus(path, n, first_id=0, seed=0, ciks=(1, 90), years=(2004, 2020)):
+    """Rows in the corpus schema; ciks past 75 and years outside 2006-2020 are filtered by STEP B1"""
+    rng = np.random.default_rng(seed)
+    cik = rng.integers(ciks[0], ciks[1] + 1, n)
+    year = rng.integers(years[0], years[1] + 1, n)
+    ids = range(first_id, first_id + n)
+    pl.DataFrame({
+        'cik': [f"{c:010d}" for c in cik],
+        'sentence': [f"Sentence {i}: revenue increased 12% to $4.1 million compared to 2019." if i % 3 == 0
+                     else f"Sentence {i} about the risk factors of the company." for i in ids],
+        'section': rng.integers(0, 20, n),
+        'labels': rng.integers(0, 2, n),
+        'filingDate': [f"{y + 1}-03-01" for y in year],
+        'name': 'Company',
+        'docID': [f"{c}_10K_{y}" for c, y in zip(cik, year)],
+        'sentenceID': [f"s{i}" for i in ids],
+        'sentenceCount': 10,
+        'tickers': [['TCKR']] * n,
+        'exchanges': [['NYSE']] * n,
+        'entityType': 'operating',
+        'sic': '1000',
+        'stateOfIncorporation': 'DE',
+        'tickerCount': 1,
+        'acceptanceDateTime': '2020-03-01T00:00:00',
+        'form': '10-K',
+        'reportDate': [f"{y}-12-31" for y in year],
+        'returns': 1.0,
+    }).write_parquet(path)
+    return str(path)
+
+
+def write_api_file(path):
+    """One row in the API staging schema of STEP C1b (incremental_data_path)"""
+    pl.DataFrame({
+        'sentenceID': ['api0'], 'cik': ['0000000001'], 'sentence': ['Revenue from the API feed grew.'],
+        'section_item': ['ITEM_1'], 'section_ID': pl.Series([1], dtype=pl.Int32), 'name': ['Company'],
+        'docID': ['1_10K_2020'], 'filingDate': ['2021-03-01'], 'reportDate': ['2020-12-31'],
+        'report_year': pl.Series([2020], dtype=pl.Int32), 'form': ['10-K'], 'sic': ['1000'], 'SIC_1': ['1'],
+        'temporal_bin': ['bin_2016_2020'], 'sample_created_at': pl.Series([None], dtype=pl.Datetime),
+        'last_modified_date': pl.Series([None], dtype=pl.Datetime), 'sample_version': pl.Series([None], dtype=pl.String),
+        'source_file_path': pl.Series([None], dtype=pl.String),
+    }).write_parquet(path)
+    return str(path)
+
+
+def make_database(path):
+    """sampler.duckdb with the two tables 31_run_stratified.sql expects to exist"""
+    with duckdb.connect(str(path)) as conn:
+        conn.execute("CREATE TABLE finrag_tgt_comps_75 AS SELECT range::INTEGER AS cik_int FROM range(1, 76)")
+        conn.execute("""
+            CREATE TABLE dim_sec_sections AS
+            SELECT range::INTEGER AS hf_section_code, 'ITEM_' || range AS sec_item_canonical,
+                   'Item ' || range AS section_name, 'CAT' AS section_category, 'P1' AS priority
+            FROM range(0, 20)""")
+    return str(path)
+
+
+def make_config(tmp_path, parquet_source, sample_size=6000, **overrides):
+    (tmp_path / 'out').mkdir(exist_ok=True)
+    api_file = write_api_file(tmp_path / 'api.parquet')
+    return {
+        'parquet_source': parquet_source,
+        'export_path': str(tmp_path / 'out'),
+        'sql_script': str(SQL_SCRIPT),
+        'database': make_database(tmp_path / 'sampler.duckdb'),    # stem must stay 'sampler'
+        'profile_dir': None,
+        'sample_size': sample_size,
+        'sample_seed': SEED,
+        'sampling_method': 'hash',
+        'incremental_data_path': api_file,    # C1b is off, but STEP B8 still reads its schema
+        **overrides,
+    }
+
+
+def sampled_ids(conn):
+    return {r[0] for r in conn.execute(
+        f"SELECT sentenceID FROM sample_1m_finrag WHERE {incremental_sampler.SAMPLED_ROWS}").fetchall()}
+
+
+@pytest.fixture(scope='module')
+def corpus(tmp_path_factory):
+    """base (30k rows), an increment skewed to the modern bin, and base + increment in one file"""
+    root = tmp_path_factory.mktemp('corpus')
+    base = write_corpus(root / 'base.parquet', 30_000)
+    increment = write_corpus(root / 'increment.parquet', 4_000, first_id=1_000_000, seed=1, years=(2014, 2020))
+    union = root / 'union.parquet'
+    with duckdb.connect() as conn:
+        conn.execute(f"COPY (SELECT * FROM read_parquet(['{base}', '{increment}'])) TO '{union}' (FORMAT PARQUET)")
+    return {'base': base, 'increment': increment, 'union': str(union)}
+
+
+@pytest.mark.parametrize('sample_size', [2_500, 6_000, 12_000])
+def test_refresh_at_zero_tolerance_equals_full_run(corpus, tmp_path, sample_size):
+    config = make_config(tmp_path, corpus['base'], sample_size=sample_size)
+    sample.run_sampling(config=config)
+    report = sample.refresh_sample(corpus['increment'], config=config, tolerance=0.0)
+    assert report['new_rows'] > 0 and any(b['rebalanced'] for b in report['bins'].values())
+
+    with duckdb.connect(config['database']) as conn:
+        got = sampled_ids(conn)
+        run_hash_sampling(conn, corpus['union'], sample_size=sample_size, seed=SEED)
+        want = {r[0] for r in conn.execute("SELECT sentenceID FROM sample_sentenceIDs").fetchall()}
+    assert got == want
+
+
+def test_refresh_fills_section_d_flags(corpus, tmp_path):
+    config = make_config(tmp_path, corpus['base'])
+    sample.run_sampling(config=config)
+    report = sample.refresh_sample(corpus['increment'], config=config)
+    assert report['inserted'] > 0
+
+    with duckdb.connect(config['database']) as conn:
+        rows, scored, flagged, kpi = conn.execute(f"""
+            SELECT COUNT(*), COUNT(retrieval_signal_score), COUNT(has_numbers), COUNT(*) FILTER (likely_kpi)
+            FROM sample_1m_finrag WHERE {incremental_sampler.REFRESHED_ROWS}""").fetchone()
+    assert rows == report['inserted'] + report['topped_up']
+    assert scored == flagged == rows and kpi > 0
+
+
+def test_already_applied_file_raises(corpus, tmp_path):
+    config = make_config(tmp_path, corpus['base'])
+    sample.run_sampling(config=config)
+    sample.refresh_sample(corpus['increment'], config=config)
+    with pytest.raises(ValueError, match='already applied'):
+        sample.refresh_sample(corpus['increment'], config=config)
+    with pytest.raises(ValueError, match='already applied'):    # the base itself is recorded too
+        sample.refresh_sample(corpus['base'], config=config)
+
+
+def test_failed_refresh_rolls_back(corpus, tmp_path):
+    config = make_config(tmp_path, corpus['base'], sample_size=12_000)
+    sample.run_sampling(config=config)
+
+    def state(conn):
+        return (sorted(sampled_ids(conn)),
+                conn.execute("SELECT * FROM sample_strata ORDER BY ALL").fetchall(),
+                conn.execute("SELECT source_path, fingerprint FROM sample_sources").fetchall())
+
+    with duckdb.connect(config['database']) as conn:
+        with open(SQL_SCRIPT) as f:
+            stages = sample.split_stages(conn, f.read())
+        base_fp = sample.source_fingerprint(conn, corpus['base'])
+        incremental_sampler.bootstrap(conn, corpus['base'], base_fp, SEED)
+        sample._bind_variables(conn, {k: v for k, v in {**sample.CONFIG, **config}.items() if k in sample.VARIABLES})
+        before = state(conn)
+
+        args = (corpus['increment'], sample.full_row_select(stages),
+                sample.source_fingerprint(conn, corpus['increment']))
+        kwargs = dict(seed=SEED, sample_size=config['sample_size'], tolerance=0.0)
+        broken = sample.feature_updates(stages) + ["UPDATE sample_1m_finrag SET likely_kpi = no_such_column"]
+        with pytest.raises(duckdb.BinderException):
+            incremental_sampler.refresh(conn, *args, feature_sql=broken, **kwargs)
+        assert state(conn) == before
+
+        report = incremental_sampler.refresh(conn, *args, feature_sql=sample.feature_updates(stages), **kwargs)
+        assert report['inserted'] > 0 and state(conn) != before
@@ -0,0 +1,92 @@
+"""
+Sample Manifest - run_sampling -> delete the export -> rematerialize gives the same rows
+Runs 31_run_stratified.sql on a small synthetic corpus in a local DuckDB file (no S3).
+
+python -m pytest "duckdb-finsight-data/sql-python wrapper/tests/test_manifest.py" -q
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+import duckdb
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+import sample
+from test_incremental_sampler import make_config, make_database, write_corpus
+
+
+def drop_sample(config):
+    """Keep only the manifest: export and database are gone, the database is recreated empty"""
+    manifest = Path(manifest_path(config))
+    kept = manifest.parent.parent / 'kept.manifest.json'
+    shutil.copy(manifest, kept)
+    shutil.rmtree(config['export_path'])
+    Path(config['export_path']).mkdir()
+    Path(config['database']).unlink()
+    make_database(config['database'])
+    return kept
+
+
+def manifest_path(config):
+    return sample.manifest_path({**sample.CONFIG, **config})
+
+
+def sample_rows(config):
+    with duckdb.connect(config['database']) as conn:
+        return conn.execute("SELECT sentenceID FROM sample_1m_finrag ORDER BY ALL").fetchall()
+
+
+@pytest.mark.parametrize('sampling_method', ['window', 'hash'])
+def test_rematerialize_reproduces_the_sample(tmp_path, sampling_method):
+    base = write_corpus(tmp_path / 'base.parquet', 20_000)
+    config = make_config(tmp_path, base, sample_size=4_000, sampling_method=sampling_method)
+    rows = sample.run_sampling(config=config)
+    before = sample_rows(config)
+
+    kept = drop_sample(config)
+    assert sample.rematerialize(str(kept), config=config) == rows
+    assert sample_rows(config) == before
+    assert Path(manifest_path(config)).exists()
+
+
+def test_rematerialize_replays_refreshes(tmp_path):
+    base = write_corpus(tmp_path / 'base.parquet', 20_000)
+    increment = write_corpus(tmp_path / 'increment.parquet', 3_000, first_id=1_000_000, seed=1, years=(2014, 2020))
+    config = make_config(tmp_path, base, sample_size=4_000, sampling_method='hash')
+    sample.run_sampling(config=config)
+    sample.refresh_sample(increment, config=config)
+    before = sample_rows(config)
+
+    kept = drop_sample(config)
+    assert sample.rematerialize(str(kept), config=config) == len(before)
+    assert sample_rows(config) == before
+
+    kept = drop_sample(config)
+    write_corpus(increment, 3_000, first_id=2_000_000, seed=2, years=(2014, 2020))
+    with pytest.raises(RuntimeError, match='increment changed'):
+        sample.rematerialize(str(kept), config=config)
+
+
+def test_changed_source_raises(tmp_path):
+    base = write_corpus(tmp_path / 'base.parquet', 20_000)
+    config = make_config(tmp_path, base, sample_size=4_000)
+    sample.run_sampling(config=config)
+
+    kept = drop_sample(config)
+    write_corpus(base, 20_000, seed=1)    # same path and row count, different content
+    with pytest.raises(RuntimeError, match='parquet_source changed'):
+        sample.rematerialize(str(kept), config=config)
+
+
+def test_digest_mismatch_raises(tmp_path):
+    base = write_corpus(tmp_path / 'base.parquet', 20_000)
+    config = make_config(tmp_path, base, sample_size=4_000)
+    sample.run_sampling(config=config)
+
+    with duckdb.connect() as conn:
+        manifest = sample.read_manifest(conn, manifest_path(config))
+    manifest['sentence_id_digest'] = '0' * 32
+    with pytest.raises(RuntimeError, match='differs from the manifest'):
+        sample.run_sampling(config=config, manifest=manifest)
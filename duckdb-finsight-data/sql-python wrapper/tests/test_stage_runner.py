@@ -0,0 +1,109 @@
+"""
+Stage Runner - split_stages + run_stages resume on a 3-stage toy script (local DuckDB file, no S3)
+
+python -m pytest "duckdb-finsight-data/sql-python wrapper/tests/test_stage_runner.py" -q
+"""
+
+import sys
+from pathlib import Path
+
+import duckdb
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+from sample import STATE_TABLE, run_stages, split_stages
+
+
+SCRIPT = """
+CREATE TABLE IF NOT EXISTS execution_log (
+    step_number INTEGER, step_name VARCHAR, row_count BIGINT, execution_time TIMESTAMP
+);
+SET VARIABLE sample_size_n = 1000;      -- bound by the runner
+SET VARIABLE scale = 10;
+CREATE OR REPLACE TEMP TABLE base AS SELECT range AS id FROM range(100);
+INSERT INTO execution_log VALUES (0, 'LOAD', (SELECT COUNT(*) FROM base), CURRENT_TIMESTAMP);
+
+-- STEP 1: reads the bound variable, computes one
+CREATE OR REPLACE TEMP TABLE picked AS
+SELECT id * getvariable('scale') AS id FROM base ORDER BY id LIMIT getvariable('sample_size_n');
+SET VARIABLE rows_before_merge = (SELECT COUNT(*) FROM picked);
+INSERT INTO execution_log VALUES (1, 'SAMPLE', (SELECT COUNT(*) FROM picked), CURRENT_TIMESTAMP);
+
+-- STEP 2: reads the computed variable of STEP 1
+CREATE OR REPLACE TABLE summary AS
+SELECT getvariable('rows_before_merge') AS rows_before, getvariable('scale') AS scale,
+       MAX(id) AS max_id FROM picked {failure};
+INSERT INTO execution_log VALUES (2, 'SUMMARY', (SELECT COUNT(*) FROM summary), CURRENT_TIMESTAMP);
+
+SELECT * FROM execution_log;
+"""
+
+
+def run(database, sample_size=10, resume=False, fail=False, persistent=True):
+    """One run on a fresh connection (variables do not survive it); returns the stage statuses"""
+    with duckdb.connect(str(database)) as conn:
+        stages = split_stages(conn, SCRIPT.format(failure='JOIN missing_table USING (id)' if fail else ''))
+        report = run_stages(conn, stages, {'sample_size': sample_size}, resume=resume, persistent=persistent)
+        return [r['status'] for r in report]
+
+
+def summary(database):
+    with duckdb.connect(str(database)) as conn:
+        return conn.execute("SELECT rows_before, scale, max_id FROM summary").fetchone()
+
+
+def test_split_stages():
+    with duckdb.connect() as conn:
+        stages = split_stages(conn, SCRIPT.format(failure=''))
+    assert [s.key for s in stages] == ['00_0_LOAD', '01_1_SAMPLE', '02_2_SUMMARY', '03_-1_REPORT']
+    assert stages[1].statements[0].startswith('CREATE OR REPLACE TEMP TABLE picked')    # comments stripped
+    assert stages[3].statements == ['SELECT * FROM execution_log;']
+
+
+def test_fingerprint_covers_only_the_bound_variables_a_stage_reads():
+    with duckdb.connect() as conn:
+        load, sample, _, _ = split_stages(conn, SCRIPT.format(failure=''))
+    assert load.fingerprint({'sample_size': 10}) == load.fingerprint({'sample_size': 20})
+    assert sample.fingerprint({'sample_size': 10}) != sample.fingerprint({'sample_size': 20})
+
+
+def test_resume_skips_completed_stages(tmp_path):
+    db = tmp_path / 'sampler.duckdb'
+    assert run(db) == ['COMPLETE'] * 4
+    assert run(db, resume=True) == ['SKIPPED'] * 4
+    assert run(db) == ['COMPLETE'] * 4    # resume=False starts over
+
+
+def test_resume_after_failure_restores_computed_variables(tmp_path):
+    db = tmp_path / 'sampler.duckdb'
+    with pytest.raises(duckdb.CatalogException):
+        run(db, fail=True)
+
+    assert run(db, resume=True) == ['SKIPPED', 'SKIPPED', 'COMPLETE', 'COMPLETE']
+    assert summary(db) == (10, 10, 90)    # rows_before_merge and scale set by skipped stages
+
+
+def test_changed_bound_parameter_reruns_its_stages(tmp_path):
+    db = tmp_path / 'sampler.duckdb'
+    run(db, sample_size=10)
+    assert run(db, sample_size=20, resume=True) == ['SKIPPED', 'COMPLETE', 'COMPLETE', 'COMPLETE']
+    assert summary(db) == (20, 10, 190)
+
+
+def test_state_rows_without_variables_rerun_their_stage(tmp_path):
+    db = tmp_path / 'sampler.duckdb'
+    run(db)
+    with duckdb.connect(str(db)) as conn:    # state written before variables were recorded
+        conn.execute(f"UPDATE {STATE_TABLE} SET variables = NULL")
+    assert run(db, resume=True) == ['COMPLETE'] * 4
+    assert summary(db) == (10, 10, 90)
+
+
+@pytest.mark.parametrize('persistent', [True, False])
+def test_temp_tables_persist_for_resume(tmp_path, persistent):
+    db = tmp_path / 'sampler.duckdb'
+    run(db, persistent=persistent)
+    with duckdb.connect(str(db)) as conn:
+        tables = {t for (t,) in conn.execute("SELECT table_name FROM duckdb_tables()").fetchall()}
+    assert ({'base', 'picked'} <= tables) == persistent
+    assert 'summary' in tables
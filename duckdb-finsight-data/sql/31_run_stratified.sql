@@ -184,6 +184,7 @@ SET VARIABLE result_parquet_name = 'sec_finrag_1M_sample';
 SET VARIABLE company_table = 'finrag_tgt_comps_75';
 SET VARIABLE sample_size_n = 1000000;
 SET VARIABLE sample_version = 'v1.0_75companies_1M';
+SET VARIABLE sample_seed = 42;                  -- same source + params + seed = same sample, row for row
 
 -- Temporal bin weights
 SET VARIABLE priority_bin = 'bin_2016_2020'; 		-- 100% of latest bins.
@@ -458,10 +459,12 @@ WITH sampling_logic AS (
         ba.target_n as bin_target,
         ba.population as bin_population,
         
-        -- Stratification: Random order within each stratum
+        -- Stratification: seeded hash order within each stratum (60 bits of MD5('<seed>:<sentenceID>'),
+        -- same rule as hash_sampler.py / src/hash_sampling.py), so a rerun picks the same rows.
         ROW_NUMBER() OVER (
             PARTITION BY ct.temporal_bin, ct.cik_int, ct.report_year, ct.section
-            ORDER BY RANDOM()
+            ORDER BY CAST('0x' || substr(md5(CAST(getvariable('sample_seed') AS VARCHAR) || ':' || ct.sentenceID), 1, 15) AS UBIGINT),
+                     ct.sentenceID
         ) as rn_within_stratum,
         
         COUNT(*) OVER (
@@ -540,7 +543,7 @@ CREATE OR REPLACE TABLE sample_1m_finrag AS
 
 	SELECT 
 	    ROW_NUMBER() OVER (
-	        ORDER BY si.temporal_bin, corpus.reportDate, corpus.cik, corpus.section
+	        ORDER BY si.temporal_bin, corpus.reportDate, corpus.cik, corpus.section, corpus.sentenceID
 	    ) as sample_id,
 	    
 	    -- ═══════════════════════════════════════════════════════════════════
@@ -1197,8 +1200,14 @@ SET
     
     is_safe_harbor = regexp_matches(sentence,
         '\b(forward-looking statement|safe harbor|private securities litigation reform act|actual results may differ|risk factors described)\b',
-        'i'),
-    
+        'i');
+
+
+-- Score in its own UPDATE: SET expressions read the row's pre-update values,
+-- so a score computed in the statement above would only ever see NULL flags.
+-- (Python twin of this section: src_aws_etl/etl/feature_flags.py)
+UPDATE sample_1m_finrag
+SET
     retrieval_signal_score = (
         CAST(likely_kpi AS INTEGER) * 3 +
         CAST(has_numbers AS INTEGER) * 2 +
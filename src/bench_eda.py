@@ -0,0 +1,102 @@
+"""
+EDA backend benchmark - eda_summary (pandas vs Polars/Arrow, 1 vs N threads) and the
+single-pass Parquet profiler, on the small_full and large_full exports.
+
+python src/bench_eda.py                                  # exports found in data/exports
+python src/bench_eda.py --parquet data/exports/sec_filings_large_full.parquet --rows 5000000
+
+large_full (71.8M rows) does not fit in pandas; --rows takes the first N rows for the
+in-memory backends, while the streaming profiler always reads the whole file.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import time
+from pathlib import Path
+
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from eda import eda_summary
+from eda_stream import profile_parquet
+
+EXPORT_DIR = Path(__file__).resolve().parents[1] / "data" / "exports"
+
+
+def default_exports() -> list[Path]:
+    small = sorted(EXPORT_DIR.glob("*small_full*__full*.parquet"))
+    large = EXPORT_DIR / "sec_filings_large_full.parquet"
+    return small[:1] + ([large] if large.exists() else [])
+
+
+def head_table(path: Path, rows: int | None) -> pa.Table:
+    if rows is None:
+        return pq.read_table(path, memory_map=True)
+    batches, n = [], 0
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=min(rows, 250_000)):
+        batches.append(batch)
+        n += batch.num_rows
+        if n >= rows:
+            break
+    return pa.Table.from_batches(batches).slice(0, rows)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def bench(path: Path, rows: int | None, threads: int) -> None:
+    table = head_table(path, rows)
+    print("=" * 70)
+    print(f"{path.name} - {table.num_rows:,} rows in memory")
+    print("=" * 70)
+
+    df_pd = table.to_pandas()
+    df_pl = pl.from_arrow(table)
+    results = {
+        "pandas": timed(lambda: eda_summary(df_pd)),
+        "polars 1 thread": timed(lambda: eda_summary(df_pl, backend="polars", workers=1)),
+        f"polars {threads} threads": timed(lambda: eda_summary(df_pl, backend="polars", workers=threads)),
+    }
+    if rows is None or pq.ParquetFile(path).metadata.num_rows <= rows:
+        results["stream parquet"] = timed(lambda: profile_parquet(path))
+
+    base = results["pandas"][1]
+    for name, (_, elapsed) in results.items():
+        print(f"  {name:<20} {elapsed:8.2f}s   {table.num_rows / elapsed:>12,.0f} rows/sec   {base / elapsed:5.1f}x")
+
+    ref = results["pandas"][0]["text_len_stats"]
+    for name, (summary, _) in results.items():
+        for want, got in zip(ref, summary["text_len_stats"]):
+            assert all(abs(want[k] - got[k]) < 1e-6 for k in want if k != "column"), f"{name}: text stats differ"
+    print("  ✓ text length stats agree across backends")
+
+    if rows is not None:
+        _, elapsed = timed(lambda: profile_parquet(path, workers=threads))
+        total = pq.ParquetFile(path).metadata.num_rows
+        print(f"  stream parquet (whole file, {threads} procs): {elapsed:.2f}s   {total / elapsed:,.0f} rows/sec")
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Benchmark eda_summary backends on Parquet exports")
+    p.add_argument("--parquet", nargs="*", default=None, help="default: small_full and large_full in data/exports")
+    p.add_argument("--rows", type=int, default=None, help="head rows loaded for the in-memory backends")
+    p.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    args = p.parse_args()
+
+    paths = [Path(x) for x in args.parquet] if args.parquet else default_exports()
+    if not paths:
+        raise SystemExit(f"No exports found in {EXPORT_DIR} - pass --parquet")
+    for path in paths:
+        rows = args.rows
+        if rows is None and "large_full" in path.name:
+            rows = 5_000_000
+        bench(path, rows, args.threads)
+
+
+if __name__ == "__main__":
+    main()
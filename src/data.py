@@ -1,12 +1,24 @@
 from __future__ import annotations
 
+import hashlib
+import json
+import math
 import os
+import random
+from itertools import islice
 from pathlib import Path
-from typing import Optional, Tuple, Union, List
+from typing import Dict, Hashable, Iterable, Literal, Optional, Tuple, Union, List
 
+import numpy as np
 import pandas as pd
+import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
 from datasets import load_dataset, Dataset
 
+import export_cache
+import hash_sampling
+
 # -------- Paths --------
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DATA_DIR = PROJECT_ROOT / "data"
@@ -20,21 +32,89 @@ for p in (DATA_DIR, HF_CACHE, EXPORT_DIR):
 # -------------------------
 # Internal helpers
 # -------------------------
-def _to_pandas(ds: Union[Dataset, List[dict]], sample_n: Optional[int]) -> pd.DataFrame:
+ReturnType = Literal["pandas", "polars", "arrow"]
+Frame = Union[pd.DataFrame, pl.DataFrame, pa.Table]
+# rng: numpy draw per seed, the rows DataFrame.sample(n, random_state=seed) always returned; O(split) memory.
+# rng_fast: O(sample_n) numpy draw, different rows than rng. hash: the sample_n smallest hash(seed, sentenceID),
+# the same rule as the DuckDB sampler, so a sample is fixed by (source, sample_n, seed) and extends when sample_n grows.
+SampleMethod = Literal["rng", "rng_fast", "hash"]
+SAMPLE_METHODS = ("rng", "rng_fast", "hash")
+
+
+def _convert(table: pa.Table, return_type: ReturnType) -> Frame:
+    """Arrow table -> requested frame type. 'arrow' and (mostly) 'polars' do not copy."""
+    if return_type == "arrow":
+        return table
+    if return_type == "polars":
+        return pl.from_arrow(table)
+    if return_type == "pandas":
+        return table.to_pandas()
+    raise ValueError(f"return_type must be 'pandas', 'polars' or 'arrow', got {return_type!r}")
+
+
+def _sample_indices(
+    n_rows: int, sample_n: Optional[int], seed: int = 42, legacy: bool = True
+) -> Optional[np.ndarray]:
     """
-    Convert a Hugging Face Dataset (non-streaming) or a list of rows (streaming) to pandas.
-    Optionally down-sample.
+    Row positions of a uniform sample without replacement (None = all rows).
+    legacy=True: the exact draw of the old DataFrame.sample(n, random_state=seed) - same rows,
+    same order - so samples exported before the Arrow path are reproduced row for row.
+    RandomState.choice permutes all n_rows to get there: O(n_rows) time and 8 bytes per row
+    (~575 MB on large_full for a 300-row sample). legacy=False draws in O(sample_n) with
+    default_rng and returns sorted positions, so the take() walks the Arrow file front to back.
     """
+    if not sample_n:
+        return None
+    if legacy:
+        rng = np.random.RandomState(seed)    # legacy generator, kept for reproducibility
+        return rng.choice(n_rows, size=min(sample_n, n_rows), replace=False)
+    if sample_n >= n_rows:
+        return None
+    return np.sort(np.random.default_rng(seed).choice(n_rows, size=sample_n, replace=False))
+
+
+def _with_row_index(frame: Frame, idx: Optional[np.ndarray]) -> Frame:
+    """pandas only: index sampled rows by their source position, as DataFrame.sample did."""
+    if idx is not None and isinstance(frame, pd.DataFrame):
+        frame.index = pd.Index(idx)
+    return frame
+
+
+def _to_frame(
+    ds: Union[Dataset, List[dict]],
+    sample_n: Optional[int],
+    return_type: ReturnType = "pandas",
+    seed: int = 42,
+    sample_method: SampleMethod = "rng",
+    id_column: str = "sentenceID",
+) -> Frame:
+    """
+    Convert a Hugging Face Dataset (non-streaming) or a list of rows (streaming) to a frame.
+    For a Dataset the sample indices are drawn first and only those rows are taken from the
+    memory-mapped Arrow table, so a small sample never materializes the whole split.
+    sample_method='hash' reads only id_column to pick the rows (see hash_sampling.bottom_k_indices);
+    'rng' keeps the legacy DataFrame.sample rows at O(split) memory, 'rng_fast' is O(sample_n).
+    """
+    if sample_method not in SAMPLE_METHODS:
+        raise ValueError(f"sample_method must be one of {SAMPLE_METHODS}, got {sample_method!r}")
+    legacy = sample_method == "rng"
+
     if isinstance(ds, list):
-        df = pd.DataFrame(ds)
-        return df.sample(min(sample_n, len(df)), random_state=42) if sample_n else df
+        table = pa.Table.from_pylist(ds)
+        if sample_method == "hash":
+            idx = hash_sampling.bottom_k_indices(table.column(id_column), sample_n, seed)
+        else:
+            idx = _sample_indices(len(ds), sample_n, seed, legacy)
+        return _with_row_index(_convert(table if idx is None else table.take(idx), return_type), idx)
 
-    # Non-streaming HF Dataset supports .to_pandas()
-    df = ds.to_pandas()
-    if sample_n:
-        n = min(sample_n, len(df))
-        df = df.sample(n, random_state=42)
-    return df
+    if sample_method == "hash":
+        ids = ds.select_columns([id_column]).with_format("arrow")[:].column(id_column)
+        idx = hash_sampling.bottom_k_indices(ids, sample_n, seed)
+    else:
+        idx = _sample_indices(len(ds), sample_n, seed, legacy)
+    arrow_ds = ds.with_format("arrow")
+    table = arrow_ds[:] if idx is None else arrow_ds[idx.tolist()]
+    return _with_row_index(_convert(table, return_type), idx)
 
 
 def materialize_streaming_sample(ds_stream, sample_n: int = 1000) -> List[dict]:
@@ -50,6 +130,137 @@ def materialize_streaming_sample(ds_stream, sample_n: int = 1000) -> List[dict]:
     return rows
 
 
+# -------------------------
+# Streaming samplers (bounded memory, single pass)
+# -------------------------
+StreamSampler = Literal["head", "reservoir", "stratified", "hash"]
+
+# Temporal bins of 31_run_stratified.sql (A/B/C weighting is applied on the DuckDB side)
+TEMPORAL_BINS = {
+    "bin_2006_2009": (2006, 2009),
+    "bin_2010_2015": (2010, 2015),
+    "bin_2016_2020": (2016, 2020),
+}
+
+
+def temporal_bin(year: Optional[int]) -> Optional[str]:
+    for name, (lo, hi) in TEMPORAL_BINS.items():
+        if year is not None and lo <= year <= hi:
+            return name
+    return None
+
+
+def stratum_key(row: dict) -> Optional[Tuple]:
+    """
+    (cik_int, report_year, section) of a raw HF row, or None if 31_run_stratified.sql would
+    drop it (year outside 2006-2020, NULL section, NULL or <= 10 char sentence).
+    The SQL also partitions by temporal_bin, which report_year already determines.
+    """
+    sentence, section, report_date = row.get("sentence"), row.get("section"), row.get("reportDate")
+    if section is None or sentence is None or len(sentence) <= 10 or not report_date:
+        return None
+    year = int(str(report_date)[:4])
+    if temporal_bin(year) is None:
+        return None
+    return int(row["cik"]), year, section
+
+
+def load_strata_targets(path: Union[str, Path], per_stratum: int = 5) -> Dict[Tuple, int]:
+    """
+    {(cik_int, report_year, section): n} for stratified_stream_sample from a CSV or Parquet file
+    with columns cik, report_year, section and an optional n (default per_stratum).
+    """
+    path = Path(path)
+    frame = pl.read_parquet(path) if path.suffix == ".parquet" else pl.read_csv(path)
+    if "n" not in frame.columns:
+        frame = frame.with_columns(pl.lit(per_stratum).alias("n"))
+    return {(int(cik), int(year), section): int(n)
+            for cik, year, section, n in frame.select("cik", "report_year", "section", "n").iter_rows()}
+
+
+def reservoir_sample(
+    ds_stream: Iterable[dict],
+    sample_n: int,
+    seed: int = 42,
+    max_rows: Optional[int] = None,
+) -> List[dict]:
+    """
+    Uniform sample of sample_n rows from a stream of unknown length (Algorithm L).
+    Holds only sample_n rows; draws O(k log(n/k)) random numbers by skipping ahead.
+    max_rows caps how much of the stream is read (None = whole split).
+    """
+    rng = random.Random(seed)
+    it = iter(ds_stream) if max_rows is None else islice(ds_stream, max_rows)
+    reservoir = list(islice(it, sample_n))
+    if len(reservoir) < sample_n:
+        return reservoir
+
+    def u() -> float:
+        return rng.random() or 5e-324    # (0, 1): keeps the logs finite
+
+    w = math.exp(math.log(u()) / sample_n)
+    while True:
+        skip = int(math.log(u()) / math.log(1.0 - w))
+        row = next(islice(it, skip, None), None)
+        if row is None:
+            return reservoir
+        reservoir[rng.randrange(sample_n)] = row
+        w *= math.exp(math.log(u()) / sample_n)
+
+
+def stratified_stream_sample(
+    ds_stream: Iterable[dict],
+    per_stratum: int = 5,
+    targets: Optional[Dict[Hashable, int]] = None,
+    stop_when_full: bool = False,
+    oversample: float = 2.0,
+    seed: int = 42,
+    max_rows: Optional[int] = None,
+) -> List[dict]:
+    """
+    One reservoir per (cik_int, report_year, section) stratum (see stratum_key), so every
+    company/year/section in the scanned stream is represented, not just the head of the split.
+
+    - targets: {stratum: n} restricts sampling to those strata with their own sizes
+      (e.g. the 75 target companies); other rows are skipped. Default: every stratum, per_stratum each.
+    - stop_when_full: with targets, stop reading once every stratum has seen
+      oversample * n eligible rows. Each reservoir is uniform over what it saw before the stop,
+      so oversample trades download for less head-of-stream bias within a stratum.
+    Memory: sum of stratum sizes rows, plus one counter per stratum.
+    """
+    if stop_when_full and not targets:
+        raise ValueError("stop_when_full needs explicit targets - unseen strata cannot be known to be full")
+
+    rng = random.Random(seed)
+    reservoirs: Dict[Hashable, List[dict]] = {}
+    seen: Dict[Hashable, int] = {}
+    need = {k: math.ceil(n * oversample) for k, n in (targets or {}).items()}
+    unfilled = {k for k, n in need.items() if n > 0}
+
+    it = iter(ds_stream) if max_rows is None else islice(ds_stream, max_rows)
+    for row in it:
+        key = stratum_key(row)
+        if key is None or (targets is not None and key not in targets):
+            continue
+        size = targets[key] if targets is not None else per_stratum
+        count = seen.get(key, 0) + 1
+        seen[key] = count
+        bucket = reservoirs.setdefault(key, [])
+        if len(bucket) < size:
+            bucket.append(row)
+        else:
+            j = rng.randrange(count)    # Algorithm R: keep with probability size / count
+            if j < size:
+                bucket[j] = row
+
+        if stop_when_full and key in unfilled and count >= need[key]:
+            unfilled.discard(key)
+            if not unfilled:
+                break
+
+    return [row for bucket in reservoirs.values() for row in bucket]
+
+
 def _safe_name(name: str) -> str:
     """Make a filesystem-safe dataset+config name for filenames."""
     return name.replace("/", "__").replace(":", "__")
@@ -81,8 +292,21 @@ def load_hf_dataset(
     return ds
 
 
+def dataset_id(ds) -> Optional[str]:
+    """
+    Identity of a loaded split from its public cache_files (None for streaming datasets):
+    HF caches under a directory named by the builder config/revision hash, so new upstream
+    data changes it.
+    """
+    files = [Path(f["filename"]) for f in getattr(ds, "cache_files", None) or []]
+    if not files:
+        return None
+    blob = "\n".join(f"{p.parent.name}/{p.name}:{p.stat().st_size}" for p in files)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
 def save_parquet(
-    df: pd.DataFrame,
+    df: Frame,
     dataset_name: str,
     split: str,
     tag: str = "sample",
@@ -98,7 +322,12 @@ def save_parquet(
         base = f"{base}__{_safe_name(config_name)}"
     out_path = out_dir / f"{base}__{split}__{tag}.parquet"
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_parquet(out_path, index=False)
+    if isinstance(df, pd.DataFrame):
+        df.to_parquet(out_path, index=False)
+    elif isinstance(df, pl.DataFrame):
+        df.write_parquet(out_path)
+    else:
+        pq.write_table(df, out_path)
     return out_path
 
 
@@ -108,14 +337,67 @@ def fetch_dataset_as_dataframe(
     sample_n: Optional[int] = 500,
     streaming: bool = False,
     config_name: str | None = None,
-) -> Tuple[pd.DataFrame, Path]:
+    return_type: ReturnType = "pandas",
+    seed: int = 42,
+    sample_method: SampleMethod = "rng",
+    id_column: str = "sentenceID",
+    stream_sampler: StreamSampler = "head",
+    per_stratum: int = 5,
+    targets: Optional[Dict[Hashable, int]] = None,
+    stop_when_full: bool = False,
+    oversample: float = 2.0,
+    max_scan_rows: Optional[int] = None,
+    use_cache: bool = True,
+    verify_cache: bool = True,
+    cache_max_gb: float = export_cache.DEFAULT_MAX_GB,
+) -> Tuple[Frame, Path]:
     """
     High-level convenience for EDA:
       1) Load HF dataset split (with optional config) in streaming or non-streaming mode.
-      2) Convert to pandas (and sample if requested).
+      2) Sample row indices (if requested) and take only those rows from the
+         memory-mapped Arrow cache. Streaming uses stream_sampler:
+         'head' (first sample_n rows), 'reservoir' (uniform over the first max_scan_rows)
+         or 'stratified' (per_stratum rows per cik/year/section, see stratified_stream_sample;
+         targets / stop_when_full / oversample are passed through, e.g. from load_strata_targets).
+         sample_method='hash' (or stream_sampler='hash') keeps the sample_n rows with the smallest
+         hash(seed, id_column): streaming and non-streaming then return the same rows for the
+         same seed, and reruns are identical without keeping the snapshot.
       3) Save a Parquet snapshot to data/exports/.
-      4) Return (df, parquet_path).
+      4) Return (df, parquet_path); df is pandas, Polars or a pyarrow Table per return_type.
+
+    use_cache: the same request (dataset, config, split, sample size, seed, sampler) is served
+    from its earlier snapshot with a memory-mapped read, without touching Hugging Face.
+    The cache key does not include the dataset fingerprint, so by default (verify_cache=True) the
+    dataset is loaded first and the export is redone if its fingerprint changed; verify_cache=False
+    skips that load and trusts the snapshot.
+    Cached snapshots beyond cache_max_gb are evicted least-recently-used first.
     """
+    if streaming and sample_method == "hash":
+        stream_sampler = "hash"
+    stratified = streaming and stream_sampler == "stratified"
+    if stratified and stop_when_full and not targets:
+        raise ValueError("stop_when_full needs explicit targets - unseen strata cannot be known to be full")
+    params = {
+        "dataset": dataset_name, "config": config_name, "split": split, "sample_n": sample_n,
+        "seed": seed, "streaming": streaming,
+        "stream_sampler": stream_sampler if streaming else None,
+        "per_stratum": per_stratum if stratified else None,
+        "max_scan_rows": max_scan_rows if streaming else None,
+    }
+    if stratified and targets:    # untargeted requests keep their earlier keys
+        blob = json.dumps(sorted([list(k), n] for k, n in targets.items()), default=str)
+        params.update(targets=hashlib.sha256(blob.encode()).hexdigest()[:16], n_strata=len(targets),
+                      stop_when_full=stop_when_full, oversample=oversample if stop_when_full else None)
+    if sample_method == "hash" or (streaming and stream_sampler == "hash"):
+        params.update(sample_method="hash", id_column=id_column)    # rng keys stay as before
+    elif sample_method == "rng_fast" and not streaming:
+        params.update(sample_method="rng_fast")
+    key = export_cache.cache_key(params)
+    if use_cache and not verify_cache:
+        cached = export_cache.lookup(key, EXPORT_DIR)
+        if cached:
+            return export_cache.read_export(cached, return_type), cached
+
     ds = load_hf_dataset(
         name=dataset_name,
         split=split,
@@ -123,23 +405,52 @@ def fetch_dataset_as_dataframe(
         cache_dir=HF_CACHE,
         config_name=config_name,
     )
+    fingerprint = dataset_id(ds)
+    if use_cache and verify_cache:
+        cached = export_cache.lookup(key, EXPORT_DIR, fingerprint=fingerprint, verify=True)
+        if cached:
+            return export_cache.read_export(cached, return_type), cached
 
     if streaming:
         # Stream rows from the internet; only materialize a small sample in memory.
         cap = sample_n or 1000
-        rows = materialize_streaming_sample(ds, sample_n=cap)
-        df = _to_pandas(rows, sample_n=None)  # already capped
-        tag = f"stream_{len(df)}"
+        if stream_sampler == "head":
+            rows = materialize_streaming_sample(ds, sample_n=cap)
+            prefix = "stream"
+        elif stream_sampler == "reservoir":
+            rows = reservoir_sample(ds, sample_n=cap, seed=seed, max_rows=max_scan_rows)
+            prefix = "reservoir"
+        elif stream_sampler == "stratified":
+            rows = stratified_stream_sample(ds, per_stratum=per_stratum, targets=targets,
+                                            stop_when_full=stop_when_full, oversample=oversample,
+                                            seed=seed, max_rows=max_scan_rows)
+            prefix = f"strat{len(targets)}t" if targets else f"strat{per_stratum}"
+        elif stream_sampler == "hash":
+            it = ds if max_scan_rows is None else islice(ds, max_scan_rows)
+            rows = hash_sampling.bottom_k_stream(it, k=cap, seed=seed, id_column=id_column)
+            prefix = "hash"
+        else:
+            raise ValueError(
+                f"stream_sampler must be 'head', 'reservoir', 'stratified' or 'hash', got {stream_sampler!r}"
+            )
+        df = _to_frame(rows, sample_n=None, return_type=return_type)  # already capped
+        tag = f"{prefix}_{len(df)}"
     else:
-        # Download once to data/hf_cache (if not already cached), then convert and optionally sample.
-        df = _to_pandas(ds, sample_n=sample_n)
-        tag = f"sample_{len(df)}" if sample_n else "full"
+        # Download once to data/hf_cache (if not already cached), then take only the sampled rows.
+        df = _to_frame(ds, sample_n=sample_n, return_type=return_type, seed=seed,
+                       sample_method=sample_method, id_column=id_column)
+        prefix = "hash" if sample_method == "hash" else "sample"
+        tag = f"{prefix}_{len(df)}" if sample_n else "full"
 
     parquet_path = save_parquet(
         df=df,
         dataset_name=dataset_name,
         split=split,
-        tag=tag,
+        tag=f"{tag}__{key[:12]}" if use_cache else tag,
         config_name=config_name,
+        out_dir=EXPORT_DIR,
     )
+    if use_cache:
+        export_cache.store(key, parquet_path, EXPORT_DIR, fingerprint=fingerprint, max_gb=cache_max_gb,
+                           params=params)
     return df, parquet_path
@@ -1,8 +1,13 @@
 
 from pathlib import Path
+import argparse
+import hashlib
+import json
 import shutil
 from datasets import load_dataset
 import polars as pl
+import pyarrow as pa
+import pyarrow.parquet as pq
 from dotenv import load_dotenv
 import os
 
@@ -13,6 +18,9 @@ CACHE_DIR = DATA_DIR / "hf_cache"
 EXPORT_DIR = DATA_DIR / "exports"
 TEMP_DIR = DATA_DIR / "temp_large_download"
 
+# Sharded mode: one Parquet part per Arrow cache file + a checkpoint of finished parts
+CHECKPOINT_FILE = "_checkpoint.json"
+
 # Ensure directories exist
 for dir_path in [DATA_DIR, CACHE_DIR, EXPORT_DIR, TEMP_DIR]:
     dir_path.mkdir(parents=True, exist_ok=True)
@@ -20,16 +28,13 @@ for dir_path in [DATA_DIR, CACHE_DIR, EXPORT_DIR, TEMP_DIR]:
 # Load environment variables
 load_dotenv(PROJECT_ROOT / "assets" / "config.env")
 
-def download_and_convert_large_full():
-    """
-    Download large_full config from HuggingFace, convert to Parquet, cleanup.
-    """
-    
+
+def _load_large_full(config_name):
+    """Download (or reuse the cached) config into TEMP_DIR. Returns the Dataset or None."""
     HF_DATASET = os.getenv("HF_DATASET_NAME", "JanosAudran/financial-reports-sec")
-    CONFIG_NAME = "large_full"  # Hardcoded for this task
     SPLIT = "train"
     
-    print(f"Starting download: {HF_DATASET} ({CONFIG_NAME})")
+    print(f"Starting download: {HF_DATASET} ({config_name})")
     print(f"This may take 10-30 minutes depending on size...\n")
     
     # Step 1: Download dataset (will cache in TEMP_DIR to control cleanup)
@@ -39,7 +44,7 @@ def download_and_convert_large_full():
     try:
         ds = load_dataset(
             HF_DATASET,
-            CONFIG_NAME,
+            config_name,
             split=SPLIT,
             streaming=False,  # Must be False to convert to Parquet efficiently
             trust_remote_code=True,
@@ -49,6 +54,37 @@ def download_and_convert_large_full():
     except Exception as e:
         print(f"✗ Download failed: {e}")
         return None
+    return ds
+
+
+def _print_meta(meta, size_label="Memory"):
+    print(f"  Rows: {meta['rows']:,}")
+    print(f"  Companies: {meta['companies']}")
+    print(f"  Sections: {meta['sections']}")
+    print(f"  Date range: {meta['date_range'][0]} to {meta['date_range'][1]}")
+    print(f"  {size_label}: {meta['size_mb']:.1f} MB")
+
+
+def _cleanup_temp():
+    print("\nStep 4/4: Cleaning up temporary files...")
+    try:
+        shutil.rmtree(TEMP_DIR)
+        print(f"✓ Deleted temp cache: {TEMP_DIR}")
+    except Exception as e:
+        print(f"⚠ Cleanup warning: {e}")
+        print(f"  You may manually delete: {TEMP_DIR}")
+
+
+def download_and_convert_large_full():
+    """
+    Download large_full config from HuggingFace, convert to Parquet, cleanup.
+    """
+
+    CONFIG_NAME = "large_full"  # Hardcoded for this task
+
+    ds = _load_large_full(CONFIG_NAME)
+    if ds is None:
+        return None
     
     # Step 2: Quick metadata check
     print("\nStep 2/4: Checking metadata...")
@@ -65,12 +101,7 @@ def download_and_convert_large_full():
             df_pl.select(pl.col("reportDate").max()).item()
         )
     }
-    
-    print(f"  Rows: {meta['rows']:,}")
-    print(f"  Companies: {meta['companies']}")
-    print(f"  Sections: {meta['sections']}")
-    print(f"  Date range: {meta['date_range'][0]} to {meta['date_range'][1]}")
-    print(f"  Memory: {meta['size_mb']:.1f} MB")
+    _print_meta(meta)
     
     # Step 3: Save to Parquet
     print("\nStep 3/4: Converting to Parquet...")
@@ -83,13 +114,7 @@ def download_and_convert_large_full():
     print(f"  File size: {output_size_mb:.1f} MB")
     
     # Step 4: Cleanup temp files
-    print("\nStep 4/4: Cleaning up temporary files...")
-    try:
-        shutil.rmtree(TEMP_DIR)
-        print(f"✓ Deleted temp cache: {TEMP_DIR}")
-    except Exception as e:
-        print(f"⚠ Cleanup warning: {e}")
-        print(f"  You may manually delete: {TEMP_DIR}")
+    _cleanup_temp()
     
     print("\n" + "="*60)
     print("COMPLETE")
@@ -102,8 +127,164 @@ def download_and_convert_large_full():
     return output_path, meta
 
 
+# -------------------------
+# Sharded, resumable mode
+# -------------------------
+def _download_id(sources):
+    """
+    Identity of a downloaded dataset from its public cache_files: HF puts the cache under a
+    directory named by the builder config/revision hash, so a new upstream revision changes it.
+    """
+    files = [f"{p.parent.name}/{p.name}:{p.stat().st_size}" for p in sources]
+    return hashlib.sha256("\n".join(files).encode()).hexdigest()[:16]
+
+
+def _read_checkpoint(dataset_dir, fingerprint):
+    """Finished shards from a previous run of the same download, else {}."""
+    path = dataset_dir / CHECKPOINT_FILE
+    if not path.exists():
+        return {}
+    state = json.loads(path.read_text())
+    if state.get("fingerprint") != fingerprint:
+        print(f"  Checkpoint is for another download ({state.get('fingerprint')}) - starting over")
+        return {}
+    return state["shards"]
+
+
+def _write_checkpoint(dataset_dir, fingerprint, shards):
+    """Replace the checkpoint atomically, so a crash never leaves it half-written."""
+    tmp = dataset_dir / f"{CHECKPOINT_FILE}.tmp"
+    tmp.write_text(json.dumps({"fingerprint": fingerprint, "shards": shards}, indent=2))
+    os.replace(tmp, dataset_dir / CHECKPOINT_FILE)
+
+
+def _shard_done(dataset_dir, entry, source):
+    """A shard counts as done only if its source is unchanged and its part is on disk."""
+    if entry is None or entry["source_bytes"] != source.stat().st_size:
+        return False
+    part = dataset_dir / entry["part"]
+    return part.exists() and part.stat().st_size == entry["part_bytes"]
+
+
+def _convert_shard(source, part_path, compression):
+    """
+    Arrow cache file → Parquet part, one record batch at a time.
+    The cache file is memory-mapped, so resident memory stays around one batch.
+    """
+    tmp = part_path.with_name(part_path.name + ".tmp")
+    rows = 0
+    with pa.memory_map(str(source)) as mm:
+        reader = pa.ipc.open_stream(mm)
+        with pq.ParquetWriter(tmp, reader.schema, compression=compression) as writer:
+            for batch in reader:
+                writer.write_batch(batch)
+                rows += batch.num_rows
+    os.replace(tmp, part_path)
+    return rows
+
+
+def download_and_convert_large_full_sharded(compression="snappy", keep_cache=False):
+    """
+    Same download as download_and_convert_large_full, converted cache-file by cache-file
+    into data/exports/sec_filings_large_full/part-NNNNN.parquet.
+
+    - Every finished part is recorded in _checkpoint.json; a re-run skips those parts
+      (and HuggingFace reuses the downloaded cache), so an interrupted job resumes.
+    - Peak memory is one record batch, not the whole dataset.
+    - The temp cache is deleted only after every shard is converted.
+    """
+    CONFIG_NAME = "large_full"
+
+    ds = _load_large_full(CONFIG_NAME)
+    if ds is None:
+        return None
+
+    dataset_dir = EXPORT_DIR / f"sec_filings_{CONFIG_NAME}"
+    dataset_dir.mkdir(parents=True, exist_ok=True)
+    sources = [Path(f["filename"]) for f in ds.cache_files]
+    fingerprint = _download_id(sources)
+
+    # Step 2: Convert shard by shard
+    print(f"\nStep 2/4: Converting {len(sources)} cache files to Parquet parts...")
+    shards = _read_checkpoint(dataset_dir, fingerprint)
+    for i, source in enumerate(sources):
+        key = f"{i:05d}"
+        if _shard_done(dataset_dir, shards.get(key), source):
+            print(f"  [{key}] ✓ already converted ({shards[key]['rows']:,} rows)")
+            continue
+
+        part_path = dataset_dir / f"part-{key}.parquet"
+        rows = _convert_shard(source, part_path, compression)
+        shards[key] = {
+            "source": source.name,
+            "source_bytes": source.stat().st_size,
+            "part": part_path.name,
+            "part_bytes": part_path.stat().st_size,
+            "rows": rows,
+        }
+        _write_checkpoint(dataset_dir, fingerprint, shards)
+        print(f"  [{key}] ✓ {rows:,} rows → {part_path.name}")
+
+    # Parts left behind by a larger, earlier layout would double-count rows
+    expected = {shards[f"{i:05d}"]["part"] for i in range(len(sources))}
+    for stale in dataset_dir.glob("part-*.parquet"):
+        if stale.name not in expected:
+            stale.unlink()
+
+    # Step 3: Metadata over the finished dataset (streamed, not loaded)
+    print("\nStep 3/4: Checking metadata...")
+    lf = pl.scan_parquet(dataset_dir / "*.parquet")
+    stats = lf.select(
+        pl.len().alias("rows"),
+        pl.n_unique("cik").alias("companies"),
+        pl.n_unique("section").alias("sections"),
+        pl.col("reportDate").min().alias("min_date"),
+        pl.col("reportDate").max().alias("max_date"),
+    ).collect().row(0, named=True)
+    output_size_mb = sum(p.stat().st_size for p in dataset_dir.glob("*.parquet")) / (1024 * 1024)
+
+    meta = {
+        "rows": stats["rows"],
+        "columns": len(lf.collect_schema()),
+        "size_mb": output_size_mb,
+        "companies": stats["companies"],
+        "sections": stats["sections"],
+        "date_range": (stats["min_date"], stats["max_date"]),
+        "shards": len(sources),
+    }
+    _print_meta(meta, size_label="Parquet size")
+    if meta["rows"] != len(ds):
+        raise RuntimeError(f"Converted {meta['rows']:,} rows but the dataset has {len(ds):,}")
+
+    # Step 4: Cleanup temp files (only once every shard is in place)
+    if keep_cache:
+        print(f"\nStep 4/4: Keeping temp cache: {TEMP_DIR}")
+    else:
+        _cleanup_temp()
+
+    print("\n" + "="*60)
+    print("COMPLETE")
+    print("="*60)
+    print(f"Parquet dataset: {dataset_dir} ({len(sources)} parts)")
+    print(f"Final size: {output_size_mb:.1f} MB")
+    print(f"\nTo load in notebook:")
+    print(f'  lf = pl.scan_parquet("{dataset_dir.relative_to(PROJECT_ROOT)}/*.parquet")')
+    print(f"DuckDB: read_parquet('{dataset_dir.relative_to(PROJECT_ROOT)}/*.parquet')")
+
+    return dataset_dir, meta
+
+
 if __name__ == "__main__":
-    result = download_and_convert_large_full()
+    parser = argparse.ArgumentParser(description="Download and convert the large_full config to Parquet")
+    parser.add_argument("--sharded", action="store_true",
+                        help="resumable conversion into a partitioned Parquet dataset (bounded memory)")
+    parser.add_argument("--keep-cache", action="store_true", help="sharded mode: keep the HF cache afterwards")
+    args = parser.parse_args()
+
+    if args.sharded:
+        result = download_and_convert_large_full_sharded(keep_cache=args.keep_cache)
+    else:
+        result = download_and_convert_large_full()
     if result:
         print("\n✓ Success!")
     else:
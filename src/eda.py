@@ -1,10 +1,18 @@
 from __future__ import annotations
 
+import os
 import re
-from typing import Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Literal, Tuple, Union
 
 import numpy as np
 import pandas as pd
+import polars as pl
+import pyarrow as pa
+
+EDABackend = Literal["pandas", "polars"]
+CATEGORICALS = ("company", "ticker", "section", "year", "period")
+TEXT_NAME_RE = r"(text|content|paragraph|body)"
 
 
 def text_len_stats(
@@ -55,7 +63,7 @@ def guess_text_columns(df: pd.DataFrame, max_candidates: int = 3) -> Tuple[str,
     for c in df.columns:
         if c == "sentence":
             continue
-        if re.search(r"(text|content|paragraph|body)", c, re.IGNORECASE):
+        if re.search(TEXT_NAME_RE, c, re.IGNORECASE):
             preferred.append(c)
 
     # 3) Fallback: object dtype columns that look string-ish
@@ -87,7 +95,22 @@ def missingness(df: pd.DataFrame, k: int = 20) -> pd.Series:
     return df.isnull().mean().sort_values(ascending=False).head(k)
 
 
-def eda_summary(df: pd.DataFrame) -> Dict:
+def eda_summary(
+    df: Union[pd.DataFrame, pl.DataFrame, pa.Table],
+    backend: EDABackend = "pandas",
+    workers: int | None = None,
+) -> Dict:
+    """
+    backend='pandas' is the original implementation. backend='polars' computes the same
+    summary with native string kernels, profiling columns concurrently (eda_summary_polars).
+    """
+    if backend == "polars":
+        return eda_summary_polars(df, workers=workers)
+    if backend != "pandas":
+        raise ValueError(f"backend must be 'pandas' or 'polars', got {backend!r}")
+    if not isinstance(df, pd.DataFrame):
+        df = df.to_pandas()
+
     result: Dict = {}
     result["shape"] = {"rows": int(len(df)), "cols": int(df.shape[1])}
     result["columns"] = list(df.columns)
@@ -97,7 +120,7 @@ def eda_summary(df: pd.DataFrame) -> Dict:
     result["missingness_topk"] = miss.to_dict()
 
     # Common categoricals
-    for cat in ("company", "ticker", "section", "year", "period"):
+    for cat in CATEGORICALS:
         if cat in df.columns:
             tv = top_values(df, cat, k=15)
             result[f"top_{cat}"] = dict(zip(tv.iloc[:, 0], tv["count"]))
@@ -114,6 +137,81 @@ def eda_summary(df: pd.DataFrame) -> Dict:
     return result
 
 
+# -------------------------
+# Polars / Arrow backend
+# -------------------------
+def guess_text_columns_schema(schema: Dict[str, pl.DataType], max_candidates: int = 3) -> Tuple[str, ...]:
+    """guess_text_columns over a schema: 'sentence', then text-like names, then string columns."""
+    preferred = ["sentence"] if "sentence" in schema else []
+    preferred += [c for c in schema if c != "sentence" and re.search(TEXT_NAME_RE, c, re.IGNORECASE)]
+    if not preferred:
+        preferred = [c for c, dtype in schema.items() if dtype == pl.String]
+    return tuple(dict.fromkeys(preferred))[:max_candidates]
+
+
+def _text_len_stats_polars(s: pl.Series) -> Dict:
+    """text_len_stats for one column: len_chars / count_matches kernels, no per-row lists."""
+    s = s.cast(pl.String)
+    s = pl.select(pl.when(s.is_null() | (s == "None")).then(pl.lit("")).otherwise(s).alias(s.name)).to_series()
+    lens = pl.DataFrame({"char": s.str.len_chars(), "tok": s.str.count_matches(r"\S+")})
+    stats = lens.select(
+        pl.col("char").mean().alias("char_mean"),
+        pl.col("char").quantile(0.95, interpolation="linear").alias("char_p95"),
+        pl.col("tok").mean().alias("tok_mean"),
+        pl.col("tok").quantile(0.95, interpolation="linear").alias("tok_p95"),
+    ).row(0, named=True)
+    return {
+        "column": s.name,
+        "n_nonempty": int((s != "").sum()),
+        **{k: float(v) if v is not None else 0.0 for k, v in stats.items()},
+    }
+
+
+def _top_values_polars(s: pl.Series, k: int = 15) -> Dict[str, int]:
+    """top_values for one column; NULL counts as "None" like astype(str)."""
+    vc = s.cast(pl.String).fill_null("None").value_counts(sort=True).head(k)
+    return dict(vc.iter_rows())
+
+
+def eda_summary_polars(
+    df: Union[pd.DataFrame, pl.DataFrame, pa.Table],
+    workers: int | None = None,
+) -> Dict:
+    """
+    eda_summary on a Polars frame (Arrow tables convert zero-copy). Missingness, each
+    categorical and each text column are independent tasks on a thread pool; Polars kernels
+    release the GIL, so columns are profiled in parallel.
+    """
+    if not isinstance(df, pl.DataFrame):
+        df = pl.from_pandas(df) if isinstance(df, pd.DataFrame) else pl.from_arrow(df)
+
+    text_cols = guess_text_columns_schema(dict(df.schema))
+    tasks = {"missingness_topk": lambda: df.null_count().row(0, named=True)}
+    for cat in CATEGORICALS:
+        if cat in df.columns:
+            tasks[f"top_{cat}"] = lambda c=cat: _top_values_polars(df[c], k=15)
+    for col in text_cols:
+        tasks[f"text:{col}"] = lambda c=col: _text_len_stats_polars(df[c])
+
+    with ThreadPoolExecutor(max_workers=workers or min(len(tasks), os.cpu_count() or 1)) as pool:
+        futures = {key: pool.submit(fn) for key, fn in tasks.items()}
+        done = {key: f.result() for key, f in futures.items()}
+
+    rows = df.height
+    miss = {c: (n / rows if rows else 0.0) for c, n in done.pop("missingness_topk").items()}
+    result: Dict = {
+        "shape": {"rows": rows, "cols": df.width},
+        "columns": df.columns,
+        "missingness_topk": dict(sorted(miss.items(), key=lambda kv: -kv[1])[: min(20, df.width)]),
+    }
+    for cat in CATEGORICALS:
+        if f"top_{cat}" in done:
+            result[f"top_{cat}"] = done[f"top_{cat}"]
+    result["text_columns_detected"] = text_cols
+    result["text_len_stats"] = [done[f"text:{c}"] for c in text_cols]
+    return result
+
+
 def pretty_print_eda(summary: Dict) -> None:
     print("\n=== SHAPE ===")
     print(summary["shape"])
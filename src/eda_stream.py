@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import polars as pl
+import pyarrow.parquet as pq
+
+from eda import CATEGORICALS, guess_text_columns_schema as guess_text_columns, pretty_print_eda
+
+
+# -------------------------
+# Mergeable accumulators
+# -------------------------
+class NullCounter:
+    """Rows and NULLs per column (missingness)."""
+
+    def __init__(self, columns: Sequence[str]):
+        self.rows = 0
+        self.nulls = {c: 0 for c in columns}
+
+    def update(self, batch: pl.DataFrame) -> None:
+        self.rows += batch.height
+        for c, n in zip(batch.columns, batch.null_count().row(0)):
+            if c in self.nulls:
+                self.nulls[c] += n
+
+    def merge(self, other: "NullCounter") -> "NullCounter":
+        self.rows += other.rows
+        for c, n in other.nulls.items():
+            self.nulls[c] = self.nulls.get(c, 0) + n
+        return self
+
+
+class TopK:
+    """
+    Misra-Gries heavy hitters over a bounded number of counters.
+    Exact while the column has at most `capacity` distinct values (section, year, ...);
+    beyond that every count is a lower bound within rows / capacity of the truth.
+    """
+
+    def __init__(self, capacity: int = 2048):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def _prune(self) -> None:
+        if len(self.counts) <= self.capacity:
+            return
+        cut = sorted(self.counts.values(), reverse=True)[self.capacity]
+        self.counts = {v: n - cut for v, n in self.counts.items() if n > cut}
+
+    def update(self, values: pl.Series) -> None:
+        # astype(str) semantics of eda.top_values: NULL is counted as "None"
+        vc = values.cast(pl.String).fill_null("None").value_counts()
+        for v, n in vc.iter_rows():
+            self.counts[v] = self.counts.get(v, 0) + n
+        self._prune()
+
+    def merge(self, other: "TopK") -> "TopK":
+        for v, n in other.counts.items():
+            self.counts[v] = self.counts.get(v, 0) + n
+        self._prune()
+        return self
+
+    def top(self, k: int = 15) -> Dict[str, int]:
+        return dict(sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))[:k])
+
+
+class LengthHistogram:
+    """
+    Exact histogram of integer lengths. Char/token lengths have a few thousand distinct
+    values at most, so this is smaller than a t-digest, merges by addition and gives
+    np.percentile's exact answer instead of an approximation.
+    """
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+
+    def update(self, lengths: pl.Series) -> None:
+        for v, n in lengths.value_counts().iter_rows():
+            self.counts[v] = self.counts.get(v, 0) + n
+
+    def merge(self, other: "LengthHistogram") -> "LengthHistogram":
+        for v, n in other.counts.items():
+            self.counts[v] = self.counts.get(v, 0) + n
+        return self
+
+    @property
+    def n(self) -> int:
+        return sum(self.counts.values())
+
+    def mean(self) -> float:
+        n = self.n
+        return sum(v * c for v, c in self.counts.items()) / n if n else 0.0
+
+    def percentile(self, q: float) -> float:
+        """np.percentile (linear interpolation) over the histogram"""
+        n = self.n
+        if not n:
+            return 0.0
+        rank = q / 100 * (n - 1)
+        lo, hi = int(rank), min(int(rank) + 1, n - 1)
+        v_lo = v_hi = None
+        seen = 0
+        for v in sorted(self.counts):
+            seen += self.counts[v]
+            if v_lo is None and seen > lo:
+                v_lo = v
+            if seen > hi:
+                v_hi = v
+                break
+        return float(v_lo + (v_hi - v_lo) * (rank - lo))
+
+
+class TextStats:
+    """Char / whitespace-token length histograms of one text column (eda.text_len_stats)."""
+
+    def __init__(self):
+        self.nonempty = 0
+        self.chars = LengthHistogram()
+        self.tokens = LengthHistogram()
+
+    def update(self, values: pl.Series) -> None:
+        # eda.text_len_stats: astype(str) then "None" -> "", so NULLs count as empty
+        s = values.cast(pl.String)
+        s = pl.select(pl.when(s.is_null() | (s == "None")).then(pl.lit("")).otherwise(s)).to_series()
+        self.nonempty += int((s != "").sum())
+        self.chars.update(s.str.len_chars())
+        self.tokens.update(s.str.count_matches(r"\S+"))
+
+    def merge(self, other: "TextStats") -> "TextStats":
+        self.nonempty += other.nonempty
+        self.chars.merge(other.chars)
+        self.tokens.merge(other.tokens)
+        return self
+
+    def record(self, column: str) -> Dict:
+        return {
+            "column": column,
+            "n_nonempty": self.nonempty,
+            "char_mean": self.chars.mean(),
+            "char_p95": self.chars.percentile(95),
+            "tok_mean": self.tokens.mean(),
+            "tok_p95": self.tokens.percentile(95),
+        }
+
+
+class EDAAccumulator:
+    """Every eda_summary statistic for one pass over a stream of batches."""
+
+    def __init__(self, columns: Sequence[str], categoricals: Sequence[str], text_cols: Sequence[str],
+                 topk_capacity: int = 2048, count_nulls: bool = True):
+        self.columns = list(columns)
+        self.nulls = NullCounter(columns) if count_nulls else None
+        self.rows = 0
+        self.top = {c: TopK(topk_capacity) for c in categoricals}
+        self.text = {c: TextStats() for c in text_cols}
+
+    def update(self, batch: pl.DataFrame) -> None:
+        self.rows += batch.height
+        if self.nulls is not None:
+            self.nulls.update(batch)
+        for c, acc in self.top.items():
+            acc.update(batch[c])
+        for c, acc in self.text.items():
+            acc.update(batch[c])
+
+    def merge(self, other: "EDAAccumulator") -> "EDAAccumulator":
+        self.rows += other.rows
+        if self.nulls is not None:
+            self.nulls.merge(other.nulls)
+        for c in self.top:
+            self.top[c].merge(other.top[c])
+        for c in self.text:
+            self.text[c].merge(other.text[c])
+        return self
+
+    def summary(self, nulls: Optional[Dict[str, int]] = None) -> Dict:
+        """Same shape as eda.eda_summary, so pretty_print_eda prints it."""
+        nulls = nulls if nulls is not None else self.nulls.nulls
+        miss = {c: (nulls.get(c, 0) / self.rows if self.rows else 0.0) for c in self.columns}
+        k = min(20, len(self.columns))
+        result: Dict = {
+            "shape": {"rows": self.rows, "cols": len(self.columns)},
+            "columns": self.columns,
+            "missingness_topk": dict(sorted(miss.items(), key=lambda kv: -kv[1])[:k]),
+        }
+        for c, acc in self.top.items():
+            result[f"top_{c}"] = acc.top(15)
+        result["text_columns_detected"] = tuple(self.text)
+        result["text_len_stats"] = [acc.record(c) for c, acc in self.text.items()]
+        return result
+
+
+# -------------------------
+# Parquet footer statistics
+# -------------------------
+def _footer_null_counts(pf: pq.ParquetFile) -> Optional[Dict[str, int]]:
+    """NULL counts per top-level column from row-group statistics, or None if any are missing."""
+    meta = pf.metadata
+    counts: Dict[str, int] = {}
+    for rg in range(meta.num_row_groups):
+        group = meta.row_group(rg)
+        for i in range(group.num_columns):
+            chunk = group.column(i)
+            path = chunk.path_in_schema
+            if "." in path:
+                return None    # nested column: leaf NULLs != row NULLs
+            stats = chunk.statistics
+            if stats is None or not stats.has_null_count:
+                return None
+            counts[path] = counts.get(path, 0) + stats.null_count
+    return counts
+
+
+# -------------------------
+# Sources
+# -------------------------
+def _scan_row_groups(path: str, row_groups: List[int], read_cols: List[str], columns: List[str],
+                     categoricals: List[str], text_cols: List[str], batch_size: int,
+                     topk_capacity: int, count_nulls: bool) -> EDAAccumulator:
+    """One worker: its row groups, one record batch at a time."""
+    acc = EDAAccumulator(columns, categoricals, text_cols, topk_capacity, count_nulls)
+    pf = pq.ParquetFile(path)
+    for batch in pf.iter_batches(batch_size=batch_size, row_groups=row_groups, columns=read_cols):
+        acc.update(pl.from_arrow(batch))
+    return acc
+
+
+def profile_parquet(path: Union[str, Path], batch_size: int = 250_000, workers: int = 1,
+                    topk_capacity: int = 2048) -> Dict:
+    """
+    One pass over a Parquet file by row group; memory is one batch per worker plus the
+    accumulators. Missingness comes from the footer statistics when the writer recorded
+    them, so only the categorical and text columns are decoded.
+    With workers > 1 the row groups are split across processes and the accumulators merged.
+    """
+    path = str(path)
+    pf = pq.ParquetFile(path)
+    schema = dict(pl.scan_parquet(path).collect_schema())
+    columns = list(schema)
+    categoricals = [c for c in CATEGORICALS if c in schema]
+    text_cols = list(guess_text_columns(schema))
+
+    footer_nulls = _footer_null_counts(pf)
+    count_nulls = footer_nulls is None
+    read_cols = columns if count_nulls else list(dict.fromkeys(categoricals + text_cols))
+
+    n_groups = pf.metadata.num_row_groups
+    workers = max(1, min(workers, n_groups))
+    shards = [list(range(n_groups))[i::workers] for i in range(workers)]
+    args = (read_cols, columns, categoricals, text_cols, batch_size, topk_capacity, count_nulls)
+    if workers == 1:
+        accs = [_scan_row_groups(path, shards[0], *args)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            accs = list(pool.map(_scan_row_groups, [path] * workers, shards, *[[a] * workers for a in args]))
+
+    total = accs[0]
+    for acc in accs[1:]:
+        total.merge(acc)
+    return total.summary(nulls=footer_nulls)
+
+
+def profile_lazy(lf: pl.LazyFrame, batch_size: int = 250_000, topk_capacity: int = 2048) -> Dict:
+    """
+    Same pass over a LazyFrame: the plan runs once on the streaming engine and its
+    batches feed the accumulators. Polars without collect_batches sinks the plan to a
+    temporary Parquet file once and profiles that instead.
+    """
+    if not hasattr(lf, "collect_batches"):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "profile.parquet")
+            lf.sink_parquet(path, row_group_size=batch_size)
+            return profile_parquet(path, batch_size=batch_size, topk_capacity=topk_capacity)
+
+    schema = dict(lf.collect_schema())
+    categoricals = [c for c in CATEGORICALS if c in schema]
+    acc = EDAAccumulator(list(schema), categoricals, list(guess_text_columns(schema)), topk_capacity)
+    for batch in lf.collect_batches(chunk_size=batch_size):
+        acc.update(batch)
+    return acc.summary()
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser(description="Single-pass EDA over a Parquet file (out-of-core)")
+    p.add_argument("parquet", type=str, help="e.g. data/exports/sec_filings_large_full.parquet")
+    p.add_argument("--batch-size", type=int, default=250_000)
+    p.add_argument("--workers", type=int, default=1, help="processes, each scanning a share of the row groups")
+    args = p.parse_args()
+    pretty_print_eda(profile_parquet(args.parquet, batch_size=args.batch_size, workers=args.workers))
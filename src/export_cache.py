@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import polars as pl
+import pyarrow.parquet as pq
+
+# Index of cached exports: {key: {file, fingerprint, params, bytes, created, last_access}}.
+# fingerprint + params (+ the seed inside params) fully describe a sample, so an evicted
+# hash-sampled export can be regenerated row for row.
+INDEX_FILE = "_export_cache.json"
+DEFAULT_MAX_GB = float(os.getenv("EXPORT_CACHE_MAX_GB", "5"))
+# A hit rewrites the index only if its last_access is older than this: LRU order at
+# this resolution is plenty for evicting GB-sized exports, and hot hits stay read-only.
+ACCESS_RESOLUTION_S = 3600
+
+
+def cache_key(params: Dict) -> str:
+    """
+    Content address of one export: sha256 over the request (dataset, config, split, sample_n,
+    seed, sampler settings). The dataset fingerprint is stored with the entry, not in the key,
+    so the key is known before the dataset is loaded; verify=True in lookup() compares it.
+    """
+    blob = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(blob.encode()).hexdigest()
+
+
+def _load_index(out_dir: Path) -> Dict[str, Dict]:
+    path = out_dir / INDEX_FILE
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def _save_index(out_dir: Path, index: Dict[str, Dict]) -> None:
+    tmp = out_dir / f"{INDEX_FILE}.tmp"
+    tmp.write_text(json.dumps(index, indent=2))
+    os.replace(tmp, out_dir / INDEX_FILE)
+
+
+def lookup(key: str, out_dir: Path, fingerprint: Optional[str] = None, verify: bool = False) -> Optional[Path]:
+    """
+    Path of the cached export for key, or None.
+    - An entry whose file disappeared is dropped.
+    - verify=True also drops it when the dataset fingerprint changed (new data upstream).
+    A hit refreshes last_access for LRU eviction, at most once per ACCESS_RESOLUTION_S.
+    """
+    index = _load_index(out_dir)
+    entry = index.get(key)
+    if entry is None:
+        return None
+    path = out_dir / entry["file"]
+    if path.exists() and not (verify and entry.get("fingerprint") != fingerprint):
+        now = time.time()
+        if now - entry["last_access"] >= ACCESS_RESOLUTION_S:
+            entry["last_access"] = now
+            _save_index(out_dir, index)
+        return path
+    index.pop(key)
+    path.unlink(missing_ok=True)
+    _save_index(out_dir, index)
+    return None
+
+
+def store(key: str, path: Path, out_dir: Path, fingerprint: Optional[str] = None,
+          max_gb: float = DEFAULT_MAX_GB, params: Optional[Dict] = None) -> None:
+    """Register a freshly written export, then evict least-recently-used entries over max_gb."""
+    index = _load_index(out_dir)
+    now = time.time()
+    index[key] = {
+        "file": path.name,
+        "fingerprint": fingerprint,
+        "params": params,
+        "bytes": path.stat().st_size,
+        "created": now,
+        "last_access": now,
+    }
+    evict(index, out_dir, int(max_gb * 1024 ** 3), keep=key)
+    _save_index(out_dir, index)
+
+
+def evict(index: Dict[str, Dict], out_dir: Path, max_bytes: int, keep: Optional[str] = None) -> list:
+    """
+    Drop least-recently-used cached exports until their total size fits max_bytes.
+    Only files registered in the index are touched - hand-made exports in data/exports
+    (e.g. sec_filings_large_full.parquet) are never deleted. Returns the evicted file names.
+    """
+    total = sum(e["bytes"] for e in index.values())
+    evicted = []
+    for key, entry in sorted(index.items(), key=lambda kv: kv[1]["last_access"]):
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        (out_dir / entry["file"]).unlink(missing_ok=True)
+        total -= entry["bytes"]
+        evicted.append(entry["file"])
+        del index[key]
+    return evicted
+
+
+def read_export(path: Path, return_type: str = "pandas"):
+    """Memory-mapped read of a cached export into the requested frame type."""
+    if return_type == "polars":
+        return pl.read_parquet(path, memory_map=True)
+    table = pq.read_table(path, memory_map=True)
+    if return_type == "arrow":
+        return table
+    if return_type == "pandas":
+        return table.to_pandas()
+    raise ValueError(f"return_type must be 'pandas', 'polars' or 'arrow', got {return_type!r}")
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+from typing import Iterable, List, Optional
+
+import numpy as np
+import polars as pl
+import pyarrow as pa
+
+try:
+    import duckdb
+    DUCKDB_AVAILABLE = True
+except ImportError:
+    DUCKDB_AVAILABLE = False
+
+try:
+    import polars_hash  # noqa: F401 - registers the .nchash namespace
+    POLARS_HASH_AVAILABLE = True
+except ImportError:
+    POLARS_HASH_AVAILABLE = False
+
+# Same rule as duckdb-finsight-data/sql-python wrapper/hash_sampler.py (hash_sql / threshold)
+# and the STEP B6 ORDER BY of 31_run_stratified.sql: the first 60 bits of MD5('<seed>:<id>').
+# Keep the three in sync, or DuckDB and Python samples stop matching.
+HASH_BITS = 60
+HASH_SPACE = 1 << HASH_BITS
+
+
+def hash_value(key: object, seed: int = 42) -> int:
+    """60-bit hash of '<seed>:<key>'; equals CAST('0x' || substr(md5(...), 1, 15) AS UBIGINT)."""
+    return int(hashlib.md5(f"{int(seed)}:{key}".encode()).hexdigest()[:15], 16)
+
+
+def hash_values(ids: Iterable, seed: int = 42) -> np.ndarray:
+    """
+    hash_value over a column of non-null ids (list, numpy, Arrow array/chunked array) as uint64.
+
+    Vectorized: DuckDB's md5() over the Arrow column (the exact SQL expression) if installed,
+    else polars-hash MD5 in Rust, else hashlib row by row.
+    """
+    if isinstance(ids, (pa.Array, pa.ChunkedArray)):
+        ids = pl.Series(ids)
+    keys = pl.Series("id", ids).cast(pl.String)
+    if len(keys) == 0:
+        return np.empty(0, dtype=np.uint64)
+    prefix = f"{int(seed)}:"
+
+    if DUCKDB_AVAILABLE:
+        ids_table = pa.table({"id": keys.to_arrow()})    # scanned by name below
+        sql = f"SELECT CAST('0x' || substr(md5(? || id), 1, {HASH_BITS // 4}) AS UBIGINT) AS h FROM ids_table"
+        with duckdb.connect() as conn:
+            return conn.execute(sql, [prefix]).fetchnumpy()["h"]
+
+    if POLARS_HASH_AVAILABLE:
+        hex_prefix = (pl.lit(prefix) + pl.col("id")).nchash.md5().str.slice(0, HASH_BITS // 4)
+        out = pl.DataFrame(keys).select(hex_prefix.str.to_integer(base=16).cast(pl.UInt64))
+        return out.to_series().to_numpy()
+
+    return np.fromiter((hash_value(k, seed) for k in keys), dtype=np.uint64, count=len(keys))
+
+
+def threshold(rate: float) -> int:
+    """Rows with hash < threshold(rate) are kept: a Bernoulli(rate) draw that is fixed per seed."""
+    return math.floor(min(rate, 1.0) * HASH_SPACE)
+
+
+def bottom_k_indices(ids: Iterable, k: Optional[int], seed: int = 42) -> Optional[np.ndarray]:
+    """
+    Sorted positions of the k rows with the smallest hashes (None = all rows).
+
+    The sample depends only on (ids, seed), not on row order or sharding:
+    - a larger k returns a superset, so a sample can be extended instead of redrawn;
+    - rows added to the source enter only if they beat the current k-th hash.
+    """
+    hashes = hash_values(ids, seed)
+    if not k or k >= len(hashes):
+        return None
+    picked = np.argpartition(hashes, k - 1)[:k]
+    return np.sort(picked)
+
+
+def bottom_k_stream(rows: Iterable[dict], k: int, seed: int = 42, id_column: str = "sentenceID") -> List[dict]:
+    """bottom_k_indices over a stream: holds k rows in a max-heap, returns them in stream order."""
+    heap: List[tuple] = []    # (-hash, arrival, row): the root is the largest hash kept
+    for i, row in enumerate(rows):
+        h = hash_value(row[id_column], seed)
+        if len(heap) < k:
+            heapq.heappush(heap, (-h, i, row))
+        elif h < -heap[0][0]:
+            heapq.heapreplace(heap, (-h, i, row))
+    return [row for _, _, row in sorted(heap, key=lambda t: t[1])]
@@ -6,8 +6,9 @@ from pathlib import Path
 
 from dotenv import load_dotenv
 
-from data import fetch_dataset_as_dataframe
+from data import fetch_dataset_as_dataframe, load_strata_targets
 from eda import eda_summary, pretty_print_eda
+from eda_stream import profile_parquet
 
 
 def env_bool(name: str, default: bool = False) -> bool:
@@ -73,6 +74,65 @@ def build_arg_parser(defaults: tuple[str, str, str, int | None, bool]) -> argpar
             help="Enable streaming mode (default is streaming=False from env)",
         )
     p.set_defaults(streaming=d_streaming)
+    p.add_argument(
+        "--stream-sampler",
+        choices=("head", "reservoir", "stratified", "hash"),
+        default=os.getenv("HF_STREAM_SAMPLER", "head"),
+        help="Streaming only: first rows, uniform reservoir, per cik/year/section strata, or smallest hashes",
+    )
+    p.add_argument(
+        "--sample-method",
+        choices=("rng", "rng_fast", "hash"),
+        default=os.getenv("HF_SAMPLE_METHOD", "rng"),
+        help="hash: rows with the smallest hash(seed, sentenceID), identical across reruns and streaming; "
+        "rng_fast: O(sample) draw instead of rng's full-split permutation (different rows than rng)",
+    )
+    p.add_argument("--seed", type=int, default=int(os.getenv("HF_SAMPLE_SEED", "42")))
+    p.add_argument("--per-stratum", type=int, default=5, help="Rows per stratum for --stream-sampler stratified")
+    p.add_argument(
+        "--strata-targets",
+        type=str,
+        default=None,
+        help="Stratified only: CSV/Parquet of cik, report_year, section[, n] - sample just these strata",
+    )
+    p.add_argument(
+        "--stop-when-full",
+        action="store_true",
+        help="Stratified with --strata-targets: stop streaming once every target stratum has seen oversample * n rows",
+    )
+    p.add_argument("--oversample", type=float, default=2.0, help="Rows seen per kept row before --stop-when-full stops")
+    p.add_argument(
+        "--max-scan-rows",
+        type=int,
+        default=None,
+        help="Streaming only: stop reading the stream after this many rows (default: whole split)",
+    )
+    p.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Always re-download/convert instead of reusing a cached export in data/exports",
+    )
+    p.add_argument(
+        "--trust-cache",
+        dest="verify_cache",
+        action="store_false",
+        help="Serve a cached export without loading the dataset to check its fingerprint "
+             "(faster, but misses upstream data changes)",
+    )
+    p.add_argument(
+        "--profile-parquet",
+        type=str,
+        default=None,
+        help="Skip the HF fetch and run single-pass EDA over this Parquet file (any size, e.g. the large_full export)",
+    )
+    p.add_argument("--workers", type=int, default=1, help="Processes for --profile-parquet (split by row group)")
+    p.add_argument(
+        "--eda-backend",
+        choices=("pandas", "polars"),
+        default=os.getenv("EDA_BACKEND", "pandas"),
+        help="polars: native string kernels, columns profiled concurrently (sample fetched zero-copy as Polars)",
+    )
     return p
 
 
@@ -81,16 +141,31 @@ def main() -> None:
     parser = build_arg_parser(defaults)
     args = parser.parse_args()
 
+    if args.profile_parquet:
+        pretty_print_eda(profile_parquet(args.profile_parquet, workers=args.workers))
+        return
+
     df, parquet_path = fetch_dataset_as_dataframe(
         dataset_name=args.dataset,
         config_name=args.config,   
         split=args.split,
         sample_n=args.sample_n,
         streaming=args.streaming,
+        seed=args.seed,
+        sample_method=args.sample_method,
+        stream_sampler=args.stream_sampler,
+        per_stratum=args.per_stratum,
+        targets=load_strata_targets(args.strata_targets, args.per_stratum) if args.strata_targets else None,
+        stop_when_full=args.stop_when_full,
+        oversample=args.oversample,
+        max_scan_rows=args.max_scan_rows,
+        use_cache=args.use_cache,
+        verify_cache=args.verify_cache,
+        return_type="polars" if args.eda_backend == "polars" else "pandas",
     )
 
     print(f"\nSaved sample to: {parquet_path}")
-    summary = eda_summary(df)
+    summary = eda_summary(df, backend=args.eda_backend)
     pretty_print_eda(summary)
 
 
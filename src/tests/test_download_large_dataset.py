@@ -0,0 +1,110 @@
+"""
+Sharded large_full Conversion - one Parquet part per Arrow cache file, resumable from the checkpoint
+Uses a local save_to_disk dataset in place of the HuggingFace download.
+
+python -m pytest src/tests/test_download_large_dataset.py -q
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import polars as pl
+import pytest
+from datasets import Dataset, load_from_disk
+
+sys.path.append(str(Path(__file__).parent.parent))
+import download_large_dataset as dl
+
+
+N_ROWS, N_SHARDS = 300, 3
+
+
+@pytest.fixture
+def env(tmp_path, monkeypatch):
+    """Downloaded dataset with N_SHARDS cache files; returns (ds, dataset_dir, converted source names)"""
+    rows = [{'sentenceID': f"s{i}", 'sentence': f"Sentence {i}.", 'cik': str(i % 7), 'section': i % 4,
+             'reportDate': f"{2006 + i % 15}-12-31"} for i in range(N_ROWS)]
+    Dataset.from_list(rows).save_to_disk(str(tmp_path / 'hf'), num_shards=N_SHARDS)
+    ds = load_from_disk(str(tmp_path / 'hf'))
+
+    converted = []
+    convert = dl._convert_shard
+
+    def counting_convert(source, part_path, compression):
+        converted.append(source.name)
+        return convert(source, part_path, compression)
+
+    monkeypatch.setattr(dl, 'PROJECT_ROOT', tmp_path)
+    monkeypatch.setattr(dl, 'EXPORT_DIR', tmp_path / 'exports')
+    monkeypatch.setattr(dl, 'TEMP_DIR', tmp_path / 'temp')
+    monkeypatch.setattr(dl, '_load_large_full', lambda config_name: ds)
+    monkeypatch.setattr(dl, '_convert_shard', counting_convert)
+    (tmp_path / 'exports').mkdir()
+    return ds, tmp_path / 'exports' / 'sec_filings_large_full', converted
+
+
+def test_converts_every_shard(env):
+    ds, dataset_dir, converted = env
+    out_dir, meta = dl.download_and_convert_large_full_sharded(keep_cache=True)
+
+    assert out_dir == dataset_dir and meta['rows'] == N_ROWS and meta['shards'] == N_SHARDS
+    assert sorted(p.name for p in dataset_dir.glob('*.parquet')) == [f"part-{i:05d}.parquet" for i in range(3)]
+    merged = pl.read_parquet(dataset_dir / '*.parquet').sort('sentenceID')
+    assert merged.equals(pl.from_arrow(ds.data.table).sort('sentenceID'))
+
+
+def test_resume_skips_written_shards(env, monkeypatch):
+    ds, dataset_dir, converted = env
+    convert = dl._convert_shard
+
+    def crash_on_second(source, part_path, compression):
+        if len(converted) == 1:
+            raise KeyboardInterrupt    # killed mid-run, after shard 0 was checkpointed
+        return convert(source, part_path, compression)
+
+    monkeypatch.setattr(dl, '_convert_shard', crash_on_second)
+    with pytest.raises(KeyboardInterrupt):
+        dl.download_and_convert_large_full_sharded(keep_cache=True)
+    assert list(json.loads((dataset_dir / dl.CHECKPOINT_FILE).read_text())['shards']) == ['00000']
+
+    monkeypatch.setattr(dl, '_convert_shard', convert)
+    converted.clear()
+    _, meta = dl.download_and_convert_large_full_sharded(keep_cache=True)
+    sources = [Path(f['filename']).name for f in ds.cache_files]
+    assert converted == sources[1:] and meta['rows'] == N_ROWS
+
+    converted.clear()
+    dl.download_and_convert_large_full_sharded(keep_cache=True)
+    assert converted == []
+
+
+def test_damaged_part_is_redone(env):
+    ds, dataset_dir, converted = env
+    dl.download_and_convert_large_full_sharded(keep_cache=True)
+    (dataset_dir / 'part-00001.parquet').write_bytes(b'truncated')
+    converted.clear()
+
+    _, meta = dl.download_and_convert_large_full_sharded(keep_cache=True)
+    assert converted == [Path(ds.cache_files[1]['filename']).name] and meta['rows'] == N_ROWS
+
+
+def test_checkpoint_of_another_download_starts_over(env):
+    ds, dataset_dir, converted = env
+    dl.download_and_convert_large_full_sharded(keep_cache=True)
+    state = json.loads((dataset_dir / dl.CHECKPOINT_FILE).read_text())
+    state['fingerprint'] = 'older-revision'
+    (dataset_dir / dl.CHECKPOINT_FILE).write_text(json.dumps(state))
+    converted.clear()
+
+    dl.download_and_convert_large_full_sharded(keep_cache=True)
+    assert len(converted) == N_SHARDS
+
+
+def test_stale_parts_are_removed(env):
+    ds, dataset_dir, converted = env
+    dataset_dir.mkdir(parents=True)
+    pl.DataFrame({'sentenceID': ['old']}).write_parquet(dataset_dir / 'part-00007.parquet')
+
+    _, meta = dl.download_and_convert_large_full_sharded(keep_cache=True)
+    assert not (dataset_dir / 'part-00007.parquet').exists() and meta['rows'] == N_ROWS
@@ -0,0 +1,86 @@
+"""
+Single-Pass EDA - profile_parquet / profile_lazy must equal eda_summary_polars on the whole frame
+
+python -m pytest src/tests/test_eda_stream.py -q
+"""
+
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import pyarrow.parquet as pq
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+from eda import eda_summary_polars
+from eda_stream import LengthHistogram, TopK, profile_lazy, profile_parquet
+
+
+def make_frame(n=5000, seed=0):
+    rnd = random.Random(seed)
+    words = ['revenue', 'grew', 'net', 'income', 'risk', 'the', 'company', '12%', '$4.1', 'million']
+    return pl.DataFrame({
+        'sentenceID': [f"s{i}" for i in range(n)],
+        # NULLs and the literal "None" both count as empty text
+        'sentence': [None if i % 97 == 0 else 'None' if i % 101 == 0 else
+                     ' '.join(rnd.choices(words, k=rnd.randint(1, 40))) for i in range(n)],
+        'section': [None if i % 13 == 0 else f"item_{i % 7}" for i in range(n)],
+        'year': [2006 + (i * i) % 11 for i in range(n)],    # uneven counts per year
+        'company': [f"co{rnd.randint(0, 9)}" for _ in range(n)],
+        'cik': [None if i % 5 == 0 else i for i in range(n)],
+    })
+
+
+def assert_same_summary(got, expected):
+    assert got['shape'] == expected['shape'] and got['columns'] == expected['columns']
+    assert got['missingness_topk'] == pytest.approx(expected['missingness_topk'])
+    for key in ('top_section', 'top_year', 'top_company'):
+        assert got[key] == expected[key]
+    assert tuple(got['text_columns_detected']) == tuple(expected['text_columns_detected'])
+    for g, e in zip(got['text_len_stats'], expected['text_len_stats'], strict=True):
+        assert g == pytest.approx(e)
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return make_frame()
+
+
+@pytest.mark.parametrize('statistics', [True, False])    # footer NULL counts vs counted per batch
+def test_profile_parquet_equals_polars_profile(frame, tmp_path, statistics):
+    path = tmp_path / 'facts.parquet'
+    pq.write_table(frame.to_arrow(), path, row_group_size=700, write_statistics=statistics)
+    assert pq.ParquetFile(path).metadata.num_row_groups == 8
+
+    expected = eda_summary_polars(frame)
+    assert_same_summary(profile_parquet(path, batch_size=300), expected)
+    assert_same_summary(profile_parquet(path, batch_size=300, workers=3), expected)
+
+
+def test_profile_lazy_equals_polars_profile(frame):
+    assert_same_summary(profile_lazy(frame.lazy().filter(pl.col('year') > 2008), batch_size=512),
+                        eda_summary_polars(frame.filter(pl.col('year') > 2008)))
+
+
+def test_length_histogram_percentile_matches_numpy():
+    values = np.random.default_rng(1).integers(0, 300, 1001)
+    left, right = LengthHistogram(), LengthHistogram()
+    left.update(pl.Series(values[:400]))
+    right.update(pl.Series(values[400:]))
+    merged = left.merge(right)
+    for q in (0, 5, 50, 95, 99.9, 100):
+        assert merged.percentile(q) == pytest.approx(np.percentile(values, q))
+    assert merged.mean() == pytest.approx(values.mean())
+
+
+def test_topk_counts_are_lower_bounds_past_capacity():
+    values = pl.Series([f"v{i % 50}" for i in range(1000)] + ['hot'] * 400)
+    exact = dict(values.value_counts().iter_rows())
+    left, right = TopK(capacity=8), TopK(capacity=8)
+    left.update(values[:700])
+    right.update(values[700:])
+    counts = left.merge(right).counts
+    assert len(counts) <= 8 and 'hot' in counts
+    assert all(exact[v] - len(values) / 8 <= n <= exact[v] for v, n in counts.items())
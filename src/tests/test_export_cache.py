@@ -0,0 +1,147 @@
+"""
+Export Cache - content-addressed Parquet exports: hits, fingerprint verification, LRU eviction
+
+python -m pytest src/tests/test_export_cache.py -q
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import polars as pl
+import pytest
+from datasets import Dataset, load_from_disk
+
+sys.path.append(str(Path(__file__).parent.parent))
+import data
+import export_cache
+
+
+def write_export(out_dir, name, rows=10):
+    path = out_dir / name
+    pl.DataFrame({'sentenceID': [f"s{i}" for i in range(rows)]}).write_parquet(path)
+    return path
+
+
+def index(out_dir):
+    return json.loads((out_dir / export_cache.INDEX_FILE).read_text())
+
+
+def age(out_dir, key, seconds):
+    """Pretend the entry was last read `seconds` ago"""
+    entries = index(out_dir)
+    entries[key]['last_access'] -= seconds
+    (out_dir / export_cache.INDEX_FILE).write_text(json.dumps(entries))
+
+
+# ----------------------------------------------------------------------------
+# export_cache
+# ----------------------------------------------------------------------------
+def test_cache_key_is_order_independent():
+    assert export_cache.cache_key({'a': 1, 'b': 2}) == export_cache.cache_key({'b': 2, 'a': 1})
+    assert export_cache.cache_key({'a': 1}) != export_cache.cache_key({'a': 2})
+
+
+def test_hit_and_fingerprint_miss(tmp_path):
+    path = write_export(tmp_path, 'a.parquet')
+    export_cache.store('k', path, tmp_path, fingerprint='fp1', params={'seed': 42})
+
+    assert export_cache.lookup('k', tmp_path, fingerprint='fp1', verify=True) == path
+    assert export_cache.lookup('k', tmp_path, fingerprint='fp2') == path    # not verified
+    assert export_cache.lookup('other', tmp_path) is None
+
+    assert export_cache.lookup('k', tmp_path, fingerprint='fp2', verify=True) is None
+    assert not path.exists() and index(tmp_path) == {}
+
+
+def test_missing_file_drops_entry(tmp_path):
+    path = write_export(tmp_path, 'a.parquet')
+    export_cache.store('k', path, tmp_path)
+    path.unlink()
+    assert export_cache.lookup('k', tmp_path) is None
+    assert index(tmp_path) == {}
+
+
+def test_hit_refreshes_last_access_only_when_stale(tmp_path):
+    export_cache.store('k', write_export(tmp_path, 'a.parquet'), tmp_path)
+    before = (tmp_path / export_cache.INDEX_FILE).stat().st_mtime_ns
+    export_cache.lookup('k', tmp_path)
+    assert (tmp_path / export_cache.INDEX_FILE).stat().st_mtime_ns == before
+
+    age(tmp_path, 'k', export_cache.ACCESS_RESOLUTION_S + 1)
+    export_cache.lookup('k', tmp_path)
+    assert time.time() - index(tmp_path)['k']['last_access'] < 60
+
+
+def test_eviction_is_least_recently_used_first(tmp_path):
+    handmade = write_export(tmp_path, 'sec_filings_large_full.parquet', rows=1000)
+    for i, key in enumerate(['old', 'mid', 'new']):
+        export_cache.store(key, write_export(tmp_path, f"{key}.parquet", rows=1000), tmp_path)
+        age(tmp_path, key, 10_000 * (3 - i))
+    export_cache.lookup('old', tmp_path)    # stale → refreshed, now the most recent
+
+    size = index(tmp_path)['old']['bytes']
+    export_cache.store('newest', write_export(tmp_path, 'newest.parquet', rows=1000), tmp_path,
+                       max_gb=2.5 * size / 1024 ** 3)
+
+    assert sorted(index(tmp_path)) == ['newest', 'old']
+    assert not (tmp_path / 'mid.parquet').exists() and not (tmp_path / 'new.parquet').exists()
+    assert handmade.exists()
+
+
+def test_store_never_evicts_the_new_entry(tmp_path):
+    export_cache.store('big', write_export(tmp_path, 'big.parquet', rows=1000), tmp_path, max_gb=0)
+    assert list(index(tmp_path)) == ['big'] and (tmp_path / 'big.parquet').exists()
+
+
+def test_read_export(tmp_path):
+    path = write_export(tmp_path, 'a.parquet', rows=3)
+    assert export_cache.read_export(path, 'polars').height == 3
+    assert export_cache.read_export(path, 'arrow').num_rows == 3
+    assert len(export_cache.read_export(path)) == 3
+    with pytest.raises(ValueError):
+        export_cache.read_export(path, 'csv')
+
+
+# ----------------------------------------------------------------------------
+# fetch_dataset_as_dataframe
+# ----------------------------------------------------------------------------
+@pytest.fixture
+def local_hub(tmp_path, monkeypatch):
+    """load_hf_dataset served from save_to_disk copies; returns (publish(n_rows, revision), loads)"""
+    loads = []
+    current = {}
+
+    def publish(n_rows, revision):
+        path = tmp_path / 'hub' / revision
+        rows = [{'sentenceID': f"s{i}", 'sentence': f"Sentence number {i}."} for i in range(n_rows)]
+        Dataset.from_list(rows).save_to_disk(str(path))
+        current['path'] = path
+
+    def load(**kwargs):
+        loads.append(kwargs)
+        return load_from_disk(str(current['path']))
+
+    monkeypatch.setattr(data, 'EXPORT_DIR', tmp_path / 'exports')
+    monkeypatch.setattr(data, 'load_hf_dataset', load)
+    (tmp_path / 'exports').mkdir()
+    return publish, loads
+
+
+def test_fetch_hit_skips_work_and_fingerprint_change_redoes_it(local_hub, tmp_path):
+    publish, loads = local_hub
+    publish(200, 'rev1')
+    df, path = data.fetch_dataset_as_dataframe('org/sec', sample_n=20, return_type='polars')
+    cached, cached_path = data.fetch_dataset_as_dataframe('org/sec', sample_n=20, return_type='polars')
+    assert cached_path == path and cached.equals(df)
+
+    data.fetch_dataset_as_dataframe('org/sec', sample_n=20, verify_cache=False)
+    assert len(loads) == 2    # trusted hit: the dataset is not even loaded
+
+    publish(300, 'rev2')
+    redone, redone_path = data.fetch_dataset_as_dataframe('org/sec', sample_n=20, return_type='polars')
+    assert not redone.equals(df)
+    [entry] = index(redone_path.parent).values()
+    fingerprints = [data.dataset_id(load_from_disk(str(tmp_path / 'hub' / rev))) for rev in ('rev1', 'rev2')]
+    assert entry['fingerprint'] == fingerprints[1] != fingerprints[0]
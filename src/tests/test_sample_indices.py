@@ -0,0 +1,49 @@
+"""
+Row Sampling - sample_method='rng' returns exactly what DataFrame.sample(n, random_state=seed) did
+
+python -m pytest src/tests/test_sample_indices.py -q
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import polars as pl
+import pytest
+from datasets import Dataset
+
+sys.path.append(str(Path(__file__).parent.parent))
+from data import _sample_indices, _to_frame
+
+
+ROWS = [{'sentenceID': f"doc{i // 10}_s{i}", 'value': i} for i in range(500)]
+
+
+@pytest.mark.parametrize('sample_n', [1, 37, 499, 500, 900])
+@pytest.mark.parametrize('seed', [0, 42])
+def test_rng_matches_legacy_pandas_sample(sample_n, seed):
+    legacy = pd.DataFrame(ROWS).sample(min(sample_n, len(ROWS)), random_state=seed)
+
+    pd.testing.assert_frame_equal(_to_frame(ROWS, sample_n=sample_n, seed=seed), legacy)
+    dataset = Dataset.from_list(ROWS)
+    pd.testing.assert_frame_equal(_to_frame(dataset, sample_n=sample_n, seed=seed), legacy)
+
+
+def test_rng_other_return_types_keep_rows_and_order():
+    legacy = pd.DataFrame(ROWS).sample(50, random_state=42)
+    frame = _to_frame(ROWS, sample_n=50, return_type='polars')
+    assert frame['value'].to_list() == legacy['value'].to_list()
+
+
+def test_rng_fast_is_sorted_distinct_and_fixed_per_seed():
+    idx = _sample_indices(10_000_000, 300, seed=7, legacy=False)
+    assert len(set(idx.tolist())) == 300 and (idx[1:] > idx[:-1]).all()
+    assert (idx == _sample_indices(10_000_000, 300, seed=7, legacy=False)).all()
+    assert _sample_indices(10, 20, legacy=False) is None
+
+
+def test_rng_fast_through_to_frame():
+    frame = _to_frame(Dataset.from_list(ROWS), sample_n=25, return_type='polars', sample_method='rng_fast')
+    assert frame.height == 25 and frame['value'].is_sorted()
+    with pytest.raises(ValueError, match='sample_method'):
+        _to_frame(ROWS, sample_n=5, sample_method='random')
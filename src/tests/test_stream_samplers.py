@@ -0,0 +1,130 @@
+"""
+Streaming Samplers - reservoir_sample (Algorithm L) and stratified_stream_sample, no network
+
+python -m pytest src/tests/test_stream_samplers.py -q
+"""
+
+import sys
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent))
+import data
+from data import load_strata_targets, reservoir_sample, stratified_stream_sample, stratum_key
+
+
+def make_rows(n=3000):
+    """cik 0-4 x report_year 2010/2011 x section 0-2, plus rows 31_run_stratified.sql drops"""
+    rows = [{'sentenceID': f"s{i}", 'sentence': f"Revenue grew in period {i}.", 'section': i % 3,
+             'reportDate': f"{2010 + i % 2}-03-31", 'cik': str(i % 5)} for i in range(n)]
+    rows += [
+        {'sentenceID': 'short', 'sentence': 'Too short', 'section': 0, 'reportDate': '2010-03-31', 'cik': '0'},
+        {'sentenceID': 'old', 'sentence': 'Filed before the window.', 'section': 0,
+         'reportDate': '1999-03-31', 'cik': '0'},
+        {'sentenceID': 'nosec', 'sentence': 'No section on this row.', 'section': None,
+         'reportDate': '2010-03-31', 'cik': '0'},
+    ]
+    return rows
+
+
+class CountingStream:
+    """Iterable over rows that records how many were pulled"""
+    def __init__(self, rows):
+        self.rows, self.pulled = rows, 0
+
+    def __iter__(self):
+        for row in self.rows:
+            self.pulled += 1
+            yield row
+
+
+# ----------------------------------------------------------------------------
+# reservoir_sample
+# ----------------------------------------------------------------------------
+def test_reservoir_size_and_determinism():
+    rows = make_rows()
+    sample = reservoir_sample(iter(rows), sample_n=50, seed=1)
+    assert len(sample) == 50
+    assert len({r['sentenceID'] for r in sample}) == 50
+    assert sample == reservoir_sample(iter(rows), sample_n=50, seed=1)
+    assert sample != reservoir_sample(iter(rows), sample_n=50, seed=2)
+
+
+def test_reservoir_short_stream_and_max_rows():
+    rows = make_rows(20)
+    assert reservoir_sample(iter(rows), sample_n=100) == rows
+
+    stream = CountingStream(make_rows())
+    sample = reservoir_sample(stream, sample_n=10, max_rows=200)
+    assert stream.pulled == 200
+    assert all(int(r['sentenceID'][1:]) < 200 for r in sample)
+
+
+def test_reservoir_is_uniform():
+    # Algorithm L skips ahead; each of 100 positions must still be kept ~k/n of the time
+    n, k, trials = 100, 10, 3000
+    hits = Counter()
+    for seed in range(trials):
+        hits.update(reservoir_sample(iter(range(n)), sample_n=k, seed=seed))
+    expected = trials * k / n
+    assert all(abs(hits[i] - expected) < 0.25 * expected for i in range(n))
+    assert abs(sum(hits[i] for i in range(n // 2)) - trials * k / 2) < 0.05 * trials * k / 2
+
+
+# ----------------------------------------------------------------------------
+# stratified_stream_sample
+# ----------------------------------------------------------------------------
+def test_stratified_every_stratum_per_stratum_rows():
+    rows = make_rows()
+    sample = stratified_stream_sample(iter(rows), per_stratum=4, seed=3)
+    counts = Counter(stratum_key(r) for r in sample)
+    assert len(counts) == 5 * 2 * 3 and set(counts.values()) == {4}
+    assert not {'short', 'old', 'nosec'} & {r['sentenceID'] for r in sample}
+    assert sample == stratified_stream_sample(iter(rows), per_stratum=4, seed=3)
+
+
+def test_stratified_targets_honoured():
+    targets = {(1, 2011, 1): 3, (2, 2010, 2): 7, (4, 2011, 0): 1}
+    sample = stratified_stream_sample(iter(make_rows()), targets=targets)
+    assert Counter(stratum_key(r) for r in sample) == targets
+
+
+def test_stratified_stop_when_full_stops_early():
+    rows = make_rows()
+    targets = {(1, 2011, 1): 3, (2, 2010, 2): 2}
+    stream = CountingStream(rows)
+    sample = stratified_stream_sample(stream, targets=targets, stop_when_full=True, oversample=2.0)
+    assert Counter(stratum_key(r) for r in sample) == targets
+    assert stream.pulled < len(rows) / 10
+
+    # stopped exactly when the slower stratum had seen oversample * n eligible rows
+    seen = Counter(stratum_key(r) for r in rows[:stream.pulled])
+    assert seen[(1, 2011, 1)] >= 6 and seen[(2, 2010, 2)] >= 4
+    assert min(seen[(1, 2011, 1)] - 6, seen[(2, 2010, 2)] - 4) == 0
+
+    with pytest.raises(ValueError, match='stop_when_full'):
+        stratified_stream_sample(iter(rows), stop_when_full=True)
+
+
+def test_load_strata_targets(tmp_path):
+    path = tmp_path / 'targets.csv'
+    path.write_text("cik,report_year,section\n1,2011,1\n2,2010,2\n")
+    assert load_strata_targets(path, per_stratum=4) == {(1, 2011, 1): 4, (2, 2010, 2): 4}
+
+    path.write_text("cik,report_year,section,n\n1,2011,1,3\n2,2010,2,7\n")
+    assert load_strata_targets(path) == {(1, 2011, 1): 3, (2, 2010, 2): 7}
+
+
+def test_fetch_threads_targets(tmp_path, monkeypatch):
+    monkeypatch.setattr(data, 'EXPORT_DIR', tmp_path)
+    monkeypatch.setattr(data, 'load_hf_dataset', lambda **kwargs: iter(make_rows()))
+    targets = {(1, 2011, 1): 3, (2, 2010, 2): 2}
+
+    df, path = data.fetch_dataset_as_dataframe('org/sec', streaming=True, stream_sampler='stratified',
+                                               targets=targets, stop_when_full=True, return_type='polars')
+    assert df.height == 5 and path.parent == tmp_path
+    other, other_path = data.fetch_dataset_as_dataframe('org/sec', streaming=True, stream_sampler='stratified',
+                                                         per_stratum=1, return_type='polars')
+    assert other.height == 30 and other_path != path
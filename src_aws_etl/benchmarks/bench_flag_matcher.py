@@ -0,0 +1,98 @@
+"""
+Flag Matcher Benchmark - sentences/sec for the Section D text flags
+Compares the current per-pattern engines (DuckDB Section D UPDATE, Polars
+feature_flags) with the bitmask matcher (Python / Polars and DuckDB UDF),
+and verifies every engine flags the same rows.
+
+python src_aws_etl/benchmarks/bench_flag_matcher.py --rows 1000000
+python src_aws_etl/benchmarks/bench_flag_matcher.py --parquet sample_1m_finrag.parquet
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import polars as pl
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent))
+from feature_flags import FLAGS, duckdb_update_sql, flag_exprs
+from flag_matcher import TEXT_FLAGS, flags_from_mask, mask_expr, mask_sql, register_duckdb
+from synthetic_sec import historical
+
+
+def load_sentences(args):
+    if args.parquet:
+        frame = pl.read_parquet(args.parquet, columns=[args.column]).rename({args.column: 'sentence'})
+        return frame.head(args.rows) if args.rows else frame
+    return historical(args.rows or 1_000_000).select('sentence')
+
+
+def timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - start
+
+
+def polars_per_flag(frame):
+    return frame.select(flag_exprs(TEXT_FLAGS))
+
+
+def polars_matcher(frame):
+    return frame.select(mask_expr()).select(flags_from_mask())
+
+
+def duckdb_per_pattern(con):
+    """Section D flags UPDATE (one regexp_matches per pattern); score UPDATE excluded"""
+    con.execute(duckdb_update_sql('flags', char_col='LENGTH(sentence)')[0])
+    return con.sql(f"SELECT {', '.join(TEXT_FLAGS)} FROM flags ORDER BY rid").pl()
+
+
+def duckdb_matcher(con):
+    flags = ', '.join(f"{mask_sql(f)} AS {f}" for f in TEXT_FLAGS)
+    return con.sql(f"SELECT {flags} FROM (SELECT rid, flag_mask(sentence) AS flag_mask FROM src) ORDER BY rid").pl()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Section D flag engines")
+    parser.add_argument('--rows', type=int, default=None, help='synthetic rows (default 1M) or head of --parquet')
+    parser.add_argument('--parquet', default=None, help='real sentences, e.g. the 1M stratified sample export')
+    parser.add_argument('--column', default='sentence')
+    args = parser.parse_args()
+
+    frame = load_sentences(args)
+    n = len(frame)
+    print("=" * 70)
+    print(f"FLAG MATCHER BENCHMARK - {n:,} sentences, {len(TEXT_FLAGS)} text flags")
+    print("=" * 70)
+
+    results = {}
+    results['polars per-flag'] = timed(lambda: polars_per_flag(frame))
+    results['polars matcher'] = timed(lambda: polars_matcher(frame))
+
+    try:
+        import duckdb
+        con = register_duckdb(duckdb.connect())
+        con.register('src_arrow', frame.with_row_index('rid').to_arrow())
+        con.execute("CREATE TABLE src AS SELECT * FROM src_arrow")
+        columns = ', '.join(f"CAST(NULL AS BOOLEAN) AS {f}" for f in FLAGS)
+        con.execute(f"CREATE TABLE flags AS SELECT rid, sentence, 2020 AS report_year, {columns} FROM src")
+        results['duckdb per-pattern'] = timed(lambda: duckdb_per_pattern(con))
+        results['duckdb matcher udf'] = timed(lambda: duckdb_matcher(con))
+    except ImportError:
+        print("  (DuckDB engines skipped - duckdb not installed)")
+
+    for name, (_, elapsed) in results.items():
+        print(f"  {name:<20} {elapsed:8.2f}s   {n / elapsed:>12,.0f} sentences/sec")
+
+    baseline = results['polars per-flag'][0]
+    for name, (flags, _) in results.items():
+        for flag in TEXT_FLAGS:
+            assert flags[flag].equals(baseline[flag]), f"{name}: {flag} differs from feature_flags!"
+    print("\n  ✓ All engines flag the same rows")
+    print("  " + ", ".join(f"{f}={baseline[f].sum():,}" for f in TEXT_FLAGS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Merge Pipeline Benchmark - MergePipeline end to end against a local moto S3 server
+For each merge mode: a bootstrap run (historical + increment 1) then an
+incremental run (final + increment 2), each in a fresh worker process so peak
+RSS is per run. Results are appended to $FINRAG_BENCH_DATA/merge_pipeline.jsonl
+(default /tmp/finrag_bench, outside the repo; --out to choose) tagged with the git
+commit, so throughput / memory can be compared across commits.
+
+python src_aws_etl/benchmarks/bench_merge_pipeline.py --scale 100k
+python src_aws_etl/benchmarks/bench_merge_pipeline.py --scale 1m --modes eager streaming
+python src_aws_etl/benchmarks/bench_merge_pipeline.py --history     # compare commits
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import polars as pl
+
+BENCH_DIR = Path(__file__).parent
+sys.path.append(str(BENCH_DIR.parent / 'etl'))
+sys.path.append(str(BENCH_DIR))
+from synthetic_sec import SCALES, write_inputs
+
+
+DATA_DIR = Path(os.getenv('FINRAG_BENCH_DATA', '/tmp/finrag_bench'))
+RESULTS_FILE = DATA_DIR / 'merge_pipeline.jsonl'
+MODES = ['eager', 'streaming', 'partitioned']
+
+# moto accepts any credentials; set before boto3 / Polars look them up
+BENCH_ENV = {
+    'AWS_ACCESS_KEY_ID': 'bench',
+    'AWS_SECRET_ACCESS_KEY': 'bench',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def start_moto_server(port):
+    """moto_server in its own process, so its in-memory objects don't count toward our RSS"""
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'moto.server', '-H', '127.0.0.1', '-p', str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.1).close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("moto server did not start")
+
+
+# ----------------------------------------------------------------------------
+# Worker: one pipeline run in a clean process
+# ----------------------------------------------------------------------------
+def worker(args):
+    from config_loader import ETLConfig
+    from merge_pipeline import MergePipeline
+    from s3_client import build_s3_client
+    import contextlib
+    import io
+
+    config = ETLConfig()
+    config.cfg['s3']['bucket_name'] = args.bucket
+    config.cfg['s3_client'] = {'endpoint_url': args.endpoint}
+    config.cfg.setdefault('merge', {})['mode'] = args.mode
+
+    s3 = build_s3_client(config)
+    pipeline = MergePipeline(config, s3)
+
+    # Pipeline output is long; keep the worker's stdout for the JSON result
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        ok = pipeline.run()
+    if not ok:
+        sys.stderr.write(log.getvalue())
+
+    stats = pipeline.stats
+    rows = stats.get('base_rows', 0) + stats.get('incr_rows', 0)
+    print(json.dumps({
+        'ok': ok,
+        'merge_type': stats.get('merge_type'),
+        'rows_in': rows,
+        'final_rows': stats.get('final_rows'),
+        'duration_sec': stats.get('duration_sec'),
+        'rows_per_sec': round(rows / stats['duration_sec']) if stats.get('duration_sec') else None,
+        'peak_rss_mb': stats.get('peak_rss_mb'),
+        's3_requests': stats.get('s3_requests'),
+        'validation': stats.get('validation'),
+        'stages': {s['name']: s['wall_sec'] for s in stats.get('stages', [])},
+    }))
+
+
+def run_worker(mode, bucket, endpoint, scale):
+    cmd = [sys.executable, __file__, '--worker', '--mode', mode, '--bucket', bucket,
+           '--endpoint', endpoint, '--scale', scale]
+    out = subprocess.run(cmd, capture_output=True, text=True, env={**os.environ, **BENCH_ENV})
+    if out.returncode != 0 or not out.stdout.strip():
+        raise RuntimeError(f"{mode} worker failed:\n{out.stderr[-2000:]}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+# ----------------------------------------------------------------------------
+# Results
+# ----------------------------------------------------------------------------
+def load_previous(commit, results_file=RESULTS_FILE):
+    """Latest result per (scale, mode, run) recorded at a different commit"""
+    previous = {}
+    if not results_file.exists():
+        return previous
+    with open(results_file) as f:
+        for line in f:
+            r = json.loads(line)
+            if r.get('commit') != commit:
+                previous[(r['scale'], r['mode'], r['run'])] = r
+    return previous
+
+
+def _delta(previous, result):
+    prev = previous.get((result['scale'], result['mode'], result['run']))
+    if not prev or not prev.get('rows_per_sec') or not prev.get('peak_rss_mb'):
+        return ''
+    speed = (result['rows_per_sec'] or 0) / prev['rows_per_sec'] - 1
+    memory = (result['peak_rss_mb'] or 0) / prev['peak_rss_mb'] - 1
+    return f"   vs {prev['commit']}: {speed:+.0%} rows/s, {memory:+.0%} MB"
+
+
+# ----------------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------------
+def run_benchmark(scale, modes, results_file=RESULTS_FILE):
+    import boto3
+    from config_loader import ETLConfig
+
+    os.environ.update(BENCH_ENV)
+    config = ETLConfig()
+    n_rows = SCALES[scale]
+
+    print("=" * 70)
+    print(f"MERGE PIPELINE BENCHMARK - {scale} ({n_rows:,} historical rows)")
+    print("=" * 70)
+
+    t0 = time.perf_counter()
+    inputs = write_inputs(DATA_DIR / scale, n_rows)
+    print(f"  Inputs ready in {time.perf_counter() - t0:.1f}s: {DATA_DIR / scale}")
+
+    port = free_port()
+    endpoint = f"http://127.0.0.1:{port}"
+    server = start_moto_server(port)
+    commit, stamp = git_commit(), datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    previous = load_previous(commit, results_file)
+    results = []
+
+    try:
+        s3 = boto3.client('s3', endpoint_url=endpoint, region_name='us-east-1')
+        for mode in modes:
+            bucket = f"finrag-bench-{mode}-{scale}"
+            s3.create_bucket(Bucket=bucket)
+            s3.upload_file(str(inputs['historical']), bucket, config.hist_path)
+
+            for run, incr in (('bootstrap', 'incremental_1'), ('incremental', 'incremental_2')):
+                s3.upload_file(str(inputs[incr]), bucket, config.incr_path)
+                result = run_worker(mode, bucket, endpoint, scale)
+                if not result['ok']:
+                    raise RuntimeError(f"{mode} {run} run failed")
+                result.update({'commit': commit, 'timestamp': stamp, 'scale': scale, 'mode': mode, 'run': run})
+                results.append(result)
+                print(f"  {mode:<12}{run:<12}{result['duration_sec']:>8.2f}s "
+                      f"{result['rows_per_sec'] or 0:>12,} rows/s {result['peak_rss_mb'] or 0:>9.1f} MB peak"
+                      f"{_delta(previous, result)}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    results_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(results_file, 'a') as f:
+        for r in results:
+            f.write(json.dumps(r) + '\n')
+    print(f"\n  ✓ Appended {len(results)} result(s) to {results_file}")
+    return results
+
+
+def print_history(results_file=RESULTS_FILE):
+    """Mean throughput / peak memory per commit for every (scale, mode, run)"""
+    if not results_file.exists():
+        print(f"No benchmark results yet in {results_file}")
+        return
+    history = pl.read_ndjson(results_file, infer_schema_length=None)
+    summary = (
+        history.group_by('scale', 'mode', 'run', 'commit')
+        .agg(
+            pl.col('timestamp').max(),
+            pl.col('rows_per_sec').mean().round(0),
+            pl.col('peak_rss_mb').mean().round(1),
+            pl.len().alias('samples'),
+        )
+        .sort('scale', 'mode', 'run', 'timestamp')
+    )
+    with pl.Config(tbl_rows=200):
+        print(summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark MergePipeline end to end on moto S3")
+    parser.add_argument('--scale', choices=list(SCALES), default='100k')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--history', action='store_true', help="summarize results across commits")
+    parser.add_argument('--out', type=Path, default=RESULTS_FILE, help="results JSONL (appended to)")
+    # internal: single run inside a worker process
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', help=argparse.SUPPRESS)
+    parser.add_argument('--bucket', help=argparse.SUPPRESS)
+    parser.add_argument('--endpoint', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args)
+    elif args.history:
+        print_history(args.out)
+    else:
+        run_benchmark(args.scale, args.modes, args.out)
+
+
+if __name__ == "__main__":
+    main()
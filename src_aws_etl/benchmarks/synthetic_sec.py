@@ -0,0 +1,166 @@
+"""
+Synthetic SEC Sentences - reproducible historical / incremental Parquet inputs
+Historical rows use the final fact table schema (sic, section_name, us+UTC
+filingDate, derived columns). Incremental rows use the API staging schema the
+merge has to align (SIC, section_item + section_name, sentence_index, ns
+datetimes), and re-send a share of existing sentenceIDs as updates.
+
+python src_aws_etl/benchmarks/synthetic_sec.py --rows 1000000 --out /tmp/finrag_synth
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+from feature_flags import flag_exprs
+from row_hash import row_hash_expr
+
+
+SCALES = {'100k': 100_000, '1m': 1_000_000, '10m': 10_000_000}
+
+N_COMPANIES = 75                      # finrag_tgt_comps_75
+YEARS = list(range(2006, 2021))       # historical corpus window
+SENTENCES_PER_FILING = 400
+
+SECTIONS = [
+    ('ITEM_1', 'Item 1: Business'),
+    ('ITEM_1A', 'Item 1A: Risk Factors'),
+    ('ITEM_7', "Item 7: Management's Discussion and Analysis"),
+    ('ITEM_7A', 'Item 7A: Quantitative and Qualitative Disclosures About Market Risk'),
+    ('ITEM_8', 'Item 8: Financial Statements and Supplementary Data'),
+]
+
+SUBJECTS = ['Net revenue', 'Operating income', 'Gross margin', 'Cash flow from operations',
+            'Research and development expense', 'Total debt', 'Diluted EPS', 'Advertising revenue',
+            'Cloud services revenue', 'Cost of sales', 'The Company', 'Our international segment']
+VERBS = ['increased', 'decreased', 'remained flat at', 'grew', 'declined', 'is expected to reach',
+         'was approximately', 'may fluctuate around']
+UNITS = ['million', 'billion', 'percent', 'basis points', 'thousand']
+TAILS = ['compared to the prior year.', 'primarily driven by higher volumes.',
+         'due to foreign currency headwinds.', 'as described in Risk Factors.',
+         'reflecting continued investment in infrastructure.', 'year-over-year.',
+         'which we believe is sustainable.', 'subject to material uncertainty.']
+
+
+def _pick(values, idx):
+    return pl.Series(values).gather(idx)
+
+
+def _rows(idx, rng, year_override=None):
+    """Rows for global sentence indices idx (same idx → same id/cik/year)"""
+    n = len(idx)
+    filing = idx // SENTENCES_PER_FILING
+    cik_int = 1000 + (filing % N_COMPANIES) * 37
+    year = year_override if year_override is not None else np.array(YEARS)[(filing // N_COMPANIES) % len(YEARS)]
+    section = (idx // 80) % len(SECTIONS)
+
+    frame = pl.DataFrame({
+        'idx': idx,
+        'cik_int': cik_int.astype(np.int32),
+        'report_year': np.broadcast_to(year, n).astype(np.int32),
+        'section': section,
+        'amount': rng.integers(1, 9_999, n),
+        'subject': rng.integers(0, len(SUBJECTS), n),
+        'verb': rng.integers(0, len(VERBS), n),
+        'unit': rng.integers(0, len(UNITS), n),
+        'tail': rng.integers(0, len(TAILS), n),
+    })
+    return frame.select(
+        pl.col('cik_int').cast(pl.String).alias('cik'),
+        pl.concat_str([
+            _pick(SUBJECTS, frame['subject']), pl.lit(' '),
+            _pick(VERBS, frame['verb']), pl.lit(' $'),
+            pl.col('amount').cast(pl.String), pl.lit(' '),
+            _pick(UNITS, frame['unit']), pl.lit(' '),
+            _pick(TAILS, frame['tail']),
+        ]).alias('sentence'),
+        pl.format('{}_10K_{}_{}', 'cik_int', 'report_year', 'idx').alias('sentenceID'),
+        pl.format('Company {} Inc.', 'cik_int').alias('name'),
+        'report_year',
+        _pick([s[0] for s in SECTIONS], frame['section']).alias('section_item'),
+        _pick([s[1] for s in SECTIONS], frame['section']).alias('section_title'),
+        pl.format('{}', (pl.col('cik_int') % 90 + 2000)).alias('sic'),
+        pl.datetime(pl.col('report_year') + 1, 2, 15).alias('filingDate'),
+        'cik_int',
+        (pl.col('idx') % SENTENCES_PER_FILING).alias('sentence_index'),
+    )
+
+
+def historical(n_rows, seed=42):
+    """Base fact table in the final (historical export) schema"""
+    rng = np.random.default_rng(seed)
+    rows = _rows(np.arange(n_rows), rng)
+    return rows.select(
+        'cik', 'sentence', 'sentenceID', 'name', 'report_year',
+        pl.col('section_item').alias('section_name'),
+        'sic',
+        pl.col('filingDate').dt.cast_time_unit('us').dt.replace_time_zone('UTC'),
+        'cik_int',
+        row_hash_expr(),
+        *flag_exprs(['has_numbers', 'has_comparison', 'likely_kpi']),
+        pl.concat_list(pl.format('T{}', 'cik_int')).alias('tickers'),
+    )
+
+
+def incremental(n_rows, n_historical, update_frac=0.1, new_year=2021, seed=7):
+    """
+    Staging-schema increment: update_frac of rows re-send existing historical
+    sentenceIDs with new text, the rest are new filings for new_year
+    """
+    rng = np.random.default_rng(seed)
+    n_updates = min(int(n_rows * update_frac), n_historical)
+    updated_idx = np.sort(rng.choice(n_historical, n_updates, replace=False))
+    new_idx = np.arange(n_historical, n_historical + n_rows - n_updates)
+
+    frames = [_rows(updated_idx, rng), _rows(new_idx, rng, year_override=new_year)]
+    rows = pl.concat([f for f in frames if len(f)])
+    return rows.select(
+        'cik', 'sentence', 'sentenceID', 'name', 'report_year',
+        pl.col('section_title').alias('section_name'),
+        'section_item',
+        pl.col('sic').alias('SIC'),
+        'sentence_index',
+        pl.col('filingDate').dt.cast_time_unit('ns'),
+    )
+
+
+def write_inputs(out_dir, n_rows, incr_rows=None, seed=42):
+    """historical.parquet + incremental_1/2.parquet under out_dir (cached by size)"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    incr_rows = incr_rows or max(n_rows // 20, 1)
+
+    paths = {
+        'historical': out_dir / 'historical.parquet',
+        'incremental_1': out_dir / 'incremental_1.parquet',
+        'incremental_2': out_dir / 'incremental_2.parquet',
+    }
+    if all(p.exists() for p in paths.values()):
+        return paths
+
+    historical(n_rows, seed).write_parquet(paths['historical'], compression='zstd')
+    # Run 1 (bootstrap) adds 2021 filings; run 2 (incremental) updates + adds 2022
+    incremental(incr_rows, n_rows, new_year=2021, seed=seed + 1).write_parquet(paths['incremental_1'])
+    incremental(incr_rows, n_rows, new_year=2022, seed=seed + 2).write_parquet(paths['incremental_2'])
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic SEC sentence inputs")
+    parser.add_argument('--rows', type=int, default=SCALES['100k'])
+    parser.add_argument('--incr-rows', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', default='/tmp/finrag_synth')
+    args = parser.parse_args()
+
+    paths = write_inputs(args.out, args.rows, args.incr_rows, args.seed)
+    for name, path in paths.items():
+        print(f"  {name:<14} {pl.scan_parquet(path).select(pl.len()).collect().item():>12,} rows  {path}")
+
+
+if __name__ == "__main__":
+    main()
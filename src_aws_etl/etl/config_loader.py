@@ -37,6 +37,14 @@ class ETLConfig:
         o = self.cfg['output']['final']
         return f"{o['path']}/{o['filename']}"
     
+    @property
+    def partitioned_path(self):
+        return self.cfg['output']['partitioned']['path']
+
+    @property
+    def cik_buckets(self):
+        return self.cfg['output']['partitioned'].get('cik_buckets', 16)
+
     @property
     def archive_path(self): 
         return self.cfg['output']['archive']['path']
@@ -49,6 +57,14 @@ class ETLConfig:
     def max_backups(self): 
         return self.cfg['output']['archive']['retention']['max_backups']
 
+    @property
+    def archive_mode(self):
+        return self.cfg['output']['archive'].get('mode', 'copy')
+
+    @property
+    def final_dir(self):
+        return self.cfg['output']['final']['path']
+
     @property
     def compression(self):
         return self.cfg['output']['final'].get('compression', 'zstd')
@@ -57,6 +73,75 @@ class ETLConfig:
     def log_path(self):                             
         return self.cfg['output']['logging']['log_path']
 
+    @property
+    def log_compact_every(self):
+        return self.cfg['output']['logging'].get('compact_every', 50)
+
+    # Merge engine (optional section - defaults keep the original eager behaviour)
+    @property
+    def merge_mode(self):
+        return self.cfg.get('merge', {}).get('mode', 'eager')
+
+    @property
+    def row_hash_backend(self):
+        return self.cfg.get('merge', {}).get('row_hash_backend', 'auto')
+
+    @property
+    def streaming(self):
+        """Streaming merge settings with defaults filled in"""
+        s = self.cfg.get('merge', {}).get('streaming', {}) or {}
+        return {
+            'memory_budget_mb': s.get('memory_budget_mb', 2048),
+            'est_row_bytes': s.get('est_row_bytes', 1024),
+            'row_group_size': s.get('row_group_size', 100_000),
+            'sort_output': s.get('sort_output', False),
+        }
+
+    @property
+    def transfer(self):
+        """S3 transfer settings (multipart chunk size / concurrency)"""
+        t = self.cfg.get('transfer', {}) or {}
+        return {
+            'chunk_size_mb': t.get('chunk_size_mb', 64),
+            'max_concurrency': t.get('max_concurrency', 8),
+        }
+
+    @property
+    def s3_client(self):
+        """boto3 client tuning (connection pool, retries, optional endpoint)"""
+        c = self.cfg.get('s3_client', {}) or {}
+        return {
+            'max_pool_connections': c.get('max_pool_connections', 32),
+            'retry_mode': c.get('retry_mode', 'adaptive'),
+            'max_attempts': c.get('max_attempts', 5),
+            'connect_timeout': c.get('connect_timeout', 10),
+            'read_timeout': c.get('read_timeout', 120),
+            'tcp_keepalive': c.get('tcp_keepalive', True),
+            'endpoint_url': c.get('endpoint_url'),
+        }
+
+    @property
+    def schema_alignment(self):
+        """Incremental → base alignment rules (None → schema_align.DEFAULT_RULES)"""
+        return self.cfg.get('schema_alignment')
+
+    @property
+    def dedup(self):
+        """Near-duplicate index settings (etl/dedup_index.py)"""
+        d = self.cfg.get('dedup', {}) or {}
+        return {
+            'enabled': d.get('enabled', False),
+            'num_perm': d.get('num_perm', 32),
+            'bands': d.get('bands', 8),
+            'near_threshold': d.get('near_threshold', 0.8),
+        }
+
+    @property
+    def profiling(self):
+        """Per-stage profiler output (chrome_trace_dir: None → no trace file)"""
+        p = self.cfg.get('profiling', {}) or {}
+        return {'chrome_trace_dir': p.get('chrome_trace_dir')}
+
     def s3_uri(self, key):
         """Convert S3 key to full URI"""
         return f"s3://{self.bucket}/{key}"
@@ -72,6 +157,7 @@ if __name__ == "__main__":
     print(f"  Final Output: {config.final_path}")
     print(f"  Archive Path: {config.archive_path}")
     print(f"  Max Backups: {config.max_backups}")
+    print(f"  Merge Mode: {config.merge_mode}")
     
     print(f"\nS3 URI Examples:")
     print(f"  {config.s3_uri(config.hist_path)}")
@@ -0,0 +1,274 @@
+"""
+Dedup Index - content-defined near-duplicate index over the fact table
+Stored next to the table as <dir>/_dedup_index.parquet + _dedup_index.json:
+  one row per sentenceID with cik_int, report_year, section_name and
+  norm_hash     MD5 of the normalized sentence (lowercase, non-alphanumerics → one space)
+  minhash       num_perm MinHash values of its word set (Array[UInt32])
+  canonical_id  earliest (report_year, sentenceID) of the same company with
+                the same norm_hash (dup_kind 'exact') or an estimated Jaccard
+                >= near_threshold (dup_kind 'near'); itself if canonical
+
+Signatures are computed for new / updated rows only. Marks are recomputed
+from the stored signatures (no text) for the companies an increment touches,
+since duplicates are only looked for within a company. Near-duplicate
+candidates come from LSH bands over the MinHash values; each band bucket is
+compared against its earliest member only, so the work stays linear.
+
+Embedding: rows with dup_kind == 'exact' have the same normalized text as
+canonical_id and can reuse its vector instead of being re-embedded.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+import polars as pl
+
+from row_hash import md5_expr
+
+
+KEY_COLUMNS = ['sentenceID', 'cik_int', 'report_year', 'section_name']
+NORMALIZE_RE = r'[^\p{L}\p{N}]+'
+
+# MinHash permutations: multiply-shift hashes ((h ^ a) * b) >> 32 over 64-bit token hashes
+MINHASH_SEED = 20251026
+
+
+def normalized_expr(text_col='sentence'):
+    return (
+        pl.col(text_col).str.to_lowercase()
+        .str.replace_all(NORMALIZE_RE, ' ')
+        .str.strip_chars()
+    )
+
+
+def _permutations(num_perm):
+    rng = np.random.default_rng(MINHASH_SEED)
+    a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+    b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) | np.uint64(1)
+    return a, b
+
+
+def _token_hashes(tokens):
+    """Stable 64-bit hash per distinct token (blake2b, independent of the Polars version)"""
+    return pl.Series([
+        int.from_bytes(hashlib.blake2b(t.encode(), digest_size=8).digest(), 'little')
+        for t in tokens.to_list()
+    ], dtype=pl.UInt64)
+
+
+def minhash(normalized, num_perm):
+    """Non-empty normalized text Series → (n, num_perm) uint32 MinHash of each word set"""
+    words = normalized.str.split(' ')
+    lengths = words.list.len().to_numpy().astype(np.int64)
+    starts = np.cumsum(lengths) - lengths
+
+    # Permute the vocabulary once, then every token is a table lookup
+    tokens = pl.Series(words.to_arrow().flatten())
+    vocab = tokens.unique()
+    codes = tokens.cast(pl.Enum(vocab)).to_physical().to_numpy()
+    a, b = _permutations(num_perm)
+    hashes = _token_hashes(vocab).to_numpy()
+    table = ((hashes[None, :] ^ a[:, None]) * b[:, None]) >> np.uint64(32)
+
+    out = np.empty((num_perm, len(words)), dtype=np.uint32)
+    for k in range(num_perm):
+        out[k] = np.minimum.reduceat(table[k].astype(np.uint32)[codes], starts)
+    return out.T
+
+
+def signatures(frame, num_perm, row_hash_backend='auto'):
+    """Index rows (no marks) for a DataFrame / LazyFrame holding KEY_COLUMNS + sentence"""
+    rows = frame.lazy().select(*KEY_COLUMNS, normalized_expr().alias('norm')).collect()
+    rows = rows.with_columns(md5_expr(pl.col('norm'), row_hash_backend).alias('norm_hash'))
+
+    # One MinHash per distinct non-empty text - boilerplate is signed once
+    texts = rows.filter(pl.col('norm') != '').unique('norm_hash').select('norm_hash', 'norm')
+    texts = texts.with_columns(
+        pl.Series('minhash', minhash(texts['norm'], num_perm), dtype=pl.Array(pl.UInt32, num_perm))
+    )
+    return rows.drop('norm').join(texts.drop('norm'), on='norm_hash', how='left')
+
+
+class DedupIndex:
+    """Exact (normalized hash) + near (MinHash LSH) duplicate marks per sentenceID"""
+
+    INDEX_FILE = '_dedup_index.parquet'
+    META_FILE = '_dedup_index.json'
+
+    def __init__(self, settings, frame=None, source_etag=None):
+        if settings['num_perm'] % settings['bands']:
+            raise ValueError(f"dedup num_perm ({settings['num_perm']}) must split evenly into "
+                             f"bands ({settings['bands']})")
+        self.settings = settings
+        self.frame = frame if frame is not None else self._empty()
+        self.source_etag = source_etag
+        # Companies whose marks are out of date (None → all of them)
+        self.touched = set() if frame is not None else None
+
+    def _empty(self):
+        return pl.DataFrame(schema={
+            'sentenceID': pl.String, 'cik_int': pl.Int32, 'report_year': pl.Int32,
+            'section_name': pl.String, 'norm_hash': pl.String,
+            'minhash': pl.Array(pl.UInt32, self.settings['num_perm']),
+            'canonical_id': pl.String, 'dup_kind': pl.String,
+        })
+
+    # ------------------------------------------------------------------------
+    # Persist (next to the table it describes, tied to it by ETag)
+    # ------------------------------------------------------------------------
+    @classmethod
+    def load(cls, settings, transfer, prefix, source_etag):
+        """The stored index if it describes exactly source_etag with the same signatures"""
+        try:
+            obj = transfer.s3.get_object(Bucket=transfer.bucket, Key=f"{prefix}/{cls.META_FILE}")
+            meta = json.loads(obj['Body'].read().decode('utf-8'))
+        except transfer.s3.exceptions.NoSuchKey:
+            return None
+        if meta['source_etag'] != source_etag or meta['num_perm'] != settings['num_perm'] \
+                or meta.get('seed') != MINHASH_SEED:
+            return None
+
+        index = cls(settings, transfer.read_parquet(f"{prefix}/{cls.INDEX_FILE}"), source_etag)
+        if (meta['near_threshold'], meta['bands']) != (settings['near_threshold'], settings['bands']):
+            index.touched = None
+        return index
+
+    def save(self, transfer, prefix, source_etag, compression='zstd'):
+        self.source_etag = source_etag
+        transfer.write_parquet(self.frame, f"{prefix}/{self.INDEX_FILE}", compression=compression)
+        meta = {
+            'source_etag': source_etag,
+            'rows': len(self.frame),
+            'num_perm': self.settings['num_perm'],
+            'bands': self.settings['bands'],
+            'near_threshold': self.settings['near_threshold'],
+            'seed': MINHASH_SEED,
+            'summary': self.summary(),
+        }
+        transfer.s3.put_object(
+            Bucket=transfer.bucket,
+            Key=f"{prefix}/{self.META_FILE}",
+            Body=json.dumps(meta).encode('utf-8')
+        )
+
+    # ------------------------------------------------------------------------
+    # Delta maintenance
+    # ------------------------------------------------------------------------
+    def add(self, frame, row_hash_backend='auto'):
+        """Sign new / updated rows (replacing any with the same sentenceID)"""
+        rows = signatures(frame, self.settings['num_perm'], row_hash_backend)
+        rows = rows.unique('sentenceID', keep='last', maintain_order=True)
+        kept = self.frame.join(rows.select('sentenceID'), on='sentenceID', how='anti')
+        self.frame = pl.concat([kept, rows], how='diagonal_relaxed')
+        if self.touched is not None:
+            self.touched.update(rows['cik_int'].unique().to_list())
+
+    def classify(self):
+        """Recompute canonical_id / dup_kind for every touched company"""
+        if self.touched is None:
+            scope = pl.lit(True)
+        else:
+            ciks = [c for c in self.touched if c is not None]
+            scope = pl.col('cik_int').is_in(ciks)
+            if None in self.touched:
+                scope = scope | pl.col('cik_int').is_null()
+
+        frame = self.frame.with_columns(scope.fill_null(False).alias('_scope'))
+        marked = self._marks(frame.filter('_scope').drop('_scope', 'canonical_id', 'dup_kind'))
+        self.frame = pl.concat([frame.filter(~pl.col('_scope')).drop('_scope'), marked])
+        self.touched = set()
+        return self
+
+    def _marks(self, rows):
+        settings = self.settings
+        rows = rows.sort('cik_int', 'report_year', 'sentenceID', nulls_last=True)
+
+        # Exact: first sentence of the company with the same normalized text
+        rows = rows.with_columns(
+            pl.when(pl.col('norm_hash').is_null()).then(pl.col('sentenceID'))
+            .otherwise(pl.col('sentenceID').first().over('cik_int', 'norm_hash'))
+            .alias('exact_of')
+        )
+
+        # Near: LSH over the exact canonicals; each bucket member vs the bucket's first member
+        reps = rows.filter((pl.col('sentenceID') == pl.col('exact_of')) & pl.col('minhash').is_not_null())
+        pairs = self._near_pairs(reps).select(
+            pl.col('rep').alias('sentenceID'), pl.col('near_of'),
+        ) if len(reps) else pl.DataFrame(schema={'sentenceID': pl.String, 'near_of': pl.String})
+
+        return (
+            rows.join(pairs, on='sentenceID', how='left')
+            .with_columns(
+                pl.when(pl.col('exact_of') != pl.col('sentenceID')).then(pl.lit('exact'))
+                .when(pl.col('near_of').is_not_null()).then(pl.lit('near'))
+                .alias('dup_kind'),
+                pl.when(pl.col('exact_of') != pl.col('sentenceID')).then(pl.col('exact_of'))
+                .otherwise(pl.coalesce('near_of', 'sentenceID'))
+                .alias('canonical_id'),
+            )
+            .select(self.frame.columns)
+        )
+
+    def _near_pairs(self, reps):
+        """(rep, near_of): earliest LSH bucket leader of the same company passing near_threshold"""
+        settings = self.settings
+        signs = reps['minhash'].to_numpy()
+        width = settings['num_perm'] // settings['bands']
+        mix = np.random.default_rng(MINHASH_SEED).integers(1, 1 << 63, width + 1, dtype=np.uint64)
+        company = reps['cik_int'].fill_null(-1).to_numpy().astype(np.uint64) * mix[-1]
+
+        # reps are sorted by (cik_int, report_year, sentenceID): a lower index is earlier
+        n = len(reps)
+        best = np.full(n, n)
+        for band in range(settings['bands']):
+            bucket = (signs[:, band * width:(band + 1) * width].astype(np.uint64) * mix[:width]).sum(axis=1)
+            _, first, inverse = np.unique(bucket ^ company, return_index=True, return_inverse=True)
+            leader = first[inverse.ravel()]
+            check = np.flatnonzero((leader < np.arange(n)) & (leader < best))
+            jaccard = (signs[check] == signs[leader[check]]).mean(axis=1)
+            hit = check[jaccard >= settings['near_threshold']]
+            best[hit] = leader[hit]
+
+        found = np.flatnonzero(best < n)
+        ids = reps['sentenceID']
+        return pl.DataFrame({'rep': ids.gather(found), 'near_of': ids.gather(best[found])})
+
+    # ------------------------------------------------------------------------
+    # Reports
+    # ------------------------------------------------------------------------
+    def report(self, by=('cik_int', 'section_name')):
+        """Rows / exact / near duplicates and their share per group"""
+        return (
+            self.frame.group_by(*by)
+            .agg(
+                pl.len().alias('rows'),
+                (pl.col('dup_kind') == 'exact').sum().alias('exact'),
+                (pl.col('dup_kind') == 'near').sum().alias('near'),
+            )
+            .with_columns(((pl.col('exact') + pl.col('near')) / pl.col('rows')).round(4).alias('dup_ratio'))
+            .sort('dup_ratio', *by, descending=[True] + [False] * len(by))
+        )
+
+    def summary(self):
+        rows = len(self.frame)
+        exact = self.frame['dup_kind'].eq('exact').sum() if rows else 0
+        near = self.frame['dup_kind'].eq('near').sum() if rows else 0
+        return {
+            'dedup_rows': rows,
+            'dedup_exact': int(exact),
+            'dedup_near': int(near),
+            'dedup_ratio': round((exact + near) / rows, 4) if rows else 0.0,
+        }
+
+
+def print_report(index, top=5):
+    """Overall duplicate counts + the companies/sections with the highest ratio"""
+    summary = index.summary()
+    print(f"  ✓ {summary['dedup_rows']:,} sentences: {summary['dedup_exact']:,} exact, "
+          f"{summary['dedup_near']:,} near duplicates ({summary['dedup_ratio']:.1%})")
+    for row in index.report().head(top).iter_rows(named=True):
+        if row['dup_ratio'] == 0:
+            break
+        print(f"    cik {row['cik_int']} {row['section_name']}: {row['exact']:,} exact / "
+              f"{row['near']:,} near of {row['rows']:,} ({row['dup_ratio']:.1%})")
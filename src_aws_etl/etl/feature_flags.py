@@ -0,0 +1,144 @@
+"""
+Feature Flags - derived RAG flags + retrieval_signal_score
+Python twin of SECTION D in duckdb-finsight-data/sql/31_run_stratified.sql:
+  - FLAGS holds every pattern once, in the DuckDB (RE2) syntax of the SQL
+  - flag_exprs: Polars reference; each flag is ONE compiled regex (the SQL's
+    OR'ed regexp_matches calls are merged into one alternation)
+  - add_feature_flags: the text flags come from flag_matcher's bitmask (text
+    lowercased once, one literal automaton per flag). Not a single scan for
+    all flags: that variant was measured slower, see flag_matcher.py
+  - duckdb_update_sql: the Section D UPDATEs generated from the same patterns
+
+RE2 treats \\b, \\d and \\s as ASCII; Rust regex (Polars) treats them as
+Unicode. polars_pattern() pins them to ASCII so both engines flag the same rows.
+"""
+
+import re
+
+import polars as pl
+
+
+# flag → {'any': [(RE2 pattern, case_insensitive), ...], 'min_chars': n, 'min_year': y}
+# A flag is true if any pattern matches (or the char / year threshold is met)
+FLAGS = {
+    'likely_kpi': {'any': [
+        (r'\b(revenue|sales|gross margin|operating margin|net margin|cost|expense|income|earnings|ebitda|cash flow|profit|loss|asset|liability|equity|debt|eps|roe|roa|operating income|net income|gross profit)\b', True),
+    ]},
+    'has_numbers': {'any': [
+        (r'\(?\$?\d{1,3}(,\d{3})*(\.\d+)?\)?\s*(million|billion|thousand|M|B|K|%|percent|bps|basis points)', True),
+        (r'\d{1,3}(,\d{3})+(\.\d+)?', False),
+        (r'\$\d+', False),
+    ]},
+    'is_table_like': {'min_chars': 1000, 'any': [
+        (r'(\s{2,}|\t)', False),
+        (r'(\d+\s+){5,}', False),
+    ]},
+    'has_forward_looking': {'any': [
+        (r'\b(expect(s|ed)?|forecast(s|ed)?|plan(s|ned)?|anticipate(s|d)?|believe(s|d)?|estimate(s|d)?|project(s|ed)?|intend(s|ed)?|guidance|outlook|target(s|ed)?)\b', True),
+    ]},
+    'has_comparison': {'any': [
+        (r'\b(increas|decreas|compar|prior|previous|year-over-year|yoy|y/y|quarter-over-quarter|qoq|q/q|versus|vs\.|compared to|change|growth|decline)\b', True),
+    ]},
+    'is_material': {'any': [
+        (r'\b(significant|material|substantially|primarily|approximately|considerable|major|critical|key|important)\b', True),
+    ]},
+    'mentions_years': {'any': [
+        (r'\b(19\d{2}|20\d{2})\b', False),
+    ]},
+    'is_recent': {'min_year': 2018},
+    'has_risk_language': {'any': [
+        (r'\b(risk(s)?|material adverse|uncertain(ty)?|volatility|exposure to|regulatory (risk|scrutiny)|compliance risk|litigation risk|threat|vulnerab)\b', True),
+    ]},
+    'is_safe_harbor': {'any': [
+        (r'\b(forward-looking statement|safe harbor|private securities litigation reform act|actual results may differ|risk factors described)\b', True),
+    ]},
+}
+
+SCORE_WEIGHTS = {
+    'likely_kpi': 3,
+    'has_numbers': 2,
+    'has_comparison': 2,
+    'is_material': 1,
+    'has_forward_looking': 1,
+    'is_recent': 1,
+    'is_safe_harbor': -2,
+}
+
+SCORE_COLUMN = 'retrieval_signal_score'
+
+# RE2 class → Rust regex equivalent (RE2's \s has no \v)
+_ASCII_CLASSES = {r'\b': r'(?-u:\b)', r'\d': '[0-9]', r'\s': r'[\t\n\f\r ]'}
+_CLASS_RE = re.compile(r'\\[bds]|\\.')
+
+
+def polars_pattern(pattern, case_insensitive=False):
+    """RE2 pattern → Rust regex with RE2's ASCII \\b / \\d / \\s"""
+    body = _CLASS_RE.sub(lambda m: _ASCII_CLASSES.get(m.group(0), m.group(0)), pattern)
+    return f"(?i:{body})" if case_insensitive else f"(?:{body})"
+
+
+def combined_pattern(flag):
+    """All of a flag's patterns as one alternation (one regex pass per sentence)"""
+    return '|'.join(polars_pattern(p, ci) for p, ci in FLAGS[flag].get('any', []))
+
+
+def flag_expr(flag, text_col='sentence', year_col='report_year'):
+    """Polars expression for one flag (NULL text → NULL flag, as in DuckDB)"""
+    rule = FLAGS[flag]
+    if 'min_year' in rule:
+        return (pl.col(year_col) >= rule['min_year']).alias(flag)
+
+    expr = pl.col(text_col).str.contains(combined_pattern(flag))
+    if 'min_chars' in rule:
+        expr = (pl.col(text_col).str.len_chars() > rule['min_chars']) | expr
+    return expr.alias(flag)
+
+
+def flag_exprs(flags=None, text_col='sentence', year_col='report_year'):
+    return [flag_expr(f, text_col, year_col) for f in (flags or FLAGS)]
+
+
+def score_expr():
+    """retrieval_signal_score from the flag columns (NULL if any weighted flag is NULL)"""
+    terms = [pl.col(f).cast(pl.Int32) * w for f, w in SCORE_WEIGHTS.items()]
+    total = terms[0]
+    for term in terms[1:]:
+        total = total + term
+    return total.alias(SCORE_COLUMN)
+
+
+def add_feature_flags(frame, text_col='sentence', year_col='report_year', score=True):
+    """DataFrame / LazyFrame with every Section D flag (+ score) added or replaced"""
+    from flag_matcher import MASK_COLUMN, TEXT_FLAGS, flags_from_mask, mask_expr   # imports this module
+
+    flags = [flags_from_mask(flags=[f])[0] if f in TEXT_FLAGS else flag_expr(f, text_col, year_col)
+             for f in FLAGS]
+    frame = frame.with_columns(mask_expr(text_col)).with_columns(flags).drop(MASK_COLUMN)
+    return frame.with_columns(score_expr()) if score else frame
+
+
+# ----------------------------------------------------------------------------
+# DuckDB
+# ----------------------------------------------------------------------------
+def _sql_condition(flag, text_col, year_col, char_col):
+    rule = FLAGS[flag]
+    if 'min_year' in rule:
+        return f"({year_col} >= {rule['min_year']})"
+    parts = [f"{char_col} > {rule['min_chars']}"] if 'min_chars' in rule else []
+    for pattern, ci in rule.get('any', []):
+        escaped = pattern.replace("'", "''")
+        parts.append(f"regexp_matches({text_col}, '{escaped}'{', ' + repr('i') if ci else ''})")
+    return parts[0] if len(parts) == 1 else '(' + ' OR '.join(parts) + ')'
+
+
+def duckdb_update_sql(table, text_col='sentence', year_col='report_year', char_col='char_count'):
+    """
+    Section D as two UPDATEs: flags, then the score. SET expressions see the
+    row's pre-update values, so the score needs the flags already written.
+    """
+    sets = ',\n    '.join(f"{f} = {_sql_condition(f, text_col, year_col, char_col)}" for f in FLAGS)
+    score = ' +\n    '.join(f"CAST({f} AS INTEGER) * ({w})" for f, w in SCORE_WEIGHTS.items())
+    return [
+        f"UPDATE {table}\nSET\n    {sets};",
+        f"UPDATE {table}\nSET {SCORE_COLUMN} = (\n    {score}\n);",
+    ]
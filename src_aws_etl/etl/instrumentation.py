@@ -0,0 +1,203 @@
+"""
+Stage Instrumentation - wall / CPU time, peak RSS, rows and S3 traffic per pipeline step
+  with profiler.stage('STEP 3: LOAD') as st:   # context manager
+      ...; st.rows_out = len(df)
+  profiler.step('STEP 4: TRANSFORM')           # lap style: closes the open stage, opens the next
+  @profiled('write_log')                       # method decorator (uses self.profiler)
+
+Peak RSS per stage comes from a background sampler (psutil if installed,
+/proc/self/statm otherwise); without either, the process high-water mark
+from getrusage is reported. S3 bytes/calls are deltas of the client's
+S3CallStats, so every boto3 request is counted. Polars' own object_store
+reads (scan_parquet on s3://) bypass boto3 and are not included.
+"""
+
+import functools
+import json
+import os
+import resource
+import sys
+import threading
+import time
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+
+MB = 1024 * 1024
+SAMPLE_INTERVAL_SEC = 0.01
+
+
+def current_rss():
+    """Resident set size in bytes (None if the platform gives no cheap reading)"""
+    if PSUTIL_AVAILABLE:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def max_rss():
+    """Process-lifetime peak RSS in bytes (ru_maxrss is KB on Linux, bytes on macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _RssSampler(threading.Thread):
+    """Tracks the highest RSS seen while a stage is open"""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.peak = current_rss() or 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(SAMPLE_INTERVAL_SEC):
+            rss = current_rss()
+            if rss and rss > self.peak:
+                self.peak = rss
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        rss = current_rss()
+        if rss and rss > self.peak:
+            self.peak = rss
+        return self.peak
+
+
+class Stage:
+    """One timed section; rows_in / rows_out are filled in by the caller"""
+
+    def __init__(self, name, profiler):
+        self.name = name
+        self.rows_in = None
+        self.rows_out = None
+        self._profiler = profiler
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._s3 = self._profiler.s3_totals()
+        self._sampler = _RssSampler() if current_rss() is not None else None
+        if self._sampler:
+            self._sampler.start()
+        self._profiler._open.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        peak = self._sampler.stop() if self._sampler else max_rss()
+        s3 = self._profiler.s3_totals()
+        self._profiler._open.remove(self)
+
+        self._profiler.records.append({
+            'name': self.name,
+            'start_sec': round(self._wall - self._profiler.origin, 4),
+            'wall_sec': round(end - self._wall, 4),
+            'cpu_sec': round(time.process_time() - self._cpu, 4),
+            'peak_rss_mb': round(peak / MB, 1),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            's3_calls': s3['calls'] - self._s3['calls'],
+            's3_bytes_in': s3['bytes_in'] - self._s3['bytes_in'],
+            's3_bytes_out': s3['bytes_out'] - self._s3['bytes_out'],
+            'failed': exc_type is not None,
+        })
+        return False
+
+
+class Profiler:
+    """Collects Stage records for one pipeline run"""
+
+    def __init__(self, call_stats=None):
+        self.call_stats = call_stats
+        self.records = []
+        self.origin = time.perf_counter()
+        self._open = []
+        self._lap = None
+
+    def s3_totals(self):
+        if self.call_stats is None:
+            return {'calls': 0, 'bytes_in': 0, 'bytes_out': 0}
+        return self.call_stats.totals()
+
+    def stage(self, name):
+        return Stage(name, self)
+
+    def step(self, name):
+        """Close the current lap stage (if any) and open the next one"""
+        self.end_step()
+        self._lap = self.stage(name).__enter__()
+        return self._lap
+
+    def end_step(self, failed=False):
+        if self._lap is not None:
+            lap, self._lap = self._lap, None
+            lap.__exit__(RuntimeError if failed else None, None, None)
+
+    @property
+    def current(self):
+        """Innermost open stage (for rows_in / rows_out annotations)"""
+        return self._open[-1] if self._open else None
+
+    def rows(self, rows_in=None, rows_out=None):
+        stage = self.current
+        if stage is None:
+            return
+        if rows_in is not None:
+            stage.rows_in = rows_in
+        if rows_out is not None:
+            stage.rows_out = rows_out
+
+    # ------------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------------
+    def print_summary(self):
+        if not self.records:
+            return
+        print(f"  {'stage':<34}{'wall s':>9}{'cpu s':>9}{'peak MB':>10}{'rows out':>12}{'S3 MB':>9}")
+        for r in self.records:
+            rows = f"{r['rows_out']:,}" if r['rows_out'] is not None else '-'
+            s3_mb = (r['s3_bytes_in'] + r['s3_bytes_out']) / MB
+            print(f"  {r['name'][:33]:<34}{r['wall_sec']:>9.2f}{r['cpu_sec']:>9.2f}"
+                  f"{r['peak_rss_mb']:>10.1f}{rows:>12}{s3_mb:>9.1f}")
+
+    def chrome_trace(self):
+        """Trace Event Format dict (open in chrome://tracing or ui.perfetto.dev)"""
+        events = []
+        for r in self.records:
+            args = {k: v for k, v in r.items() if k not in ('name', 'start_sec', 'wall_sec')}
+            events.append({
+                'name': r['name'], 'cat': 'etl', 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                'ts': int(r['start_sec'] * 1e6), 'dur': int(r['wall_sec'] * 1e6), 'args': args,
+            })
+            events.append({
+                'name': 'peak_rss_mb', 'ph': 'C', 'pid': os.getpid(),
+                'ts': int(r['start_sec'] * 1e6), 'args': {'peak_rss_mb': r['peak_rss_mb']},
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_chrome_trace(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+        return path
+
+
+def profiled(name):
+    """Method decorator: run the method as a stage of self.profiler"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            profiler = getattr(self, 'profiler', None)
+            if profiler is None:
+                return fn(self, *args, **kwargs)
+            with profiler.stage(name):
+                return fn(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -7,36 +7,58 @@ import os
 import sys
 from pathlib import Path
 from datetime import datetime
-from dotenv import load_dotenv
 import polars as pl
-import hashlib
+import pyarrow.parquet as pq
 import tempfile
-import boto3
-from io import StringIO
+import json
+import uuid
 
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
 from config_loader import ETLConfig
+from dedup_index import DedupIndex, print_report as print_dedup_report
 from preflight_check import PreflightChecker
+from partitioned_merge import PartitionedMerger
+from schema_align import SchemaAlignment, footer_schema, print_report
+from s3_transfer import S3Transfer
+from snapshot_store import SnapshotStore
+from table_stats import TableStats
+from run_log import RunLog
+from instrumentation import Profiler
+from s3_client import call_stats, get_s3_client, polars_storage_options
 
 
 class MergePipeline:
     """Handles data merge operations"""
     
-    def __init__(self):
-        self.config = ETLConfig()
+    def __init__(self, config=None, s3=None):
+        self.config = config or ETLConfig()
         
-        # Load AWS credentials
-        secrets_path = Path(__file__).parent.parent / '.aws_secrets' / 'aws_credentials.env'
-        load_dotenv(secrets_path)
+        # One pooled client for preflight, transfers and the run log
+        self.s3 = s3 or get_s3_client(self.config)
+        self.storage_options = polars_storage_options(self.config)
         
-        self.storage_options = {
-            'aws_region': os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
-        }
+        # Set per run once an S3 client exists (None → plain Polars reads)
+        self.transfer = None
+        
+        # Persisted stats of the base table (set per run when they match it)
+        self.base_stats = None
+        self.table_stats = None
+        
+        # Incremental → base schema rules (schema_alignment in etl_config.yaml)
+        self.alignment = SchemaAlignment.from_config(self.config)
+        
+        # Parquet footers already fetched by preflight (key → ParquetFooter)
+        self.footers = {}
+        
+        # Near-duplicate index of the base table (None → built from the merged table)
+        self.dedup_index = None
         
         # Tracking for logs
+        self.run_id = uuid.uuid4().hex[:12]
         self.stats = {}
+        self.profiler = Profiler(call_stats(self.s3))
     
     def run(self):
         """Execute full merge pipeline"""
@@ -51,219 +73,32 @@ class MergePipeline:
             # ================================================================
             # STEP 1: PRE-FLIGHT CHECKS
             # ================================================================
-            checker = PreflightChecker()
+            self.profiler.step('STEP 1: PRE-FLIGHT CHECKS')
+            checker = PreflightChecker(self.config, self.s3)
             if not checker.run_checks():
                 raise RuntimeError("Pre-flight checks failed!")
+            self.footers = checker.footers
             
-            # Check if final fact table exists
-            final_exists, final_size = checker.file_exists(self.config.final_path)
-            
-            # Archive existing final if it exists
-            if final_exists:
-                checker.archive_existing()
-            
-            # ================================================================
-            # STEP 2: DETERMINE MERGE STRATEGY
-            # ================================================================
-            print("\n" + "=" * 70)
-            print("STEP 2: DETERMINE MERGE INPUTS")
-            print("=" * 70)
-            
-            if final_exists:
-                # NORMAL RUN: Merge existing final + new incremental
-                print("\n✓ Final fact table EXISTS")
-                print(f"  Size: {final_size:.2f} MB")
-                print("  Strategy: FINAL + INCREMENTAL (incremental update)")
-                base_path = self.config.final_path
-                base_label = "Current Final"
-                self.stats['merge_type'] = 'incremental_update'
+            if self.config.merge_mode == 'partitioned':
+                # STEPS 2-7: rewrite only the partitions touched by the increment
+                self._merge_partitioned(checker)
             else:
-                # FIRST RUN: Bootstrap from historical
-                print("\n✓ Final fact table DOES NOT EXIST (first run)")
-                print("  Strategy: HISTORICAL + INCREMENTAL (bootstrap)")
-                base_path = self.config.hist_path
-                base_label = "Historical Baseline"
-                self.stats['merge_type'] = 'initial_bootstrap'
-            
-            # ================================================================
-            # STEP 3: LOAD DATA FROM S3
-            # ================================================================
-            print("\n" + "=" * 70)
-            print("STEP 3: LOADING DATA")
-            print("=" * 70)
-            
-            base_uri = self.config.s3_uri(base_path)
-            incr_uri = self.config.s3_uri(self.config.incr_path)
-            
-            print(f"\n⏳ Reading {base_label}...")
-            print(f"   {base_path}")
-            base_df = pl.read_parquet(base_uri, storage_options=self.storage_options)
-            self.stats['base_rows'] = len(base_df)
-            print(f"   ✓ {len(base_df):,} rows")
-            
-            print(f"\n⏳ Reading incremental...")
-            print(f"   {self.config.incr_path}")
-            incr_df = pl.read_parquet(incr_uri, storage_options=self.storage_options)
-            self.stats['incr_rows'] = len(incr_df)
-            print(f"   ✓ {len(incr_df):,} rows")
-            
-            # ================================================================
-            # STEP 4: TRANSFORM INCREMENTAL (Inline Schema Alignment)
-            # ================================================================
-            print("\n" + "=" * 70)
-            print("STEP 4: TRANSFORM INCREMENTAL DATA")
-            print("=" * 70)
-            
-            # Rename columns for alignment
-            rename_map = {}
-            
-            if 'SIC' in incr_df.columns:
-                rename_map['SIC'] = 'sic'
-                print("  Renaming: SIC → sic")
-            
-            # Handle section_item → section_name (special case)
-            if 'section_item' in incr_df.columns:
-                if 'section_name' in incr_df.columns:
-                    print("  Dropping existing section_name (section_item is canonical)")
-                    incr_df = incr_df.drop('section_name')
-                
-                rename_map['section_item'] = 'section_name'
-                print("  Mapping: section_item → section_name")
-            
-            if rename_map:
-                incr_df = incr_df.rename(rename_map)
-            
-            # Drop columns not in base schema
-            if 'sentence_index' in incr_df.columns:
-                print("  Dropping: sentence_index (not in base schema)")
-                incr_df = incr_df.drop('sentence_index')
-            
-            # Normalize datetime types (ns → us + UTC)
-            print("  Normalizing datetime columns...")
-            for col in incr_df.columns:
-                if incr_df[col].dtype == pl.Datetime('ns'):
-                    incr_df = incr_df.with_columns(
-                        pl.col(col).dt.cast_time_unit('us').dt.replace_time_zone('UTC')
-                    )
-            
-            # Add derived columns + align to base schema
-            print("  Adding derived columns...")
-            incr_df = incr_df.with_columns([
-                # Derived columns (compute from existing data)
-                pl.col('cik').cast(pl.Int32).alias('cik_int'),
-                
-                (pl.col('sentenceID') + pl.col('sentence'))
-                    .map_elements(lambda x: hashlib.md5(x.encode()).hexdigest(), return_dtype=pl.String)
-                    .alias('row_hash'),
-                
-                # Placeholder for text analysis features (set NULL for now)
-                pl.lit(None).cast(pl.Boolean).alias('has_numbers'),
-                pl.lit(None).cast(pl.Boolean).alias('has_comparison'),
-                pl.lit(None).cast(pl.Boolean).alias('likely_kpi'),
-                
-                # Placeholder for company metadata (set NULL for now)
-                pl.lit(None).cast(pl.List(pl.String)).alias('tickers'),
-            ])
-            
-            # Ensure column order matches base
-            print("  Reordering columns...")
-            incr_df = incr_df.select(base_df.columns)
-            
-            print("  ✓ Schema aligned!")
-            
-            # ================================================================
-            # STEP 5: MERGE (CONCAT + DEDUPE)
-            # ================================================================
-            print("\n" + "=" * 70)
-            print("STEP 5: MERGE DATA")
-            print("=" * 70)
-            
-            print(f"  {base_label}: {len(base_df):,} rows")
-            print(f"  Incremental: {len(incr_df):,} rows")
-            
-            # Concatenate
-            merged_df = pl.concat([base_df, incr_df])
-            
-            # Deduplicate (incremental overwrites base)
-            print(f"\n⏳ Deduplicating on sentenceID...")
-            merged_df = merged_df.unique(subset=['sentenceID'], keep='last')
-            
-            self.stats['duplicates_removed'] = len(base_df) + len(incr_df) - len(merged_df)
-            self.stats['final_rows'] = len(merged_df)
-            
-            print(f"  ✓ Removed {self.stats['duplicates_removed']:,} duplicates")
-            print(f"  ✓ Final: {len(merged_df):,} rows")
-            
-            # Sort for consistency
-            merged_df = merged_df.sort(['report_year', 'sentenceID'])
-            
-            # ================================================================
-            # STEP 6: VALIDATE
-            # ================================================================
-            print("\n" + "=" * 70)
-            print("STEP 6: VALIDATION")
-            print("=" * 70)
-            
-            # Check 1: Row count
-            assert len(merged_df) <= len(base_df) + len(incr_df), "Row count exceeds inputs!"
-            print("  ✓ Row count valid")
-            
-            # Check 2: No null primary keys
-            assert merged_df['sentenceID'].null_count() == 0, "Null sentenceIDs found!"
-            print("  ✓ No null sentenceIDs")
-            
-            # Check 3: No duplicates
-            assert merged_df['sentenceID'].n_unique() == len(merged_df), "Duplicates found!"
-            print("  ✓ All sentenceIDs unique")
-            
-            # Stats
-            self.stats['companies'] = merged_df['name'].n_unique()
-            self.stats['year_min'] = int(merged_df['report_year'].min())
-            self.stats['year_max'] = int(merged_df['report_year'].max())
-            self.stats['size_mb'] = round(merged_df.estimated_size('mb'), 2)
-            
-            print(f"\n  Companies: {self.stats['companies']}")
-            print(f"  Year range: {self.stats['year_min']} - {self.stats['year_max']}")
-            print(f"  Size: {self.stats['size_mb']} MB")
-            
-            # ================================================================
-            # STEP 7: WRITE TO S3
-            # ================================================================
-            print("\n" + "=" * 70)
-            print("STEP 7: WRITE OUTPUT")
-            print("=" * 70)
-            
-            print(f"\n⏳ Writing to S3...")
-            
-            # Write to local temp file first
-            with tempfile.NamedTemporaryFile(suffix='.parquet', delete=False) as tmp:
-                tmp_path = tmp.name
-                merged_df.write_parquet(tmp_path, compression=self.config.compression)
-            
-            # Upload to S3 using boto3
-            s3 = boto3.client(
-                's3',
-                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-                region_name=os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
-            )
-            
-            s3.upload_file(tmp_path, self.config.bucket, self.config.final_path)
-            
-            # Clean up temp file
-            os.remove(tmp_path)
-            
-            print(f"  ✓ Written: {self.config.final_path}")
+                # STEPS 2-7: rewrite the single final fact table object
+                self._merge_single_file(checker)
             
             # ================================================================
             # STEP 8: LOG SUCCESS
             # ================================================================
+            self.profiler.end_step()
             end_time = datetime.now()
             self.stats['duration_sec'] = round((end_time - start_time).total_seconds(), 2)
             self.stats['timestamp'] = end_time.strftime('%Y-%m-%d %H:%M:%S')
             self.stats['status'] = 'SUCCESS'
+            self._record_s3_calls()
+            self._record_stages()
             
             self.write_log()
+            self._write_trace()
             
             # Done!
             print("\n" + "=" * 70)
@@ -277,13 +112,17 @@ class MergePipeline:
         
         except Exception as e:
             # Log failure
+            self.profiler.end_step(failed=True)
             end_time = datetime.now()
             self.stats['duration_sec'] = round((end_time - start_time).total_seconds(), 2)
             self.stats['timestamp'] = end_time.strftime('%Y-%m-%d %H:%M:%S')
             self.stats['status'] = 'FAILED'
             self.stats['error'] = str(e)
+            self._record_s3_calls()
+            self._record_stages()
             
             self.write_log()
+            self._write_trace()
             
             print("\n" + "=" * 70)
             print("❌ MERGE FAILED!")
@@ -293,61 +132,745 @@ class MergePipeline:
             traceback.print_exc()
             return False
     
-    def write_log(self):
-        """Append merge results to CSV log file on S3"""
-        print("\n⏳ Writing log entry...")
+    # ------------------------------------------------------------------------
+    # STEPS 2-7 (single file): archive, merge, rewrite finrag_fact_sentences.parquet
+    # ------------------------------------------------------------------------
+    def _merge_single_file(self, checker):
+        """Merge base + incremental into the single final Parquet object"""
+        self.transfer = S3Transfer.from_config(self.config, checker.s3)
         
-        log_key = f"{self.config.log_path}/merge_history.csv"
-        
-        # Create log entry
-        log_entry = pl.DataFrame({
-            'timestamp': [self.stats.get('timestamp', '')],
-            'status': [self.stats.get('status', 'UNKNOWN')],
-            'merge_type': [self.stats.get('merge_type', 'unknown')],
-            'base_rows': [self.stats.get('base_rows', 0)],
-            'incr_rows': [self.stats.get('incr_rows', 0)],
-            'final_rows': [self.stats.get('final_rows', 0)],
-            'duplicates_removed': [self.stats.get('duplicates_removed', 0)],
-            'companies': [self.stats.get('companies', 0)],
-            'year_min': [self.stats.get('year_min', 0)],
-            'year_max': [self.stats.get('year_max', 0)],
-            'size_mb': [self.stats.get('size_mb', 0)],
-            'duration_sec': [self.stats.get('duration_sec', 0)],
-            'error': [self.stats.get('error', '')]
-        })
-        
-        s3 = boto3.client(
-            's3',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
-        )
+        snapshots = None
+        final_key = self.config.final_path
+        
+        if self.config.archive_mode == 'snapshot':
+            # Previous snapshot stays in place as the backup - nothing to copy
+            snapshots = SnapshotStore(self.config, checker.s3, self.transfer)
+            current = snapshots.current()
+            if current is not None:
+                final_key = current['key']
+                final_exists, final_size = True, current['size_bytes'] / (1024 * 1024)
+            else:
+                # First snapshot run: a legacy single-object final is still a valid base
+                final_exists, final_size = checker.file_exists(final_key)
+            print(f"\n✓ Archive mode: snapshot (current → {final_key.split('/')[-1] if final_exists else 'none'})")
+        else:
+            # Check if final fact table exists
+            final_exists, final_size = checker.file_exists(final_key)
+            
+            # Archive existing final if it exists
+            if final_exists:
+                checker.archive_existing()
+        
+        # ================================================================
+        # STEP 2: DETERMINE MERGE STRATEGY
+        # ================================================================
+        self.profiler.step('STEP 2: DETERMINE MERGE INPUTS')
+        print("\n" + "=" * 70)
+        print("STEP 2: DETERMINE MERGE INPUTS")
+        print("=" * 70)
+        
+        if final_exists:
+            # NORMAL RUN: Merge existing final + new incremental
+            print("\n✓ Final fact table EXISTS")
+            print(f"  Size: {final_size:.2f} MB")
+            print("  Strategy: FINAL + INCREMENTAL (incremental update)")
+            base_path = final_key
+            base_label = "Current Final"
+            self.stats['merge_type'] = 'incremental_update'
+            base_etag = self._etag(base_path)
+            self.base_stats = self._load_base_stats(base_etag)
+            self.dedup_index = self._load_dedup_index(self.config.final_dir, base_etag)
+        else:
+            # FIRST RUN: Bootstrap from historical
+            print("\n✓ Final fact table DOES NOT EXIST (first run)")
+            print("  Strategy: HISTORICAL + INCREMENTAL (bootstrap)")
+            base_path = self.config.hist_path
+            base_label = "Historical Baseline"
+            self.stats['merge_type'] = 'initial_bootstrap'
+        
+        base_uri = self.config.s3_uri(base_path)
+        incr_uri = self.config.s3_uri(self.config.incr_path)
+        self._check_schemas(self._read_schema(base_uri))
+        
+        # STEPS 3-6: load, align, merge and validate
+        # (eager → merged DataFrame, streaming → local Parquet file sunk to disk)
+        if self.config.merge_mode == 'streaming':
+            output = self._merge_streaming(base_uri, incr_uri, base_label, base_path)
+        else:
+            output = self._merge_eager(base_uri, incr_uri, base_label, base_path)
+        
+        # ================================================================
+        # STEP 7: WRITE TO S3
+        # ================================================================
+        self.profiler.step('STEP 7: WRITE OUTPUT')
+        print("\n" + "=" * 70)
+        print("STEP 7: WRITE OUTPUT")
+        print("=" * 70)
+        
+        print(f"\n⏳ Writing to S3...")
+        
+        if snapshots is not None:
+            written_key = self._publish_snapshot(snapshots, output)
+        elif isinstance(output, pl.DataFrame):
+            # Row groups stream from the Parquet writer straight into multipart parts
+            self.transfer.write_parquet(
+                output, self.config.final_path,
+                compression=self.config.compression,
+                row_group_size=self.config.streaming['row_group_size']
+            )
+        else:
+            # Parallel multipart upload of the streamed file, then clean up
+            self.transfer.upload_file(output, self.config.final_path)
+            os.remove(output)
+        
+        if snapshots is None:
+            written_key = self.config.final_path
+            print(f"  ✓ Written: {written_key}")
+        self.profiler.rows(rows_out=self.stats.get('final_rows'))
+        
+        # Stats are tied to the exact object they describe via its ETag
+        etag = self._etag(written_key)
+        self.table_stats.save(self.config, self.transfer.s3, etag)
+        print(f"  ✓ Table stats: {TableStats.stats_key(self.config)}")
+        self._save_dedup_index(self.config.final_dir, etag)
+    
+    def _etag(self, key):
+        return self.transfer.s3.head_object(Bucket=self.config.bucket, Key=key)['ETag']
+    
+    def _load_base_stats(self, etag):
+        """Persisted stats, only if they describe exactly the base object (its ETag)"""
+        stats = TableStats.load(self.config, self.transfer.s3)
+        if stats is None:
+            print("  Table stats: none yet (full validation this run)")
+            return None
+        if stats.source_etag != etag:
+            print("  Table stats: stale for this base object (full validation this run)")
+            return None
+        print(f"  Table stats: {stats.rows:,} rows, {len(stats.groups):,} key groups (incremental validation)")
+        return stats
+    
+    def _publish_snapshot(self, snapshots, output):
+        """Upload the merged table as an immutable snapshot and flip _current.json"""
+        if isinstance(output, pl.DataFrame):
+            # Content address needs the finished bytes, so stage the file locally
+            with tempfile.NamedTemporaryFile(suffix='.parquet', delete=False) as tmp:
+                path = tmp.name
+            output.write_parquet(
+                path, compression=self.config.compression,
+                row_group_size=self.config.streaming['row_group_size']
+            )
+        else:
+            path = output
         
         try:
-            # Try to read existing log from S3
-            obj = s3.get_object(Bucket=self.config.bucket, Key=log_key)
-            existing_csv = obj['Body'].read().decode('utf-8')
-            existing_log = pl.read_csv(StringIO(existing_csv))
-            updated_log = pl.concat([existing_log, log_entry])
-        except s3.exceptions.NoSuchKey:
-            # First run - create new log
-            updated_log = log_entry
-        except Exception as e:
-            print(f"  Warning: Could not read existing log ({e}), creating new one")
-            updated_log = log_entry
-        
-        # Write CSV to string buffer
-        csv_buffer = StringIO()
-        updated_log.write_csv(csv_buffer)
-        
-        # Upload to S3
-        s3.put_object(
-            Bucket=self.config.bucket,
-            Key=log_key,
-            Body=csv_buffer.getvalue().encode('utf-8')
+            entry = snapshots.publish(path, rows=self.stats.get('final_rows'))
+        finally:
+            os.remove(path)
+        
+        self.stats.update(snapshots.stats)
+        print(f"  ✓ Published: {entry['key']}")
+        print(f"  ✓ Pointer:   {snapshots.pointer_key}")
+        return entry['key']
+        
+    # ------------------------------------------------------------------------
+    # STEPS 2-7 (partitioned): only partitions the increment lands in are touched
+    # ------------------------------------------------------------------------
+    def _merge_partitioned(self, checker):
+        """Merge the increment into the year/cik_bucket partitioned fact table"""
+        merger = PartitionedMerger(self.config, checker.s3)
+        self.transfer = merger.transfer
+        
+        # ================================================================
+        # STEP 2: DETERMINE MERGE INPUTS
+        # ================================================================
+        self.profiler.step('STEP 2: DETERMINE MERGE INPUTS')
+        print("\n" + "=" * 70)
+        print("STEP 2: DETERMINE MERGE INPUTS (partitioned mode)")
+        print("=" * 70)
+        
+        manifest = merger.load_manifest()
+        
+        if manifest is not None:
+            partitions = manifest['partitions']
+            base_schema = manifest['columns']
+            print(f"\n✓ Partitioned fact table EXISTS ({len(partitions)} partitions)")
+            print("  Strategy: rewrite touched partitions only (incremental update)")
+            self.stats['merge_type'] = 'partition_update'
+            self.stats['base_rows'] = sum(p['rows'] for p in partitions.values())
+            self.dedup_index = self._load_dedup_index(merger.root, self._etag(merger.manifest_key))
+        else:
+            # FIRST RUN: split the single-file final (or historical) table once
+            current = None
+            if self.config.archive_mode == 'snapshot':
+                current = SnapshotStore(self.config, checker.s3, self.transfer).current()
+            if current is not None:
+                base_path = current['key']
+            else:
+                final_exists, _ = checker.file_exists(self.config.final_path)
+                base_path = self.config.final_path if final_exists else self.config.hist_path
+            print("\n✓ Partitioned fact table DOES NOT EXIST (first run)")
+            print(f"  Strategy: partition {base_path} + INCREMENTAL (bootstrap)")
+            base_lf = pl.scan_parquet(self.config.s3_uri(base_path), storage_options=self.storage_options)
+            base_schema = base_lf.collect_schema()
+            self.stats['merge_type'] = 'partition_bootstrap'
+            self.stats['base_rows'] = base_lf.select(pl.len()).collect().item()
+        
+        self._check_schemas(base_schema)
+        
+        # ================================================================
+        # STEP 3: LOAD INCREMENTAL
+        # ================================================================
+        self.profiler.step('STEP 3: LOAD DATA')
+        print("\n" + "=" * 70)
+        print("STEP 3: LOADING INCREMENTAL DATA")
+        print("=" * 70)
+        
+        print(f"\n⏳ Reading incremental...")
+        print(f"   {self.config.incr_path}")
+        incr_df = self._read_parquet(self.config.s3_uri(self.config.incr_path))
+        self.stats['incr_rows'] = len(incr_df)
+        self.profiler.rows(rows_out=len(incr_df))
+        print(f"   ✓ {len(incr_df):,} rows")
+        
+        # ================================================================
+        # STEP 4: TRANSFORM INCREMENTAL
+        # ================================================================
+        self.profiler.step('STEP 4: TRANSFORM INCREMENTAL')
+        print("\n" + "=" * 70)
+        print("STEP 4: TRANSFORM INCREMENTAL DATA")
+        print("=" * 70)
+        
+        incr_df = self._align_incremental(incr_df.lazy(), base_schema).collect()
+        incr_df = incr_df.unique(subset=['sentenceID'], keep='last', maintain_order=True)
+        
+        print("  ✓ Schema aligned!")
+        self.profiler.rows(rows_out=len(incr_df))
+        
+        # ================================================================
+        # STEP 5 + 7: MERGE AND WRITE PARTITIONS
+        # ================================================================
+        self.profiler.step('STEP 5: MERGE')
+        print("\n" + "=" * 70)
+        print("STEP 5: MERGE + WRITE PARTITIONS")
+        print("=" * 70)
+        
+        if manifest is None:
+            print("\n⏳ Bootstrapping partitions...")
+            kept_base_lf = base_lf.join(incr_df.lazy().select('sentenceID'), on='sentenceID', how='anti')
+            partitions = merger.bootstrap(pl.concat([kept_base_lf, incr_df.lazy()]))
+        else:
+            touched = merger.touched_partitions(incr_df)
+            print(f"\n  Increment touches {len(touched)} of {len(partitions)} partitions")
+            merger.archive_partitions(touched, partitions)
+            merger.merge(incr_df, partitions)
+        
+        # ================================================================
+        # STEP 6: VALIDATE (per-partition checks ran on write; totals from manifest)
+        # ================================================================
+        self.profiler.step('STEP 6: VALIDATE')
+        print("\n" + "=" * 70)
+        print("STEP 6: VALIDATION")
+        print("=" * 70)
+        
+        table = merger.table_stats(partitions)
+        self.stats['final_rows'] = table['rows']
+        self.profiler.rows(rows_out=table['rows'])
+        self.stats['duplicates_removed'] = self.stats['base_rows'] + self.stats['incr_rows'] - table['rows']
+        
+        assert table['rows'] <= self.stats['base_rows'] + self.stats['incr_rows'], "Row count exceeds inputs!"
+        print("  ✓ Row count valid")
+        print("  ✓ No null / duplicate sentenceIDs in rewritten partitions")
+        
+        # companies = distinct cik_int across partitions (name is not kept in the manifest)
+        self.stats['companies'] = table['companies']
+        self.stats['year_min'] = table['year_min']
+        self.stats['year_max'] = table['year_max']
+        self.stats['size_mb'] = table['size_mb']
+        self.stats.update(merger.stats)
+        
+        print(f"\n  Companies: {self.stats['companies']}")
+        print(f"  Year range: {self.stats['year_min']} - {self.stats['year_max']}")
+        print(f"  Size: {self.stats['size_mb']} MB")
+        print(f"  Partitions read/written: {merger.stats['partitions_read']} / {merger.stats['partitions_written']}")
+        print(f"  Bytes written: {merger.stats['bytes_written'] / (1024 * 1024):.2f} MB")
+        
+        # No index for this table yet → sign every partition once
+        self._update_dedup_index(incr_df, lambda: (merger.read_partition(p, partitions) for p in partitions))
+        
+        # ================================================================
+        # STEP 7: COMMIT MANIFEST
+        # ================================================================
+        self.profiler.step('STEP 7: WRITE OUTPUT')
+        merger.save_manifest(partitions, list(base_schema))
+        print(f"\n  ✓ Manifest committed: {merger.manifest_key}")
+        merger.delete_superseded()
+        self._save_dedup_index(merger.root, self._etag(merger.manifest_key))
+    
+    # ------------------------------------------------------------------------
+    # STEPS 3-6 (eager): everything in RAM - fine while the table is small
+    # ------------------------------------------------------------------------
+    def _merge_eager(self, base_uri, incr_uri, base_label, base_path):
+        """Read both inputs fully, merge in memory, return the merged DataFrame"""
+        # ================================================================
+        # STEP 3: LOAD DATA FROM S3
+        # ================================================================
+        self.profiler.step('STEP 3: LOAD DATA')
+        print("\n" + "=" * 70)
+        print("STEP 3: LOADING DATA")
+        print("=" * 70)
+        
+        print(f"\n⏳ Reading {base_label}...")
+        print(f"   {base_path}")
+        base_df = self._read_parquet(base_uri)
+        self.stats['base_rows'] = len(base_df)
+        print(f"   ✓ {len(base_df):,} rows")
+        
+        print(f"\n⏳ Reading incremental...")
+        print(f"   {self.config.incr_path}")
+        incr_df = self._read_parquet(incr_uri)
+        self.stats['incr_rows'] = len(incr_df)
+        self.profiler.rows(rows_out=len(base_df) + len(incr_df))
+        print(f"   ✓ {len(incr_df):,} rows")
+        
+        # ================================================================
+        # STEP 4: TRANSFORM INCREMENTAL (Inline Schema Alignment)
+        # ================================================================
+        self.profiler.step('STEP 4: TRANSFORM INCREMENTAL')
+        print("\n" + "=" * 70)
+        print("STEP 4: TRANSFORM INCREMENTAL DATA")
+        print("=" * 70)
+        
+        incr_df = self._align_incremental(incr_df.lazy(), base_df.schema).collect()
+        
+        print("  ✓ Schema aligned!")
+        self.profiler.rows(rows_out=len(incr_df))
+        
+        # ================================================================
+        # STEP 5: MERGE (CONCAT + DEDUPE)
+        # ================================================================
+        self.profiler.step('STEP 5: MERGE')
+        print("\n" + "=" * 70)
+        print("STEP 5: MERGE DATA")
+        print("=" * 70)
+        
+        print(f"  {base_label}: {len(base_df):,} rows")
+        print(f"  Incremental: {len(incr_df):,} rows")
+        
+        # Concatenate
+        merged_df = pl.concat([base_df, incr_df])
+        
+        # Deduplicate (incremental overwrites base)
+        print(f"\n⏳ Deduplicating on sentenceID...")
+        merged_df = merged_df.unique(subset=['sentenceID'], keep='last')
+        
+        self.stats['duplicates_removed'] = len(base_df) + len(incr_df) - len(merged_df)
+        self.stats['final_rows'] = len(merged_df)
+        self.profiler.rows(rows_in=len(base_df) + len(incr_df), rows_out=len(merged_df))
+        
+        print(f"  ✓ Removed {self.stats['duplicates_removed']:,} duplicates")
+        print(f"  ✓ Final: {len(merged_df):,} rows")
+        
+        # Sort for consistency
+        merged_df = merged_df.sort(['report_year', 'sentenceID'])
+        
+        # ================================================================
+        # STEP 6: VALIDATE
+        # ================================================================
+        self.profiler.step('STEP 6: VALIDATE')
+        print("\n" + "=" * 70)
+        print("STEP 6: VALIDATION")
+        print("=" * 70)
+        
+        # Check 1: Row count
+        assert len(merged_df) <= len(base_df) + len(incr_df), "Row count exceeds inputs!"
+        print("  ✓ Row count valid")
+        
+        if self.base_stats is not None:
+            # Checks 2-3 + stats from the delta only (base was validated on its last write)
+            self.table_stats = self._validate_incremental(base_df.lazy(), incr_df, len(merged_df))
+        else:
+            # Check 2: No null primary keys
+            assert merged_df['sentenceID'].null_count() == 0, "Null sentenceIDs found!"
+            print("  ✓ No null sentenceIDs")
+            
+            # Check 3: No duplicates
+            assert merged_df['sentenceID'].n_unique() == len(merged_df), "Duplicates found!"
+            print("  ✓ All sentenceIDs unique")
+            
+            self.table_stats = TableStats.from_frame(merged_df)
+            self.stats['validation'] = 'full'
+        
+        # Stats
+        self.stats.update({k: v for k, v in self.table_stats.summary().items() if k != 'rows'})
+        self.stats['size_mb'] = round(merged_df.estimated_size('mb'), 2)
+        
+        print(f"\n  Companies: {self.stats['companies']}")
+        print(f"  Year range: {self.stats['year_min']} - {self.stats['year_max']}")
+        print(f"  Size: {self.stats['size_mb']} MB")
+        
+        self.profiler.rows(rows_out=len(merged_df))
+        
+        self._update_dedup_index(incr_df, lambda: [merged_df])
+        return merged_df
+    
+    # ------------------------------------------------------------------------
+    # STEPS 3-6 (streaming): scan -> anti-join -> sink, memory bounded by budget
+    # ------------------------------------------------------------------------
+    def _merge_streaming(self, base_uri, incr_uri, base_label, base_path):
+        """
+        Lazy merge on the Polars streaming engine.
+        
+        Same semantics as the eager path (incremental wins on sentenceID), but
+        expressed as base ANTI JOIN incr_keys ++ incr so that only the incremental
+        key set is ever hashed in memory. The base table is streamed through in
+        chunks sized from merge.streaming.memory_budget_mb and sunk straight to Parquet.
+        """
+        settings = self.config.streaming
+        
+        # ================================================================
+        # STEP 3: SCAN DATA (lazy - nothing is read yet)
+        # ================================================================
+        self.profiler.step('STEP 3: LOAD DATA')
+        print("\n" + "=" * 70)
+        print("STEP 3: SCANNING DATA (streaming mode)")
+        print("=" * 70)
+        
+        chunk_rows = self._streaming_chunk_rows(settings)
+        print(f"\n  Memory budget: {settings['memory_budget_mb']} MB → {chunk_rows:,} rows per chunk")
+        
+        base_lf = pl.scan_parquet(base_uri, storage_options=self.storage_options)
+        incr_lf = pl.scan_parquet(incr_uri, storage_options=self.storage_options)
+        
+        # Row counts come from Parquet metadata, no data pages are read
+        print(f"\n⏳ Scanning {base_label}...")
+        print(f"   {base_path}")
+        self.stats['base_rows'] = base_lf.select(pl.len()).collect().item()
+        print(f"   ✓ {self.stats['base_rows']:,} rows")
+        
+        print(f"\n⏳ Scanning incremental...")
+        print(f"   {self.config.incr_path}")
+        self.stats['incr_rows'] = incr_lf.select(pl.len()).collect().item()
+        self.profiler.rows(rows_out=self.stats['base_rows'] + self.stats['incr_rows'])
+        print(f"   ✓ {self.stats['incr_rows']:,} rows")
+        
+        # ================================================================
+        # STEP 4: TRANSFORM INCREMENTAL (lazy plan)
+        # ================================================================
+        self.profiler.step('STEP 4: TRANSFORM INCREMENTAL')
+        print("\n" + "=" * 70)
+        print("STEP 4: TRANSFORM INCREMENTAL DATA")
+        print("=" * 70)
+        
+        incr_lf = self._align_incremental(incr_lf, base_lf.collect_schema())
+        
+        print("  ✓ Schema aligned!")
+        
+        # ================================================================
+        # STEP 5: MERGE (ANTI-JOIN + APPEND, streamed to disk)
+        # ================================================================
+        self.profiler.step('STEP 5: MERGE')
+        print("\n" + "=" * 70)
+        print("STEP 5: MERGE DATA (streaming)")
+        print("=" * 70)
+        
+        # Last occurrence wins inside the incremental file itself
+        incr_lf = incr_lf.unique(subset=['sentenceID'], keep='last', maintain_order=True)
+        
+        # A previous final table was validated unique on write; only the
+        # historical bootstrap input may still carry internal duplicates
+        if self.stats.get('merge_type') == 'initial_bootstrap':
+            print("  Deduplicating historical baseline (bootstrap run)")
+            base_lf = base_lf.unique(subset=['sentenceID'], keep='last', maintain_order=True)
+        
+        # Incremental overwrites base: drop base rows whose key is in the increment
+        kept_base_lf = base_lf.join(incr_lf.select('sentenceID'), on='sentenceID', how='anti')
+        merged_lf = pl.concat([kept_base_lf, incr_lf], how='vertical')
+        
+        if settings['sort_output']:
+            print("  Sorting output (report_year, sentenceID)")
+            merged_lf = merged_lf.sort(['report_year', 'sentenceID'])
+        
+        with tempfile.NamedTemporaryFile(suffix='.parquet', delete=False) as tmp:
+            tmp_path = tmp.name
+        
+        print(f"\n⏳ Streaming merge → {tmp_path}")
+        with pl.Config(streaming_chunk_size=chunk_rows):
+            merged_lf.sink_parquet(
+                tmp_path,
+                compression=self.config.compression,
+                row_group_size=settings['row_group_size'],
+            )
+        
+        # ================================================================
+        # STEP 6: VALIDATE (single streaming aggregate over the output)
+        # ================================================================
+        self.profiler.step('STEP 6: VALIDATE')
+        print("\n" + "=" * 70)
+        print("STEP 6: VALIDATION")
+        print("=" * 70)
+        
+        # Row count straight from the Parquet footer
+        final_rows = pq.read_metadata(tmp_path).num_rows
+        self.stats['final_rows'] = final_rows
+        self.profiler.rows(rows_out=final_rows)
+        self.stats['duplicates_removed'] = self.stats['base_rows'] + self.stats['incr_rows'] - final_rows
+        
+        print(f"  ✓ Removed {self.stats['duplicates_removed']:,} duplicates")
+        print(f"  ✓ Final: {final_rows:,} rows")
+        
+        # Check 1: Row count
+        assert final_rows <= self.stats['base_rows'] + self.stats['incr_rows'], "Row count exceeds inputs!"
+        print("  ✓ Row count valid")
+        
+        if self.base_stats is not None:
+            # Checks 2-3 + stats from the delta only (base was validated on its last write)
+            self.table_stats = self._validate_incremental(base_lf, incr_lf.collect(), final_rows)
+        else:
+            with pl.Config(streaming_chunk_size=chunk_rows):
+                check = _collect_streaming(
+                    pl.scan_parquet(tmp_path).select(
+                        pl.col('sentenceID').null_count().alias('null_ids'),
+                        pl.col('sentenceID').n_unique().alias('unique_ids'),
+                    )
+                ).row(0, named=True)
+            
+            # Check 2: No null primary keys
+            assert check['null_ids'] == 0, "Null sentenceIDs found!"
+            print("  ✓ No null sentenceIDs")
+            
+            # Check 3: No duplicates
+            assert check['unique_ids'] == final_rows, "Duplicates found!"
+            print("  ✓ All sentenceIDs unique")
+            
+            self.table_stats = TableStats.from_frame(pl.scan_parquet(tmp_path))
+            self.stats['validation'] = 'full'
+        
+        # Stats (size_mb = uncompressed column bytes from the footer, ~ estimated_size)
+        self.stats.update({k: v for k, v in self.table_stats.summary().items() if k != 'rows'})
+        self.stats['size_mb'] = round(_parquet_uncompressed_mb(tmp_path), 2)
+        
+        print(f"\n  Companies: {self.stats['companies']}")
+        print(f"  Year range: {self.stats['year_min']} - {self.stats['year_max']}")
+        print(f"  Size: {self.stats['size_mb']} MB")
+        
+        self._update_dedup_index(incr_lf, lambda: [pl.scan_parquet(tmp_path)])
+        return tmp_path
+    
+    def _validate_incremental(self, base_lf, incr_df, final_rows):
+        """
+        Step 6 in time proportional to the increment.
+        
+        The base object matches its persisted stats (ETag) and was checked unique
+        when written; the merge drops base rows whose key is in the increment.
+        So only the increment's keys and the base rows it replaces need looking at.
+        Those rows live in the (year, cik) groups the increment lands in or whose
+        key range covers one of its keys.
+        """
+        stats = self.base_stats
+        incr_df = incr_df.unique(subset=['sentenceID'], keep='last', maintain_order=True)
+        
+        # Check 2: No null primary keys (base side known clean)
+        assert incr_df['sentenceID'].null_count() == 0, "Null sentenceIDs found!"
+        print("  ✓ No null sentenceIDs (increment)")
+        
+        years, ciks = stats.candidate_groups(incr_df)
+        replaced = (
+            base_lf
+            .filter(_in_or_null('report_year', years) & _in_or_null('cik_int', ciks))
+            .filter(pl.col('sentenceID').is_in(incr_df['sentenceID'].implode()))
+            .select('report_year', 'cik_int', 'name', 'sentenceID')
+            .collect()
         )
         
-        print(f"  ✓ Log updated: {log_key}")
+        stats.apply(added=incr_df, removed=replaced)
+        
+        # Check 3: No duplicates - base rows - replaced + increment must be exactly the output
+        assert stats.rows == final_rows, (
+            f"Duplicates found! stats expect {stats.rows:,} rows, output has {final_rows:,}"
+        )
+        print(f"  ✓ All sentenceIDs unique (checked {len(incr_df):,} incremental keys, "
+              f"{len(replaced):,} replaced base rows)")
+        
+        self.stats['validation'] = 'incremental'
+        return stats
+    
+    # ------------------------------------------------------------------------
+    # STEP 6b: near-duplicate index (etl/dedup_index.py)
+    # ------------------------------------------------------------------------
+    def _load_dedup_index(self, prefix, etag):
+        """Stored index, only if it describes exactly the base object (its ETag)"""
+        if not self.config.dedup['enabled']:
+            return None
+        index = DedupIndex.load(self.config.dedup, self.transfer, prefix, etag)
+        if index is None:
+            print("  Dedup index: none for this base (rebuilt from the merged table)")
+        else:
+            print(f"  Dedup index: {len(index.frame):,} signed sentences (increment only)")
+        return index
+    
+    def _update_dedup_index(self, incr, full_frames):
+        """
+        Sign the increment into the base's index, or - with no index for the
+        base - every frame of full_frames(); then re-mark touched companies
+        """
+        if not self.config.dedup['enabled']:
+            return
+        self.profiler.step('STEP 6b: DEDUP INDEX')
+        print("\n" + "=" * 70)
+        print("STEP 6b: DEDUP INDEX")
+        print("=" * 70)
+        
+        backend = self.config.row_hash_backend
+        if self.dedup_index is None:
+            print("\n⏳ Signing every sentence of the merged table...")
+            self.dedup_index = DedupIndex(self.config.dedup)
+            for frame in full_frames():
+                self.dedup_index.add(frame, backend)
+        else:
+            print("\n⏳ Signing incremental sentences...")
+            self.dedup_index.add(incr, backend)
+        self.dedup_index.classify()
+        
+        summary = self.dedup_index.summary()
+        self.stats.update(summary)
+        self.profiler.rows(rows_out=summary['dedup_rows'])
+        print_dedup_report(self.dedup_index)
+    
+    def _save_dedup_index(self, prefix, etag):
+        if self.dedup_index is None:
+            return
+        self.dedup_index.save(self.transfer, prefix, etag, compression=self.config.compression)
+        print(f"  ✓ Dedup index: {prefix}/{DedupIndex.INDEX_FILE}")
+    
+    def _read_parquet(self, uri):
+        """Parallel ranged GETs for s3:// URIs, plain Polars read otherwise"""
+        if self.transfer is not None and uri.startswith('s3://'):
+            return self.transfer.read_parquet(uri.split('/', 3)[3])
+        return pl.read_parquet(uri, storage_options=self.storage_options)
+    
+    def _read_schema(self, uri):
+        """Schema from the Parquet footer only (preflight's copy, else a suffix ranged GET)"""
+        if uri.startswith('s3://'):
+            key = uri.split('/', 3)[3]
+            if key in self.footers and self.footers[key].schema is not None:
+                return self.footers[key].schema
+            if self.transfer is not None:
+                return self.transfer.read_schema(key)
+        return footer_schema(uri, self.storage_options)
+    
+    @staticmethod
+    def _streaming_chunk_rows(settings):
+        """Translate the memory budget into a per-thread streaming chunk size"""
+        budget_bytes = settings['memory_budget_mb'] * 1024 * 1024
+        # Each thread holds a few chunks in flight (source, join probe, sink buffer)
+        in_flight = max(1, pl.thread_pool_size()) * 4
+        rows = budget_bytes // (settings['est_row_bytes'] * in_flight)
+        return int(min(max(rows, 1_000), settings['row_group_size']))
+    
+    def _check_schemas(self, base_schema):
+        """Validate the alignment rules against Parquet footers before reading any rows"""
+        incr_schema = self._read_schema(self.config.s3_uri(self.config.incr_path))
+        report = self.alignment.validate(base_schema, incr_schema)
+        print(f"\n✓ Schemas compatible (footers: {len(base_schema)} base / {len(incr_schema)} incremental columns)")
+        return report
+    
+    def _align_incremental(self, incr_lf, base_schema):
+        """Incremental → base schema as a single lazy projection"""
+        incr_lf, report = self.alignment.apply(incr_lf, base_schema)
+        print_report(report)
+        return incr_lf
+    
+    def _record_s3_calls(self):
+        """Copy the client's per-operation API counters into the run stats"""
+        stats = call_stats(self.s3)
+        if stats is None:
+            return
+        totals = stats.totals()
+        self.stats['s3_requests'] = totals['calls']
+        self.stats['s3_errors'] = totals['errors']
+        self.stats['s3_request_ms'] = totals['total_ms']
+        self.stats['s3_calls'] = stats.snapshot()
+        
+        print(f"\n📡 S3 API calls: {totals['calls']} ({totals['errors']} errors, {totals['total_ms'] / 1000:.2f}s)")
+        stats.print_summary()
+    
+    def _record_stages(self):
+        """Per-step wall/CPU/peak RSS/rows/S3 bytes into the run stats"""
+        self.stats['stages'] = list(self.profiler.records)
+        if self.profiler.records:
+            self.stats['peak_rss_mb'] = max(r['peak_rss_mb'] for r in self.profiler.records)
+        
+        print("\n⏱  Stage profile:")
+        self.profiler.print_summary()
+    
+    def _write_trace(self):
+        """Chrome trace of this run if profiling.chrome_trace_dir is set"""
+        trace_dir = self.config.profiling['chrome_trace_dir']
+        if not trace_dir:
+            return
+        os.makedirs(trace_dir, exist_ok=True)
+        path = self.profiler.write_chrome_trace(os.path.join(trace_dir, f"merge_{self.run_id}.json"))
+        print(f"  ✓ Chrome trace: {path}")
+    
+    def write_log(self):
+        """
+        Append this run to the S3 run log (one object per run).
+        Not a profiled stage: the entry carries the stage records, so a span for
+        writing it could never be in the log and the trace would disagree with it.
+        """
+        print("\n⏳ Writing log entry...")
+        
+        log_entry = {
+            'run_id': self.run_id,
+            'timestamp': self.stats.get('timestamp', ''),
+            'status': self.stats.get('status', 'UNKNOWN'),
+            'merge_type': self.stats.get('merge_type', 'unknown'),
+            'base_rows': self.stats.get('base_rows', 0),
+            'incr_rows': self.stats.get('incr_rows', 0),
+            'final_rows': self.stats.get('final_rows', 0),
+            'duplicates_removed': self.stats.get('duplicates_removed', 0),
+            'companies': self.stats.get('companies', 0),
+            'year_min': self.stats.get('year_min', 0),
+            'year_max': self.stats.get('year_max', 0),
+            'size_mb': self.stats.get('size_mb', 0),
+            'duration_sec': self.stats.get('duration_sec', 0),
+            'error': self.stats.get('error', ''),
+            'partitions_read': self.stats.get('partitions_read', 0),
+            'partitions_written': self.stats.get('partitions_written', 0),
+            's3_requests': self.stats.get('s3_requests', 0),
+            's3_errors': self.stats.get('s3_errors', 0),
+            's3_request_ms': self.stats.get('s3_request_ms', 0.0),
+            'validation': self.stats.get('validation', ''),
+            'dedup_exact': self.stats.get('dedup_exact', 0),
+            'dedup_near': self.stats.get('dedup_near', 0),
+            'peak_rss_mb': self.stats.get('peak_rss_mb', 0.0),
+            # JSON text keeps the compacted Parquet schema flat (see run_log.stage_history)
+            'stages': json.dumps(self.stats.get('stages', [])),
+        }
+        
+        log_key = RunLog(self.config, self.s3).append(log_entry)
+        print(f"  ✓ Log written: {log_key}")
+
+
+def _collect_streaming(lf):
+    """Collect on the streaming engine (engine= on newer Polars, streaming= on older)"""
+    try:
+        return lf.collect(engine='streaming')
+    except (TypeError, ValueError):
+        return lf.collect(streaming=True)
+
+
+def _in_or_null(column, values):
+    """column is in values; a None among them also matches NULL (is_in never does)"""
+    expr = pl.col(column).is_in([v for v in values if v is not None])
+    return expr | pl.col(column).is_null() if None in values else expr
+
+
+def _parquet_uncompressed_mb(path):
+    """Sum of uncompressed row-group bytes from the Parquet footer"""
+    meta = pq.read_metadata(path)
+    total = sum(meta.row_group(i).total_byte_size for i in range(meta.num_row_groups))
+    return total / (1024 * 1024)
 
 
 def main():
@@ -0,0 +1,259 @@
+"""
+Partitioned Fact Table - Key-range merge that rewrites only touched partitions
+Layout: <partitioned_path>/year=<report_year>/cik_bucket=<cik_int % N>/part-<version>.parquet
+
+A sentenceID always belongs to one filing (cik + report year), so its partition
+never changes between runs. That makes "incremental wins" a per-partition
+anti-join: partitions the increment does not land in are never read or written.
+
+Each rewrite goes to a new versioned key and the manifest (written last) names
+the live file of every partition, so a run that dies mid-way leaves the table
+readable. Superseded files are deleted only after the manifest is committed.
+Rows with a NULL report_year / cik_int land in year=__null__ / cik_bucket=__null__.
+"""
+
+import json
+import os
+import tempfile
+import uuid
+from datetime import datetime
+
+import polars as pl
+import pyarrow.parquet as pq
+
+from s3_transfer import S3Transfer
+
+
+class PartitionedMerger:
+    """Reads/writes the partitioned fact table and its partition manifest"""
+
+    MANIFEST_FILE = '_partitions.json'
+    NULL_PARTITION = '__null__'
+
+    def __init__(self, config, s3):
+        self.config = config
+        self.s3 = s3
+        self.transfer = S3Transfer.from_config(config, s3)
+        self.root = config.partitioned_path
+        self.n_buckets = config.cik_buckets
+        self.manifest_key = f"{self.root}/{self.MANIFEST_FILE}"
+        # One version per run: every file this run writes is new, nothing live is overwritten
+        self.version = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        self.superseded = []
+
+        # Tracking for logs
+        self.stats = {
+            'partitions_read': 0,
+            'partitions_written': 0,
+            'bytes_written': 0,
+        }
+
+    # ------------------------------------------------------------------------
+    # Layout helpers
+    # ------------------------------------------------------------------------
+    def with_partition_cols(self, frame):
+        """Add the cik_bucket routing column (DataFrame or LazyFrame)"""
+        return frame.with_columns(
+            (pl.col('cik_int') % self.n_buckets).cast(pl.Int32).alias('cik_bucket')
+        )
+
+    @classmethod
+    def partition_key(cls, year, bucket):
+        year = cls.NULL_PARTITION if year is None else int(year)
+        bucket = cls.NULL_PARTITION if bucket is None else f"{int(bucket):02d}"
+        return f"year={year}/cik_bucket={bucket}"
+
+    def object_key(self, pkey, version='0'):
+        return f"{self.root}/{pkey}/part-{version}.parquet"
+
+    def live_key(self, pkey, partitions):
+        """Object holding a partition's current rows (entries from before versioning: part-0)"""
+        return partitions[pkey].get('key') or self.object_key(pkey)
+
+    # ------------------------------------------------------------------------
+    # Manifest: one small JSON object, rewritten last (commit point of a run)
+    # ------------------------------------------------------------------------
+    def load_manifest(self):
+        """Return the manifest dict, or None if the dataset does not exist yet"""
+        try:
+            obj = self.s3.get_object(
+                Bucket=self.config.bucket,
+                Key=self.manifest_key
+            )
+            return json.loads(obj['Body'].read().decode('utf-8'))
+        except self.s3.exceptions.NoSuchKey:
+            return None
+
+    def save_manifest(self, partitions, columns):
+        body = {
+            'updated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'cik_buckets': self.n_buckets,
+            'columns': columns,
+            'partitions': partitions,
+        }
+        self.s3.put_object(
+            Bucket=self.config.bucket,
+            Key=self.manifest_key,
+            Body=json.dumps(body, indent=1).encode('utf-8')
+        )
+
+    # ------------------------------------------------------------------------
+    # Partition I/O
+    # ------------------------------------------------------------------------
+    def read_partition(self, pkey, partitions):
+        self.stats['partitions_read'] += 1
+        return self.transfer.read_parquet(self.live_key(pkey, partitions))
+
+    def write_partition(self, pkey, df):
+        """Validate, write and upload one partition under this run's version; return its manifest entry"""
+        assert df['sentenceID'].null_count() == 0, f"Null sentenceIDs in {pkey}!"
+        assert df['sentenceID'].n_unique() == len(df), f"Duplicates found in {pkey}!"
+
+        df = df.sort('sentenceID')
+        key = self.object_key(pkey, self.version)
+
+        with tempfile.NamedTemporaryFile(suffix='.parquet', delete=False) as tmp:
+            tmp_path = tmp.name
+        try:
+            df.write_parquet(tmp_path, compression=self.config.compression)
+            meta = pq.read_metadata(tmp_path)
+            size_bytes = os.path.getsize(tmp_path)
+            self.transfer.upload_file(tmp_path, key)
+        finally:
+            os.remove(tmp_path)
+
+        self.stats['partitions_written'] += 1
+        self.stats['bytes_written'] += size_bytes
+
+        return {
+            'key': key,
+            'rows': len(df),
+            'size_bytes': size_bytes,
+            'uncompressed_bytes': sum(
+                meta.row_group(i).total_byte_size for i in range(meta.num_row_groups)
+            ),
+            'ciks': sorted(int(c) for c in df['cik_int'].unique().drop_nulls()),
+            'key_min': df['sentenceID'][0],
+            'key_max': df['sentenceID'][-1],
+        }
+
+    # ------------------------------------------------------------------------
+    # Bootstrap: split a single-file base table into partitions (one-time)
+    # ------------------------------------------------------------------------
+    def bootstrap(self, base_lf):
+        """Partition a whole base table, one report_year at a time"""
+        base_lf = self.with_partition_cols(base_lf)
+        years = (
+            base_lf.select(pl.col('report_year').unique().sort())
+            .collect()['report_year'].to_list()
+        )
+
+        partitions = {}
+        for year in years:
+            in_year = pl.col('report_year').is_null() if year is None else pl.col('report_year') == year
+            year_df = base_lf.filter(in_year).collect()
+            year_df = year_df.unique(subset=['sentenceID'], keep='last', maintain_order=True)
+            for (bucket,), part_df in year_df.partition_by('cik_bucket', as_dict=True).items():
+                pkey = self.partition_key(year, bucket)
+                partitions[pkey] = self.write_partition(pkey, part_df.drop('cik_bucket'))
+            print(f"    ✓ {year}: {len(year_df):,} rows")
+
+        return partitions
+
+    # ------------------------------------------------------------------------
+    # Incremental merge: anti-join per touched partition
+    # ------------------------------------------------------------------------
+    def touched_partitions(self, incr_df):
+        """Partition keys the (aligned) incremental rows land in"""
+        keys = self.with_partition_cols(incr_df).select('report_year', 'cik_bucket').unique()
+        return sorted(self.partition_key(y, b) for y, b in keys.iter_rows())
+
+    def merge(self, incr_df, partitions):
+        """
+        Apply the increment to the partition manifest in place.
+        Returns the list of rewritten partition keys.
+        """
+        incr_df = self.with_partition_cols(incr_df)
+        written = []
+
+        for (year, bucket), incr_part in incr_df.partition_by(
+            ['report_year', 'cik_bucket'], as_dict=True
+        ).items():
+            pkey = self.partition_key(year, bucket)
+            incr_part = incr_part.drop('cik_bucket')
+
+            if pkey in partitions:
+                existing = self.read_partition(pkey, partitions)
+                kept = existing.join(incr_part.select('sentenceID'), on='sentenceID', how='anti')
+                merged = pl.concat([kept, incr_part])
+                self.superseded.append(self.live_key(pkey, partitions))
+            else:
+                merged = incr_part
+
+            partitions[pkey] = self.write_partition(pkey, merged)
+            written.append(pkey)
+            print(f"    ✓ {pkey}: {len(incr_part):,} incremental → {len(merged):,} rows")
+
+        return sorted(written)
+
+    def delete_superseded(self):
+        """Drop the files the committed manifest no longer points at (call after save_manifest)"""
+        if self.superseded:
+            self.transfer.delete_keys(self.superseded)
+            print(f"    Deleted {len(self.superseded)} superseded partition file(s)")
+        self.superseded = []
+
+    def archive_partitions(self, pkeys, partitions):
+        """Copy the live file of partitions about to be rewritten"""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        prefix = f"{self.config.archive_path}/partitions_{timestamp}"
+
+        for pkey in pkeys:
+            if pkey not in partitions:
+                continue
+            source = self.live_key(pkey, partitions)
+            self.s3.copy_object(
+                CopySource={'Bucket': self.config.bucket, 'Key': source},
+                Bucket=self.config.bucket,
+                Key=f"{prefix}/{pkey}/{source.split('/')[-1]}"
+            )
+
+        self._prune_partition_backups()
+        return prefix
+
+    def _prune_partition_backups(self):
+        """Keep only the newest max_backups partition snapshots"""
+        response = self.s3.list_objects_v2(
+            Bucket=self.config.bucket,
+            Prefix=f"{self.config.archive_path}/partitions_",
+            Delimiter='/'
+        )
+        snapshots = sorted(p['Prefix'] for p in response.get('CommonPrefixes', []))
+
+        for snapshot in snapshots[:max(0, len(snapshots) - self.config.max_backups)]:
+            paginator = self.s3.get_paginator('list_objects_v2')
+            keys = [
+                obj['Key']
+                for page in paginator.paginate(Bucket=self.config.bucket, Prefix=snapshot)
+                for obj in page.get('Contents', [])
+            ]
+            self.transfer.delete_keys(keys)
+            print(f"    Deleted: {snapshot}")
+
+    # ------------------------------------------------------------------------
+    # Table-level stats straight from the manifest (no data read)
+    # ------------------------------------------------------------------------
+    @staticmethod
+    def table_stats(partitions):
+        years = [int(y) for y in (k.split('/')[0].split('=')[1] for k in partitions)
+                 if y != PartitionedMerger.NULL_PARTITION]
+        ciks = set()
+        for entry in partitions.values():
+            ciks.update(entry['ciks'])
+        return {
+            'rows': sum(e['rows'] for e in partitions.values()),
+            'companies': len(ciks),
+            'year_min': min(years) if years else 0,
+            'year_max': max(years) if years else 0,
+            'size_mb': round(sum(e['uncompressed_bytes'] for e in partitions.values()) / (1024 * 1024), 2),
+        }
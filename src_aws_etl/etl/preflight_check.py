@@ -1,20 +1,30 @@
 """
 Pre-flight Checks & Archive Management
 Verifies source files and handles single backup
+
+Inputs are checked from their Parquet footers only (one suffix ranged GET
+per file, all files in parallel): schema compatibility, row counts,
+row-group stats (report_year min/max, sentenceID nulls) and codecs.
+A bad incremental file fails here, before any row group is downloaded.
 """
 
-import os
+import io
 import sys
-import boto3
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from dotenv import load_dotenv
+
+import pyarrow.parquet as pq
 
 # Add project root
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
 from config_loader import ETLConfig
+from s3_client import get_s3_client
+from s3_transfer import MB, S3Transfer
+from schema_align import SchemaAlignment
+from snapshot_store import SnapshotStore
 
 try:
     import polars as pl
@@ -23,25 +33,83 @@ except ImportError:
     POLARS_AVAILABLE = False
 
 
+# Codecs every reader of the fact table (Polars, pyarrow, DuckDB) can decode
+SUPPORTED_CODECS = {'UNCOMPRESSED', 'SNAPPY', 'GZIP', 'ZSTD', 'LZ4', 'LZ4_RAW', 'BROTLI'}
+
+
+class ParquetFooter:
+    """Row counts, codecs, column stats and schema of one object, from its footer"""
+    
+    def __init__(self, key, footer, size):
+        meta = pq.read_metadata(io.BytesIO(footer))
+        self.key = key
+        self.size_mb = size / MB
+        self.rows = meta.num_rows
+        self.row_groups = meta.num_row_groups
+        self.row_group_rows = sum(meta.row_group(i).num_rows for i in range(meta.num_row_groups))
+        self.codecs = {
+            meta.row_group(i).column(j).compression
+            for i in range(meta.num_row_groups) for j in range(meta.num_columns)
+        }
+        self.schema = pl.read_parquet_schema(io.BytesIO(footer)) if POLARS_AVAILABLE else None
+        self.year_min, self.year_max, _ = self._column_stats(meta, 'report_year')
+        _, _, self.id_nulls = self._column_stats(meta, 'sentenceID')
+    
+    @staticmethod
+    def _column_stats(meta, name):
+        """(min, max, null_count) over all row groups; None when any row group lacks them"""
+        lo, hi, nulls = None, None, 0
+        has_minmax = has_nulls = meta.num_row_groups > 0
+        for i in range(meta.num_row_groups):
+            rg = meta.row_group(i)
+            chunk = next((rg.column(j) for j in range(rg.num_columns)
+                          if rg.column(j).path_in_schema == name), None)
+            stats = chunk.statistics if chunk is not None else None
+            if stats is None:
+                return None, None, None
+            if stats.has_min_max:
+                lo = stats.min if lo is None else min(lo, stats.min)
+                hi = stats.max if hi is None else max(hi, stats.max)
+            elif stats.num_values:
+                has_minmax = False
+            if stats.has_null_count:
+                nulls += stats.null_count
+            else:
+                has_nulls = False
+        if not has_minmax:
+            lo = hi = None
+        return lo, hi, nulls if has_nulls else None
+    
+    def problems(self):
+        """Footer-level reasons this file cannot be merged"""
+        found = []
+        if self.rows != self.row_group_rows:
+            found.append(f"footer row count {self.rows:,} != row groups {self.row_group_rows:,}")
+        unsupported = self.codecs - SUPPORTED_CODECS
+        if unsupported:
+            found.append(f"unsupported codec(s): {', '.join(sorted(unsupported))}")
+        if self.id_nulls:
+            found.append(f"{self.id_nulls:,} NULL sentenceID(s)")
+        return found
+    
+    def describe(self):
+        years = f"{self.year_min}-{self.year_max}" if self.year_min is not None else "no stats"
+        return (f"{self.rows:,} rows, {self.row_groups} row group(s), {self.size_mb:.2f} MB, "
+                f"{'/'.join(sorted(self.codecs)) or '-'}, report_year {years}")
+
 
 class PreflightChecker:
     """Handles pre-flight validation and archiving"""
     
-    def __init__(self):
-        # Load config
-        self.config = ETLConfig()
-        
-        # Load AWS credentials
-        secrets_path = Path(__file__).parent.parent / '.aws_secrets' / 'aws_credentials.env'
-        load_dotenv(secrets_path)
-        
-        # Initialize S3 client
-        self.s3 = boto3.client(
-            's3',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name=os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
-        )
+    def __init__(self, config=None, s3=None):
+        # Callers that already hold a config / client pass them in
+        self.config = config or ETLConfig()
+        
+        # Shared pooled S3 client (credentials loaded once in s3_client)
+        self.s3 = s3 or get_s3_client(self.config)
+        
+        # key → ParquetFooter for every input checked (reused by the merge)
+        self.footers = {}
     
     def file_exists(self, s3_key):
         """Check if S3 file exists and return size in MB"""
@@ -52,6 +120,31 @@ class PreflightChecker:
         except self.s3.exceptions.ClientError:
             return False, None
     
+    def read_footers(self, keys):
+        """key → (ParquetFooter or None, error); every footer fetched in parallel"""
+        transfer = S3Transfer.from_config(self.config, self.s3)
+        
+        def fetch(key):
+            try:
+                return ParquetFooter(key, *transfer.read_footer(key)), None
+            except self.s3.exceptions.ClientError as e:
+                code = e.response.get('Error', {}).get('Code')
+                return None, 'missing' if code in ('NoSuchKey', '404', 'NotFound') else str(e)
+            except (ValueError, OSError) as e:
+                return None, f"unreadable footer: {e}"
+        
+        with ThreadPoolExecutor(max_workers=max(1, len(keys))) as pool:
+            return dict(zip(keys, pool.map(fetch, keys)))
+    
+    def _current_final_key(self):
+        """Object the merge will use as its base when a final table exists"""
+        if self.config.merge_mode == 'partitioned':
+            return None   # partition manifest is checked by the merge itself
+        if self.config.archive_mode == 'snapshot':
+            current = SnapshotStore(self.config, self.s3).current()
+            if current is not None:
+                return current['key']
+        return self.config.final_path
     
 # --------------------------------------------------------------------------------------------------------------------
 # --------------------------------------------------------------------------------------------------------------------
@@ -64,23 +157,24 @@ class PreflightChecker:
         
         all_good = True
         
+        # Footers of every input in one parallel round trip
+        final_key = self._current_final_key()
+        keys = [self.config.hist_path, self.config.incr_path] + ([final_key] if final_key else [])
+        results = self.read_footers(keys)
+        self.footers = {key: footer for key, (footer, _) in results.items() if footer is not None}
+        
         # Check 1: Historical file
         print("\n✓ Check 1: Historical data")
-        exists, size = self.file_exists(self.config.hist_path)
-        if exists:
-            print(f"  Found: {self.config.hist_path} ({size:.2f} MB)")
-        else:
-            print(f"  MISSING: {self.config.hist_path}")
-            all_good = False
+        all_good &= self._report_input(self.config.hist_path, *results[self.config.hist_path])
         
         # Check 2: Incremental file
         print("\n✓ Check 2: Incremental data")
-        exists, size = self.file_exists(self.config.incr_path)
-        if exists:
-            print(f"  Found: {self.config.incr_path} ({size:.2f} MB)")
-        else:
-            print(f"  MISSING: {self.config.incr_path}")
-            all_good = False
+        incr_ok = self._report_input(self.config.incr_path, *results[self.config.incr_path])
+        incr = self.footers.get(self.config.incr_path)
+        if incr is not None and incr.rows == 0:
+            print("  ERROR: incremental file has no rows")
+            incr_ok = False
+        all_good &= incr_ok
         
         # Check 3: S3 permissions
         print("\n✓ Check 3: S3 permissions")
@@ -95,8 +189,32 @@ class PreflightChecker:
             print(f"  ERROR: {e}")
             all_good = False
         
-
-        return all_good    
+        # Check 4: Schema compatibility (footers only, same rules as the merge)
+        print("\n✓ Check 4: Schema compatibility")
+        base = self.footers.get(final_key) or self.footers.get(self.config.hist_path)
+        if incr_ok and base is not None and POLARS_AVAILABLE:
+            try:
+                SchemaAlignment.from_config(self.config).validate(base.schema, incr.schema)
+                print(f"  Incremental aligns to {base.key.split('/')[-1]} ({len(base.schema)} columns)")
+            except ValueError as e:
+                print(f"  ERROR: {e}")
+                all_good = False
+        else:
+            print("  Skipped (inputs unreadable)")
+        
+        return all_good
+    
+    def _report_input(self, key, footer, error):
+        """Print one input's footer summary; False if it is missing or unusable"""
+        if footer is None:
+            print(f"  {'MISSING' if error == 'missing' else 'ERROR'}: {key}" + ('' if error == 'missing' else f" ({error})"))
+            return False
+        print(f"  Found: {key}")
+        print(f"    {footer.describe()}")
+        problems = footer.problems()
+        for problem in problems:
+            print(f"  ERROR: {problem}")
+        return not problems
 
 
 # --------------------------------------------------------------------------------------------------------------------
@@ -143,9 +261,9 @@ class PreflightChecker:
             raise
     
     def _delete_old_backups(self):
-        """Delete existing backups (keep only newest)"""
+        """Delete oldest backups so max_backups remain after the new one"""
         try:
-            # List all archives
+            # List all archives (timestamped names sort oldest first)
             response = self.s3.list_objects_v2(
                 Bucket=self.config.bucket,
                 Prefix=f"{self.config.archive_path}/finrag_fact_sentences_"
@@ -154,16 +272,14 @@ class PreflightChecker:
             if 'Contents' not in response:
                 return
             
-            archives = response['Contents']
+            archives = sorted(a['Key'] for a in response['Contents'])
             
             if len(archives) >= self.config.max_backups:
+                stale = archives[:len(archives) - self.config.max_backups + 1]
                 print(f"  Deleting old backup(s)...")
-                for archive in archives:
-                    self.s3.delete_object(
-                        Bucket=self.config.bucket,
-                        Key=archive['Key']
-                    )
-                    print(f"    Deleted: {archive['Key'].split('/')[-1]}")
+                S3Transfer.from_config(self.config, self.s3).delete_keys(stale)
+                for key in stale:
+                    print(f"    Deleted: {key.split('/')[-1]}")
         
         except Exception as e:
             print(f"  Warning: Cleanup failed - {e}")
@@ -0,0 +1,63 @@
+"""
+Row Hash - vectorized MD5(sentenceID || sentence)
+Produces the same lowercase hex digest as DuckDB's MD5() in 31_run_stratified.sql.
+
+Backends (picked by 'auto' in this order):
+  native  - polars-hash plugin, MD5 computed in Rust over the whole column
+  batched - hashlib over whole Series batches (no per-row Polars callback).
+            Single process on purpose: forking a pool from inside a Polars
+            map_batches callback can deadlock on Polars' own thread pool
+"""
+
+import hashlib
+
+import polars as pl
+
+try:
+    import polars_hash  # noqa: F401 - registers the .nchash namespace
+    POLARS_HASH_AVAILABLE = True
+except ImportError:
+    POLARS_HASH_AVAILABLE = False
+
+
+def _md5_hex_list(values):
+    """hashlib MD5 over a list of str (None stays None, like DuckDB NULL)"""
+    md5 = hashlib.md5
+    return [None if v is None else md5(v.encode()).hexdigest() for v in values]
+
+
+def _md5_batch(series):
+    return pl.Series(series.name, _md5_hex_list(series.to_list()), dtype=pl.String)
+
+
+def resolve_backend(backend='auto'):
+    if backend == 'auto':
+        return 'native' if POLARS_HASH_AVAILABLE else 'batched'
+    if backend == 'native' and not POLARS_HASH_AVAILABLE:
+        raise ImportError("row_hash backend 'native' needs the polars-hash package")
+    return backend
+
+
+def md5_expr(expr, backend='auto'):
+    """Lowercase hex MD5 of a String expression (NULL stays NULL)"""
+    backend = resolve_backend(backend)
+
+    if backend == 'native':
+        return expr.nchash.md5()
+
+    if backend == 'batched':
+        return expr.map_batches(_md5_batch, return_dtype=pl.String)
+
+    if backend == 'python':
+        # Original per-row implementation, kept as the benchmark baseline
+        return expr.map_elements(
+            lambda x: hashlib.md5(x.encode()).hexdigest(), return_dtype=pl.String
+        )
+
+    raise ValueError(f"Unknown row_hash backend: {backend}")
+
+
+def row_hash_expr(id_col='sentenceID', text_col='sentence', backend='auto'):
+    """Expression for MD5(id_col || text_col) as a 32-char hex string"""
+    concat = pl.col(id_col) + pl.col(text_col)
+    return md5_expr(concat, backend).alias('row_hash')
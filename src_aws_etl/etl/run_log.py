@@ -0,0 +1,265 @@
+"""
+Run Log - append-only merge history on S3
+Layout under output.logging.log_path:
+  runs/run_<timestamp>_<run_id>.json        one small object per run (never rewritten)
+  compacted/history_<first>_<last>_<id>.parquet  periodic roll-up of runs/
+
+Appending is a single PUT, so cost does not grow with history and overlapping
+runs cannot clobber each other. Every logging.compact_every runs the pending
+JSON objects are folded into one Parquet file and deleted in a batch.
+Compaction holds a lease object (conditional PUT), so overlapping runs do not
+fold the same keys twice; a run object that is already gone when read or
+deleted counts as compacted. Rows carry a run_id, so anything that still slips
+through only produces duplicates that load_history() drops.
+
+Query:  python etl/run_log.py   (last runs + duration / row-count / per-stage regressions)
+"""
+
+import io
+import json
+import sys
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+import polars as pl
+from botocore.exceptions import ClientError
+
+# Add project root
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+from config_loader import ETLConfig
+from s3_client import get_s3_client
+from s3_transfer import S3Transfer
+
+
+LEGACY_CSV = 'merge_history.csv'
+
+# A lease older than this belongs to a compactor that died; it can be taken over
+LEASE_TTL_SEC = 15 * 60
+
+
+class RunLog:
+    """Append, compact and query the merge run history"""
+
+    def __init__(self, config, s3):
+        self.config = config
+        self.s3 = s3
+        self.transfer = S3Transfer.from_config(config, s3)
+        self.runs_prefix = f"{config.log_path}/runs/"
+        self.compacted_prefix = f"{config.log_path}/compacted/"
+        self.lease_key = f"{config.log_path}/compaction.lease"
+
+    # ------------------------------------------------------------------------
+    # Write side
+    # ------------------------------------------------------------------------
+    def append(self, entry):
+        """Write one run as its own object; compact when enough have piled up"""
+        entry = dict(entry)
+        entry.setdefault('run_id', uuid.uuid4().hex[:12])
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        key = f"{self.runs_prefix}run_{stamp}_{entry['run_id']}.json"
+
+        self.s3.put_object(
+            Bucket=self.config.bucket,
+            Key=key,
+            Body=json.dumps(entry, default=str).encode('utf-8')
+        )
+
+        # One bounded LIST: are there compact_every pending runs yet?
+        pending = self._list(self.runs_prefix, max_keys=self.config.log_compact_every)
+        if len(pending) >= self.config.log_compact_every:
+            self.compact()
+
+        return key
+
+    def compact(self):
+        """Fold pending run objects into one Parquet file, then delete them"""
+        lease = self._acquire_lease()
+        if lease is None:
+            print("  Skipped compaction (another run holds the lease)")
+            return None
+
+        try:
+            keys = self._list(self.runs_prefix)
+            runs = self._read_runs(keys)
+            if runs.is_empty():
+                return None
+
+            first, last = keys[0].split('/')[-1][4:19], keys[-1].split('/')[-1][4:19]
+            # Unique suffix: a racing compactor never overwrites another's output
+            out_key = f"{self.compacted_prefix}history_{first}_{last}_{uuid.uuid4().hex[:8]}.parquet"
+
+            self.transfer.write_parquet(runs, out_key)
+            self.transfer.delete_keys(keys)      # batch delete: missing keys are not an error
+            print(f"  ✓ Compacted {len(runs)} run(s) → {out_key.split('/')[-1]}")
+            return out_key
+        finally:
+            self._release_lease(lease)
+
+    def _acquire_lease(self):
+        """ETag of a freshly written lease object, or None while another compactor holds it"""
+        body = json.dumps({'owner': uuid.uuid4().hex[:12],
+                           'acquired': datetime.now(timezone.utc).isoformat()}).encode('utf-8')
+        try:
+            return self.s3.put_object(Bucket=self.config.bucket, Key=self.lease_key,
+                                      Body=body, IfNoneMatch='*')['ETag']
+        except ClientError as e:
+            if _error_code(e) not in ('PreconditionFailed', 'ConditionalRequestConflict'):
+                raise
+
+        # Held: take it over only if stale, and only if nobody else did first
+        try:
+            held = self.s3.head_object(Bucket=self.config.bucket, Key=self.lease_key)
+            age = (datetime.now(timezone.utc) - held['LastModified']).total_seconds()
+            if age < LEASE_TTL_SEC:
+                return None
+            return self.s3.put_object(Bucket=self.config.bucket, Key=self.lease_key,
+                                      Body=body, IfMatch=held['ETag'])['ETag']
+        except ClientError as e:
+            if _error_code(e) in ('404', 'NoSuchKey', 'PreconditionFailed', 'ConditionalRequestConflict'):
+                return None
+            raise
+
+    def _release_lease(self, etag):
+        # IfMatch: a lease taken over after our TTL ran out is not ours to delete
+        try:
+            self.s3.delete_object(Bucket=self.config.bucket, Key=self.lease_key, IfMatch=etag)
+        except ClientError as e:
+            if _error_code(e) not in ('404', 'NoSuchKey', 'PreconditionFailed'):
+                raise
+
+    # ------------------------------------------------------------------------
+    # Read side
+    # ------------------------------------------------------------------------
+    def load_history(self, include_legacy=True):
+        """Whole history as one DataFrame: compacted Parquet + pending runs (+ old CSV)"""
+        # Pending before compacted: a run compacted in between is written to compacted/
+        # before it is deleted, so the second listing still finds it
+        pending = self._list(self.runs_prefix)
+        frames = [self.transfer.read_parquet(k) for k in self._list(self.compacted_prefix)]
+
+        runs = self._read_runs(pending)
+        if not runs.is_empty():
+            frames.append(runs)
+
+        if include_legacy:
+            legacy = self._read_legacy_csv()
+            if legacy is not None:
+                frames.append(legacy)
+
+        if not frames:
+            return pl.DataFrame()
+
+        history = pl.concat(frames, how='diagonal_relaxed')
+        if 'run_id' in history.columns:
+            # Legacy CSV rows have no run_id - keep them, drop compaction-race duplicates
+            history = pl.concat([
+                history.filter(pl.col('run_id').is_null()),
+                history.filter(pl.col('run_id').is_not_null()).unique(subset=['run_id'], keep='first'),
+            ])
+        return history.sort('timestamp')
+
+    def _list(self, prefix, max_keys=None):
+        keys = []
+        paginator = self.s3.get_paginator('list_objects_v2')
+        page_config = {'MaxItems': max_keys} if max_keys else {}
+        for page in paginator.paginate(Bucket=self.config.bucket, Prefix=prefix,
+                                       PaginationConfig=page_config):
+            keys.extend(obj['Key'] for obj in page.get('Contents', []))
+        return sorted(keys)
+
+    def _read_runs(self, keys):
+        """Run objects as rows; keys deleted since listing were compacted by someone else"""
+        rows = []
+        for k in keys:
+            try:
+                rows.append(json.loads(self.transfer.read_bytes(k).decode('utf-8')))
+            except ClientError as e:
+                if _error_code(e) not in ('404', 'NoSuchKey'):
+                    raise
+        return pl.DataFrame(rows, infer_schema_length=None)
+
+    def _read_legacy_csv(self):
+        try:
+            obj = self.s3.get_object(Bucket=self.config.bucket, Key=f"{self.config.log_path}/{LEGACY_CSV}")
+        except self.s3.exceptions.NoSuchKey:
+            return None
+        return pl.read_csv(io.BytesIO(obj['Body'].read()))
+
+
+def _error_code(error):
+    return error.response.get('Error', {}).get('Code')
+
+
+def stage_history(history):
+    """One row per (run, stage) from the JSON 'stages' column written by MergePipeline"""
+    if 'stages' not in history.columns:
+        return pl.DataFrame()
+    runs = history.filter(pl.col('stages').is_not_null() & (pl.col('stages') != '[]'))
+    rows = [
+        {'run_id': run_id, 'timestamp': ts, 'status': status, 'merge_type': merge_type, **stage}
+        for run_id, ts, status, merge_type, stages in runs.select(
+            'run_id', 'timestamp', 'status', 'merge_type', 'stages'
+        ).iter_rows()
+        for stage in json.loads(stages)
+    ]
+    return pl.DataFrame(rows, infer_schema_length=None) if rows else pl.DataFrame()
+
+
+def flag_regressions(history, metric='duration_sec', window=10, threshold=1.5,
+                     direction='up', group_by=('merge_type',)):
+    """
+    Successful runs whose metric moved by more than `threshold` x against the
+    rolling median of the previous `window` successful runs of the same group.
+    direction='up' flags slowdowns, 'down' flags shrinking outputs. For per-step
+    regressions pass stage_history(...) with group_by=('merge_type', 'name').
+    """
+    group_by = list(group_by)
+    runs = history.filter(pl.col('status') == 'SUCCESS').sort('timestamp')
+    baseline = (
+        pl.col(metric).shift(1)
+        .rolling_median(window_size=window, min_samples=1)
+        .over(group_by)
+    )
+    return (
+        runs.with_columns(baseline.alias('baseline'))
+        .with_columns((pl.col(metric) / pl.col('baseline')).alias('ratio'))
+        .filter(pl.col('ratio') > threshold if direction == 'up' else pl.col('ratio') < 1 / threshold)
+        .select('timestamp', 'run_id', *group_by, metric, 'baseline', 'ratio')
+    )
+
+
+def main():
+    """Print recent runs and any duration / row-count regressions"""
+    config = ETLConfig()
+    log = RunLog(config, get_s3_client(config))
+    history = log.load_history()
+
+    print("=" * 70)
+    print(f"MERGE RUN HISTORY ({len(history)} runs)")
+    print("=" * 70)
+    if history.is_empty():
+        return
+
+    cols = [c for c in ('timestamp', 'status', 'merge_type', 'final_rows', 'duration_sec') if c in history.columns]
+    print(history.select(cols).tail(10))
+
+    for metric, direction in (('duration_sec', 'up'), ('final_rows', 'down')):
+        flagged = flag_regressions(history, metric=metric, direction=direction)
+        print(f"\nRegressions in {metric}: {len(flagged)}")
+        if len(flagged):
+            print(flagged)
+
+    stages = stage_history(history)
+    if not stages.is_empty():
+        for metric in ('wall_sec', 'peak_rss_mb'):
+            flagged = flag_regressions(stages, metric=metric, group_by=('merge_type', 'name'))
+            print(f"\nStage regressions in {metric}: {len(flagged)}")
+            if len(flagged):
+                print(flagged)
+
+
+if __name__ == "__main__":
+    main()
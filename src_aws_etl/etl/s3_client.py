@@ -0,0 +1,183 @@
+"""
+S3 Client Factory - one pooled, instrumented boto3 client per process
+  - credentials loaded once from .aws_secrets/aws_credentials.env
+  - botocore Config sized for the transfer layer (connection pool, retries, keep-alive)
+  - endpoint override (s3_client.endpoint_url or AWS_ENDPOINT_URL) for local
+    stand-ins such as a moto server or MinIO
+  - S3CallStats: API calls, errors, latency and payload bytes per operation
+    via botocore events
+"""
+
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+
+import boto3
+from botocore.config import Config
+from dotenv import load_dotenv
+
+from config_loader import ETLConfig
+
+
+SECRETS_PATH = Path(__file__).parent.parent / '.aws_secrets' / 'aws_credentials.env'
+
+_client = None
+_client_lock = threading.Lock()
+_call_stats = weakref.WeakKeyDictionary()
+
+
+def _body_size(body):
+    """Bytes left in a serialized request body (bytes or seekable stream)"""
+    if body is None:
+        return 0
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    try:
+        pos = body.tell()
+        body.seek(0, os.SEEK_END)
+        end = body.tell()
+        body.seek(pos)
+        return end - pos
+    except (AttributeError, OSError, ValueError, TypeError):
+        return 0   # unsized stream
+
+
+class S3CallStats:
+    """Per-operation call counter fed by before-call / after-call hooks"""
+
+    def __init__(self):
+        self._ops = {}
+        self._lock = threading.Lock()
+
+    def attach(self, s3):
+        events = s3.meta.events
+        events.register('before-call.s3', self._before_call)
+        events.register('after-call.s3', self._after_call)
+        events.register('after-call-error.s3', self._after_call_error)
+
+    def _before_call(self, params, context, **kwargs):
+        context['finrag_call_start'] = time.perf_counter()
+        context['finrag_bytes_out'] = _body_size(params.get('body'))
+
+    def _after_call(self, model, context, http_response=None, parsed=None, **kwargs):
+        failed = http_response is not None and http_response.status_code >= 300
+        # GetObject bodies are streamed later; ContentLength is what will be read
+        bytes_in = (parsed or {}).get('ContentLength', 0) if model.name == 'GetObject' and not failed else 0
+        self._record(model.name, context, failed, bytes_in)
+
+    def _after_call_error(self, model, context, **kwargs):
+        self._record(model.name, context, True, 0)
+
+    def _record(self, operation, context, failed, bytes_in):
+        start = context.pop('finrag_call_start', None)
+        bytes_out = context.pop('finrag_bytes_out', 0)
+        elapsed_ms = (time.perf_counter() - start) * 1000 if start else 0.0
+        with self._lock:
+            op = self._ops.setdefault(operation, {
+                'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'bytes_in': 0, 'bytes_out': 0
+            })
+            op['calls'] += 1
+            op['errors'] += int(failed)
+            op['total_ms'] += elapsed_ms
+            op['max_ms'] = max(op['max_ms'], elapsed_ms)
+            op['bytes_in'] += bytes_in
+            op['bytes_out'] += bytes_out
+
+    def snapshot(self):
+        """Copy of the per-operation counters"""
+        with self._lock:
+            return {name: dict(op) for name, op in self._ops.items()}
+
+    def totals(self):
+        ops = self.snapshot().values()
+        return {
+            'calls': sum(op['calls'] for op in ops),
+            'errors': sum(op['errors'] for op in ops),
+            'total_ms': round(sum(op['total_ms'] for op in ops), 1),
+            'bytes_in': sum(op['bytes_in'] for op in ops),
+            'bytes_out': sum(op['bytes_out'] for op in ops),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
+
+    def print_summary(self):
+        ops = self.snapshot()
+        if not ops:
+            return
+        print(f"  {'operation':<26}{'calls':>8}{'errors':>8}{'avg ms':>10}{'max ms':>10}")
+        for name, op in sorted(ops.items(), key=lambda kv: -kv[1]['total_ms']):
+            avg = op['total_ms'] / op['calls'] if op['calls'] else 0.0
+            print(f"  {name:<26}{op['calls']:>8}{op['errors']:>8}{avg:>10.1f}{op['max_ms']:>10.1f}")
+
+
+def endpoint_url(config):
+    """Explicit endpoint from config, else AWS_ENDPOINT_URL (None → real S3)"""
+    return config.s3_client['endpoint_url'] or os.getenv('AWS_ENDPOINT_URL') or None
+
+
+def build_s3_client(config=None):
+    """New S3 client with the tuned botocore Config and call instrumentation"""
+    config = config or ETLConfig()
+    load_dotenv(SECRETS_PATH)
+
+    settings = config.s3_client
+    # Never let the connection pool throttle the transfer layer's thread pool
+    pool_size = max(settings['max_pool_connections'], config.transfer['max_concurrency'])
+
+    botocore_config = Config(
+        max_pool_connections=pool_size,
+        retries={'mode': settings['retry_mode'], 'max_attempts': settings['max_attempts']},
+        connect_timeout=settings['connect_timeout'],
+        read_timeout=settings['read_timeout'],
+        tcp_keepalive=settings['tcp_keepalive'],
+    )
+
+    session = boto3.session.Session(
+        aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+        aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+        aws_session_token=os.getenv('AWS_SESSION_TOKEN'),
+        region_name=os.getenv('AWS_DEFAULT_REGION', 'us-east-1'),
+    )
+    s3 = session.client('s3', endpoint_url=endpoint_url(config), config=botocore_config)
+
+    stats = S3CallStats()
+    stats.attach(s3)
+    _call_stats[s3] = stats
+    return s3
+
+
+def get_s3_client(config=None):
+    """Process-wide shared client (boto3 clients are thread-safe once built)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = build_s3_client(config)
+        return _client
+
+
+def reset_s3_client():
+    """Drop the shared client (tests, or after credentials change)"""
+    global _client
+    with _client_lock:
+        _client = None
+
+
+def call_stats(s3):
+    """S3CallStats for a client built here (None for foreign clients)"""
+    return _call_stats.get(s3)
+
+
+def polars_storage_options(config=None):
+    """storage_options for pl.scan_parquet / read_parquet matching the boto3 client"""
+    config = config or ETLConfig()
+    load_dotenv(SECRETS_PATH)
+    options = {'aws_region': os.getenv('AWS_DEFAULT_REGION', 'us-east-1')}
+    endpoint = endpoint_url(config)
+    if endpoint:
+        options['aws_endpoint_url'] = endpoint
+        options['aws_allow_http'] = str(endpoint.startswith('http://')).lower()
+    return options
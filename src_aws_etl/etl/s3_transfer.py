@@ -0,0 +1,257 @@
+"""
+S3 Transfer Layer - parallel multipart uploads and ranged parallel reads
+  - MultipartWriter: file-like sink; every chunk_size bytes becomes one
+    upload_part submitted to a thread pool (at most max_concurrency in flight,
+    so buffered memory stays <= chunk_size * max_concurrency)
+  - write_parquet: row groups go from the Parquet writer straight into parts,
+    no local temp file
+  - read_bytes / read_parquet: HEAD for size, then parallel ranged GETs
+  - read_metadata / read_schema: Parquet footer only (suffix ranged GET)
+  - delete_keys: batched delete_objects for retention cleanup
+"""
+
+import io
+import os
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import polars as pl
+import pyarrow.parquet as pq
+
+
+MB = 1024 * 1024
+
+# S3 rejects multipart parts smaller than 5 MB (except the last one)
+MIN_PART_SIZE = 5 * MB
+
+# delete_objects accepts at most 1000 keys per request
+MAX_DELETE_BATCH = 1000
+
+# First suffix GET for a Parquet footer; larger footers take one more request
+FOOTER_PROBE_SIZE = 64 * 1024
+
+
+class MultipartWriter(io.RawIOBase):
+    """Write-only stream that uploads itself to S3 as a multipart upload"""
+
+    def __init__(self, s3, bucket, key, chunk_size, max_concurrency):
+        super().__init__()
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.chunk_size = max(chunk_size, MIN_PART_SIZE)
+
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._futures = []
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._bytes = 0
+
+        # Tracking
+        self.parts = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._buffer.extend(data)
+        self._bytes += len(data)
+        while len(self._buffer) >= self.chunk_size:
+            part = bytes(self._buffer[:self.chunk_size])
+            del self._buffer[:self.chunk_size]
+            self._submit(part)
+        return len(data)
+
+    def tell(self):
+        return self._bytes
+
+    def _submit(self, body):
+        if self._upload_id is None:
+            self._upload_id = self.s3.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key
+            )['UploadId']
+
+        self.parts += 1
+        part_number = self.parts
+        self._slots.acquire()   # back-pressure: block the writer, not RAM
+
+        def upload():
+            try:
+                response = self.s3.upload_part(
+                    Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                    PartNumber=part_number, Body=body
+                )
+                return {'PartNumber': part_number, 'ETag': response['ETag']}
+            finally:
+                self._slots.release()
+
+        self._futures.append(self._pool.submit(upload))
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            if self._upload_id is None:
+                # Small object: one PUT, no multipart round-trips
+                self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=bytes(self._buffer))
+            else:
+                if self._buffer:
+                    self._submit(bytes(self._buffer))
+                try:
+                    parts = [f.result() for f in self._futures]
+                    self.s3.complete_multipart_upload(
+                        Bucket=self.bucket, Key=self.key, UploadId=self._upload_id,
+                        MultipartUpload={'Parts': sorted(parts, key=lambda p: p['PartNumber'])}
+                    )
+                except Exception:
+                    # A failed part or complete call leaves billed parts behind
+                    self.abort()
+                    raise
+            self._buffer.clear()
+        finally:
+            self._pool.shutdown(wait=True)
+            super().close()
+
+    def abort(self):
+        """Cancel an in-progress upload so no orphaned parts are billed"""
+        for f in self._futures:
+            f.cancel()
+        self._pool.shutdown(wait=True)
+        if self._upload_id is not None:
+            self.s3.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+        super().close()
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+        return False
+
+
+class S3Transfer:
+    """Chunked, concurrent S3 reads and writes for the ETL pipeline"""
+
+    def __init__(self, s3, bucket, chunk_size_mb=64, max_concurrency=8):
+        self.s3 = s3
+        self.bucket = bucket
+        self.chunk_size = int(chunk_size_mb * MB)
+        self.max_concurrency = max_concurrency
+
+        # Tracking for logs (read_range runs on pool threads)
+        self.stats = {'bytes_uploaded': 0, 'bytes_downloaded': 0}
+        self._stats_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config, s3):
+        t = config.transfer
+        return cls(s3, config.bucket, t['chunk_size_mb'], t['max_concurrency'])
+
+    # ------------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------------
+    def open_writer(self, key):
+        return MultipartWriter(self.s3, self.bucket, key, self.chunk_size, self.max_concurrency)
+
+    def write_parquet(self, df, key, compression='zstd', row_group_size=None):
+        """Stream a DataFrame to S3 row group by row group (no temp file)"""
+        table = df.to_arrow()
+        # Polars spells 'no compression' differently from pyarrow
+        compression = 'none' if compression == 'uncompressed' else compression
+        with self.open_writer(key) as sink:
+            with pq.ParquetWriter(sink, table.schema, compression=compression) as writer:
+                writer.write_table(table, row_group_size=row_group_size)
+            self.stats['bytes_uploaded'] += sink.tell()
+        return key
+
+    def upload_file(self, path, key):
+        """Parallel multipart upload of a local file, read chunk by chunk"""
+        with open(path, 'rb') as f, self.open_writer(key) as sink:
+            while True:
+                block = f.read(self.chunk_size)
+                if not block:
+                    break
+                sink.write(block)
+        self.stats['bytes_uploaded'] += os.path.getsize(path)
+        return key
+
+    # ------------------------------------------------------------------------
+    # Deletes
+    # ------------------------------------------------------------------------
+    def delete_keys(self, keys):
+        """Batched delete_objects (S3 caps a batch at 1000 keys)"""
+        keys = list(keys)
+        for start in range(0, len(keys), MAX_DELETE_BATCH):
+            batch = keys[start:start + MAX_DELETE_BATCH]
+            response = self.s3.delete_objects(
+                Bucket=self.bucket,
+                Delete={'Objects': [{'Key': k} for k in batch], 'Quiet': True}
+            )
+            errors = response.get('Errors', [])
+            if errors:
+                raise RuntimeError(f"delete_objects failed for {len(errors)} key(s): {errors[0]}")
+        return len(keys)
+
+    # ------------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------------
+    def size(self, key):
+        return self.s3.head_object(Bucket=self.bucket, Key=key)['ContentLength']
+
+    def read_range(self, key, start, end):
+        """Inclusive byte range [start, end]"""
+        obj = self.s3.get_object(Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}")
+        body = obj['Body'].read()
+        with self._stats_lock:
+            self.stats['bytes_downloaded'] += len(body)
+        return body
+
+    def read_bytes(self, key, size=None):
+        """Whole object via parallel ranged GETs"""
+        size = self.size(key) if size is None else size
+        if size == 0:
+            return b''
+
+        ranges = [(s, min(s + self.chunk_size, size) - 1) for s in range(0, size, self.chunk_size)]
+        buffer = bytearray(size)
+
+        def fetch(rng):
+            start, end = rng
+            buffer[start:end + 1] = self.read_range(key, start, end)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            list(pool.map(fetch, ranges))
+
+        return bytes(buffer)
+
+    def read_parquet(self, key, columns=None):
+        return pl.read_parquet(io.BytesIO(self.read_bytes(key)), columns=columns)
+
+    def read_footer(self, key):
+        """(footer bytes incl. length + magic, object size) without reading row groups"""
+        obj = self.s3.get_object(Bucket=self.bucket, Key=key, Range=f"bytes=-{FOOTER_PROBE_SIZE}")
+        tail = obj['Body'].read()
+        size = int(obj['ContentRange'].split('/')[-1])
+        if tail[-4:] != b'PAR1':
+            raise ValueError(f"Not a Parquet file: {key}")
+
+        footer_len = struct.unpack('<I', tail[-8:-4])[0] + 8
+        if footer_len > len(tail):
+            tail = self.read_range(key, size - footer_len, size - len(tail) - 1) + tail
+        else:
+            with self._stats_lock:
+                self.stats['bytes_downloaded'] += len(tail)
+        return tail[-footer_len:], size
+
+    def read_metadata(self, key):
+        """pyarrow FileMetaData (row counts, row groups, column stats) from the footer"""
+        # The reader only needs the trailing footer, so the tail alone is a valid source
+        return pq.read_metadata(io.BytesIO(self.read_footer(key)[0]))
+
+    def read_schema(self, key):
+        """Polars schema of a Parquet object from its footer"""
+        return pl.read_parquet_schema(io.BytesIO(self.read_footer(key)[0]))
@@ -0,0 +1,210 @@
+"""
+Schema Alignment - incremental (API staging) → base fact table schema
+Rules are declarative (schema_alignment: in etl_config.yaml):
+  rename    incremental → base column names
+  drop      staging-only columns
+  datetime  target time unit / zone for every Datetime column
+  derived   base columns computed from the increment (cast, row_hash, feature flags,
+            NULL placeholders)
+
+Rules are checked against Parquet footers only (S3Transfer.read_schema or
+scan_parquet + collect_schema, no row data), then compiled into ONE select over the increment: every base
+column is a single expression, so alignment is one pass over the data.
+"""
+
+import re
+
+import polars as pl
+
+from feature_flags import FLAGS, flag_expr
+from row_hash import row_hash_expr
+
+
+# Same behaviour as the original hand-written alignment in merge_pipeline.py
+DEFAULT_RULES = {
+    'rename': {'SIC': 'sic', 'section_item': 'section_name'},
+    'drop': ['sentence_index'],
+    'datetime': {'time_unit': 'us', 'time_zone': 'UTC'},
+    'derived': {
+        'cik_int': {'cast': 'cik', 'dtype': 'Int32'},
+        'row_hash': {'rule': 'row_hash'},
+        'has_numbers': {'rule': 'feature_flag'},
+        'has_comparison': {'rule': 'feature_flag'},
+        'likely_kpi': {'rule': 'feature_flag'},
+        'tickers': {'dtype': 'List[String]'},
+    },
+}
+
+
+def parse_dtype(name):
+    """'Int32' / 'Boolean' / 'List[String]' → Polars dtype"""
+    match = re.fullmatch(r'List\[(.+)\]', name.strip())
+    if match:
+        return pl.List(parse_dtype(match.group(1)))
+    dtype = getattr(pl, name.strip(), None)
+    if dtype is None:
+        raise ValueError(f"Unknown dtype in schema_alignment: {name}")
+    return dtype
+
+
+def footer_schema(uri, storage_options=None):
+    """Schema from the Parquet footer (no row groups are read)"""
+    return pl.scan_parquet(uri, storage_options=storage_options).collect_schema()
+
+
+class SchemaAlignment:
+    """Compiled alignment rules; build once per run, apply to any increment"""
+
+    def __init__(self, rules=None, row_hash_backend='auto'):
+        rules = rules or DEFAULT_RULES
+        self.rename = dict(rules.get('rename') or {})
+        self.drop = set(rules.get('drop') or [])
+        dt = rules.get('datetime') or {}
+        self.time_unit = dt.get('time_unit', 'us')
+        self.time_zone = dt.get('time_zone', 'UTC')
+        self.derived = dict(rules.get('derived') or {})
+        self.row_hash_backend = row_hash_backend
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config.schema_alignment, row_hash_backend=config.row_hash_backend)
+
+    @property
+    def derived_columns(self):
+        """Columns allowed to be missing on one side (computed, or dropped)"""
+        return set(self.derived) | self.drop
+
+    # ------------------------------------------------------------------------
+    # Resolution
+    # ------------------------------------------------------------------------
+    def source_for(self, column, incr_columns):
+        """Incremental column feeding base column (a rename wins over a same-named column)"""
+        for src, dst in self.rename.items():
+            if dst == column and src in incr_columns:
+                return src
+        if column in incr_columns and column not in self.drop and column not in self.rename:
+            return column
+        return None
+
+    def _datetime_expr(self, expr, src_dtype, target):
+        unit = getattr(target, 'time_unit', None) or self.time_unit
+        zone = target.time_zone if isinstance(target, pl.Datetime) else self.time_zone
+        if src_dtype.time_unit != unit:
+            expr = expr.dt.cast_time_unit(unit)
+        if src_dtype.time_zone != zone:
+            if src_dtype.time_zone is None or zone is None:
+                expr = expr.dt.replace_time_zone(zone)
+            else:
+                expr = expr.dt.convert_time_zone(zone)
+        return expr
+
+    def _derived_expr(self, name, rule, incr_columns):
+        """(expression, missing source columns) for one derived column"""
+        if rule.get('rule') == 'row_hash':
+            id_col = self.source_for('sentenceID', incr_columns)
+            text_col = self.source_for('sentence', incr_columns)
+            missing = [c for c, s in (('sentenceID', id_col), ('sentence', text_col)) if s is None]
+            if missing:
+                return None, missing
+            return row_hash_expr(id_col, text_col, backend=self.row_hash_backend).alias(name), []
+        if rule.get('rule') == 'feature_flag':
+            # Section D flag of 31_run_stratified.sql (see feature_flags.FLAGS). One regex per
+            # flag on purpose: the merge derives only a few flags, and flag_matcher's mask
+            # always evaluates all of them - on 1M sentences the 3 configured flags take 0.9s
+            # this way vs 2.5s for a single mask (7.0s when the select computes it per column)
+            needs = ['report_year'] if 'min_year' in FLAGS[name] else ['sentence']
+            sources = {c: self.source_for(c, incr_columns) for c in needs}
+            missing = [c for c, src in sources.items() if src is None]
+            if missing:
+                return None, missing
+            return flag_expr(name, text_col=sources.get('sentence'), year_col=sources.get('report_year')), []
+        if 'rule' in rule:
+            raise ValueError(f"Unknown derived rule for {name}: {rule['rule']}")
+
+        dtype = parse_dtype(rule['dtype'])
+        if 'cast' in rule:
+            src = self.source_for(rule['cast'], incr_columns)
+            if src is None:
+                return None, [rule['cast']]
+            return pl.col(src).cast(dtype).alias(name), []
+        # Placeholder (computed downstream)
+        return pl.lit(None).cast(dtype).alias(name), []
+
+    # ------------------------------------------------------------------------
+    # Validation + compilation
+    # ------------------------------------------------------------------------
+    def plan(self, base_schema, incr_schema):
+        """
+        Resolve every base column. base_schema is a Schema / dict, or just the
+        column names (dtype checks are then skipped). Returns (exprs, report).
+        """
+        base_types = dict(base_schema) if hasattr(base_schema, 'items') else dict.fromkeys(base_schema)
+        incr_types = dict(incr_schema)
+        report = {'renamed': [], 'derived': [], 'datetime': [], 'missing': [],
+                  'type_mismatch': [], 'unmapped': []}
+        exprs = []
+
+        for column, base_dtype in base_types.items():
+            if column in self.derived:
+                expr, missing = self._derived_expr(column, self.derived[column], incr_types)
+                if missing:
+                    report['missing'].append(f"{column} (needs {', '.join(missing)})")
+                    continue
+                exprs.append(expr)
+                report['derived'].append(column)
+                continue
+
+            src = self.source_for(column, incr_types)
+            if src is None:
+                report['missing'].append(column)
+                continue
+
+            src_dtype, expr = incr_types[src], pl.col(src)
+            if src != column:
+                report['renamed'].append(f"{src} → {column}")
+            if isinstance(src_dtype, pl.Datetime):
+                if base_dtype is not None and not isinstance(base_dtype, pl.Datetime):
+                    report['type_mismatch'].append(f"{column}: {src_dtype} vs {base_dtype}")
+                    continue
+                aligned = self._datetime_expr(expr, src_dtype, base_dtype)
+                if aligned is not expr:
+                    report['datetime'].append(column)
+                expr = aligned
+            elif base_dtype is not None and src_dtype != base_dtype:
+                report['type_mismatch'].append(f"{column}: {src_dtype} vs {base_dtype}")
+                continue
+            exprs.append(expr.alias(column))
+
+        used = {self.source_for(c, incr_types) for c in base_types}
+        report['unmapped'] = [c for c in incr_types if c not in used and c not in self.drop]
+        return exprs, report
+
+    def validate(self, base_schema, incr_schema):
+        """Raise ValueError if the increment cannot be aligned to the base; returns the report"""
+        _, report = self.plan(base_schema, incr_schema)
+        _raise_on_problems(report)
+        return report
+
+    def apply(self, incr_lf, base_schema):
+        """incr_lf projected onto the base schema (one lazy select) + the report"""
+        exprs, report = self.plan(base_schema, incr_lf.collect_schema())
+        _raise_on_problems(report)
+        return incr_lf.select(exprs), report
+
+
+def _raise_on_problems(report):
+    problems = [f"missing: {c}" for c in report['missing']]
+    problems += [f"type mismatch: {c}" for c in report['type_mismatch']]
+    if problems:
+        raise ValueError("Schema alignment failed - " + "; ".join(problems))
+
+
+def print_report(report):
+    for item in report['renamed']:
+        print(f"  Mapping: {item}")
+    if report['unmapped']:
+        print(f"  Dropping: {', '.join(report['unmapped'])} (not in base schema)")
+    if report['datetime']:
+        print(f"  Normalizing datetime: {', '.join(report['datetime'])}")
+    if report['derived']:
+        print(f"  Derived: {', '.join(report['derived'])}")
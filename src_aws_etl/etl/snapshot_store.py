@@ -0,0 +1,122 @@
+"""
+Snapshot Store - immutable, content-addressed final fact table versions
+Layout (output.archive.mode: snapshot):
+  <final.path>/_snapshots/finrag_fact_sentences-<sha256[:16]>.parquet   (never rewritten)
+  <final.path>/_current.json                                            (pointer, written last)
+
+Publishing uploads the new file once and flips the pointer. The previous
+snapshot is not copied anywhere - it simply stays referenced from the
+pointer's history, which doubles as the backup index. Retention trims that
+history to max_backups and removes dropped snapshots with one batched
+delete_objects, so no prefix listing is ever needed.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from s3_transfer import S3Transfer
+
+
+HASH_BLOCK = 8 * 1024 * 1024
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class SnapshotStore:
+    """Publishes final-table snapshots and maintains the _current.json pointer"""
+
+    POINTER_FILE = '_current.json'
+    SNAPSHOT_DIR = '_snapshots'
+
+    def __init__(self, config, s3, transfer=None):
+        self.config = config
+        self.s3 = s3
+        self.transfer = transfer or S3Transfer.from_config(config, s3)
+        self.pointer_key = f"{config.final_dir}/{self.POINTER_FILE}"
+
+        # Tracking for logs
+        self.stats = {'snapshot_reused': False, 'snapshots_deleted': 0}
+
+    def snapshot_key(self, sha256):
+        stem = os.path.splitext(os.path.basename(self.config.final_path))[0]
+        return f"{self.config.final_dir}/{self.SNAPSHOT_DIR}/{stem}-{sha256[:16]}.parquet"
+
+    # ------------------------------------------------------------------------
+    # Pointer
+    # ------------------------------------------------------------------------
+    def load_pointer(self):
+        """Return the pointer dict, or None before the first snapshot"""
+        try:
+            obj = self.s3.get_object(Bucket=self.config.bucket, Key=self.pointer_key)
+            return json.loads(obj['Body'].read().decode('utf-8'))
+        except self.s3.exceptions.NoSuchKey:
+            return None
+
+    def current(self):
+        """Manifest entry of the live snapshot (None if nothing published yet)"""
+        pointer = self.load_pointer()
+        return pointer['current'] if pointer else None
+
+    def _exists(self, key):
+        try:
+            self.s3.head_object(Bucket=self.config.bucket, Key=key)
+            return True
+        except self.s3.exceptions.ClientError:
+            return False
+
+    # ------------------------------------------------------------------------
+    # Publish + retention
+    # ------------------------------------------------------------------------
+    def publish(self, path, rows=None):
+        """Upload a local Parquet file as a snapshot and make it current"""
+        sha256 = sha256_file(path)
+        key = self.snapshot_key(sha256)
+
+        # Identical content is already stored under the same key - skip the upload
+        if self._exists(key):
+            self.stats['snapshot_reused'] = True
+            print(f"  ✓ Identical snapshot already stored: {key.split('/')[-1]}")
+        else:
+            self.transfer.upload_file(path, key)
+
+        entry = {
+            'key': key,
+            'sha256': sha256,
+            'rows': rows,
+            'size_bytes': os.path.getsize(path),
+            'published_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+        pointer = self.load_pointer() or {'current': None, 'history': []}
+        history = pointer['history']
+        if pointer['current'] is not None and pointer['current']['key'] != key:
+            history = [pointer['current']] + history
+        history = [h for h in history if h['key'] != key]
+
+        kept = history[:self.config.max_backups]
+        dropped = history[self.config.max_backups:]
+
+        # Commit point: readers switch to the new snapshot here
+        self.s3.put_object(
+            Bucket=self.config.bucket,
+            Key=self.pointer_key,
+            Body=json.dumps({'current': entry, 'history': kept}, indent=1).encode('utf-8')
+        )
+
+        live = {key} | {h['key'] for h in kept}
+        stale = sorted({h['key'] for h in dropped} - live)
+        if stale:
+            self.transfer.delete_keys(stale)
+            self.stats['snapshots_deleted'] += len(stale)
+            for k in stale:
+                print(f"    Deleted: {k.split('/')[-1]}")
+
+        return entry
@@ -0,0 +1,149 @@
+"""
+Table Stats - persisted statistics for the single-file final fact table
+Stored next to the table as <final.path>/_table_stats.json:
+  rows, source_etag      - identity of the object the stats describe
+  years                  - rows per report_year
+  companies              - rows per company name
+  groups                 - per (report_year, cik_int): rows, key_min, key_max
+                           (a sorted key index at filing granularity)
+
+With stats that match the base object, step 6 only looks at the increment
+and at base rows in the groups whose key range the increment can touch.
+Every other group is unchanged since the last validated write.
+"""
+
+import bisect
+import json
+
+import polars as pl
+
+
+NULL_KEY = '<null>'
+
+
+def _key(value):
+    return NULL_KEY if value is None else str(value)
+
+
+def _group_key(year, cik):
+    return f"{_key(year)}/{_key(cik)}"
+
+
+class TableStats:
+    """Row/year/company/key-range stats, updated by deltas instead of rescans"""
+
+    STATS_FILE = '_table_stats.json'
+
+    def __init__(self, rows=0, years=None, companies=None, groups=None, source_etag=None):
+        self.rows = rows
+        self.years = years or {}
+        self.companies = companies or {}
+        self.groups = groups or {}
+        self.source_etag = source_etag
+
+    # ------------------------------------------------------------------------
+    # Build / persist
+    # ------------------------------------------------------------------------
+    @classmethod
+    def from_frame(cls, frame):
+        """Full build from a DataFrame or LazyFrame (bootstrap / fallback only)"""
+        stats = cls()
+        stats.apply(added=frame)
+        return stats
+
+    @classmethod
+    def stats_key(cls, config):
+        return f"{config.final_dir}/{cls.STATS_FILE}"
+
+    @classmethod
+    def load(cls, config, s3):
+        try:
+            obj = s3.get_object(Bucket=config.bucket, Key=cls.stats_key(config))
+            return cls(**json.loads(obj['Body'].read().decode('utf-8')))
+        except s3.exceptions.NoSuchKey:
+            return None
+
+    def save(self, config, s3, source_etag):
+        self.source_etag = source_etag
+        body = {
+            'rows': self.rows,
+            'years': self.years,
+            'companies': self.companies,
+            'groups': self.groups,
+            'source_etag': self.source_etag,
+        }
+        s3.put_object(
+            Bucket=config.bucket,
+            Key=self.stats_key(config),
+            Body=json.dumps(body).encode('utf-8')
+        )
+
+    # ------------------------------------------------------------------------
+    # Delta maintenance
+    # ------------------------------------------------------------------------
+    def candidate_groups(self, incr_df):
+        """
+        (report_year, cik_int) pairs whose stored rows an increment can replace:
+        the groups it lands in plus any group whose key range covers one of its keys
+        """
+        keys = sorted(k for k in incr_df['sentenceID'].to_list() if k is not None)
+        years, ciks = set(), set()
+
+        for year, cik in incr_df.select('report_year', 'cik_int').unique().iter_rows():
+            years.add(year)
+            ciks.add(cik)
+
+        for gkey, g in self.groups.items():
+            i = bisect.bisect_left(keys, g['key_min'])
+            if i < len(keys) and keys[i] <= g['key_max']:
+                year, cik = gkey.split('/')
+                years.add(None if year == NULL_KEY else int(year))
+                ciks.add(None if cik == NULL_KEY else int(cik))
+
+        return years, ciks
+
+    def apply(self, added=None, removed=None):
+        """Add / subtract row counts for the given frames (needs report_year, cik_int, name, sentenceID)"""
+        for frame, sign in ((added, 1), (removed, -1)):
+            if frame is None:
+                continue
+            lf = frame.lazy()
+            per_group = lf.group_by('report_year', 'cik_int').agg(
+                pl.len().alias('rows'),
+                pl.col('sentenceID').min().alias('key_min'),
+                pl.col('sentenceID').max().alias('key_max'),
+            ).collect()
+            per_company = lf.group_by('name').agg(pl.len().alias('rows')).collect()
+
+            for year, cik, rows, key_min, key_max in per_group.iter_rows():
+                gkey = _group_key(year, cik)
+                g = self.groups.setdefault(gkey, {'rows': 0, 'key_min': key_min, 'key_max': key_max})
+                g['rows'] += sign * rows
+                if sign > 0:
+                    # Removals never shrink a range - it stays a conservative bound
+                    g['key_min'] = min(g['key_min'], key_min)
+                    g['key_max'] = max(g['key_max'], key_max)
+                self.years[_key(year)] = self.years.get(_key(year), 0) + sign * rows
+                self.rows += sign * rows
+
+            for name, rows in per_company.iter_rows():
+                self.companies[_key(name)] = self.companies.get(_key(name), 0) + sign * rows
+
+        self._drop_empty()
+
+    def _drop_empty(self):
+        self.groups = {k: g for k, g in self.groups.items() if g['rows'] > 0}
+        self.years = {k: n for k, n in self.years.items() if n > 0}
+        self.companies = {k: n for k, n in self.companies.items() if n > 0}
+
+    # ------------------------------------------------------------------------
+    # Summary (what step 6 reports)
+    # ------------------------------------------------------------------------
+    def summary(self):
+        years = [int(y) for y in self.years if y != NULL_KEY]
+        return {
+            'rows': self.rows,
+            'companies': len(self.companies),
+            'year_min': min(years) if years else 0,
+            'year_max': max(years) if years else 0,
+        }
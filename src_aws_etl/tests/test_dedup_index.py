@@ -0,0 +1,120 @@
+"""
+Dedup Index - exact / near-duplicate marks within a company, built incrementally
+Pipeline runs use moto's in-process S3 mock (no AWS credentials needed).
+
+python -m pytest src_aws_etl/tests/test_dedup_index.py -q
+"""
+
+import sys
+from pathlib import Path
+
+import polars as pl
+import pytest
+from moto import mock_aws
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent))
+from config_loader import ETLConfig
+from dedup_index import DedupIndex
+from merge_pipeline import MergePipeline
+from s3_client import build_s3_client
+from test_streaming_merge import make_base, make_incremental
+
+SETTINGS = ETLConfig().dedup
+
+RISK = "We face risks from competition, regulation and cyber attacks on our systems."
+
+
+def frame(rows):
+    """(sentenceID, cik_int, report_year, sentence) tuples → index input rows"""
+    return pl.DataFrame(rows, schema=['sentenceID', 'cik_int', 'report_year', 'sentence'], orient='row').with_columns(
+        pl.col('cik_int').cast(pl.Int32),
+        pl.col('report_year').cast(pl.Int32),
+        pl.lit('ITEM_1A').alias('section_name'),
+    )
+
+
+ROWS = [
+    ('a19', 1, 2019, RISK),
+    ('a20', 1, 2020, "We face RISKS from competition; regulation and cyber-attacks on our systems!"),
+    ('a21', 1, 2021, "We face risks from competition, regulation and cyber attacks on all of our systems."),
+    ('a22', 1, 2022, "Revenue grew 5% compared to the prior year."),
+    ('b20', 2, 2020, RISK),
+    ('a18', 1, 2018, None),
+]
+
+
+def marks(index):
+    return {r['sentenceID']: (r['canonical_id'], r['dup_kind']) for r in index.frame.iter_rows(named=True)}
+
+
+def test_exact_near_and_company_scope():
+    index = DedupIndex(SETTINGS)
+    index.add(frame(ROWS))
+    assert marks(index.classify()) == {
+        'a19': ('a19', None),
+        'a20': ('a19', 'exact'),    # same text after lowercasing / punctuation
+        'a21': ('a19', 'near'),     # two extra words
+        'a22': ('a22', None),
+        'b20': ('b20', None),       # same text, different company
+        'a18': ('a18', None),       # NULL sentence is never a duplicate
+    }
+    report = index.report().filter(pl.col('cik_int') == 1).row(0, named=True)
+    assert (report['rows'], report['exact'], report['near'], report['dup_ratio']) == (5, 1, 1, 0.4)
+
+
+def test_incremental_update_matches_full_build():
+    index = DedupIndex(SETTINGS)
+    index.add(frame(ROWS))
+    index.classify()
+    stored = DedupIndex(SETTINGS, index.frame)
+
+    # The canonical sentence is rewritten: its duplicates must move to the next earliest
+    update = frame([('a19', 1, 2019, "Completely different wording about liquidity."),
+                    ('a23', 1, 2023, RISK)])
+    stored.add(update)
+    assert stored.touched == {1}
+    stored.classify()
+
+    full = DedupIndex(SETTINGS)
+    full.add(pl.concat([frame(ROWS).filter(pl.col('sentenceID') != 'a19'), update]))
+    full.classify()
+    assert marks(stored) == marks(full)
+    assert marks(stored)['a23'] == ('a20', 'exact')
+
+
+def test_invalid_settings_rejected():
+    with pytest.raises(ValueError, match='bands'):
+        DedupIndex(dict(SETTINGS, num_perm=30, bands=8))
+
+
+def test_pipeline_builds_then_updates_index(tmp_path):
+    with mock_aws():
+        config = ETLConfig()
+        config.cfg['dedup'] = dict(SETTINGS, enabled=True)    # off by default
+        s3 = build_s3_client(config)
+        s3.create_bucket(Bucket=config.bucket)
+        base = make_base(200).with_columns(
+            pl.when(pl.col('report_year') == 2019).then(pl.lit(RISK)).otherwise('sentence').alias('sentence')
+        )
+        base.write_parquet(tmp_path / 'base.parquet')
+        s3.upload_file(str(tmp_path / 'base.parquet'), config.bucket, config.hist_path)
+
+        runs = []
+        for ids in (['new_1'], ['doc0_s0', 'new_2']):
+            make_incremental(ids).write_parquet(tmp_path / 'incr.parquet')
+            s3.upload_file(str(tmp_path / 'incr.parquet'), config.bucket, config.incr_path)
+            pipeline = MergePipeline(config, s3)
+            assert pipeline.run()
+            runs.append(pipeline)
+
+        bootstrap, update = runs
+        assert bootstrap.stats['dedup_rows'] == 201
+        # 40 rows of 2019 share one text across 7 companies → 40 - 7 exact duplicates
+        assert bootstrap.stats['dedup_exact'] == 33
+        assert update.stats['dedup_rows'] == 202
+
+        final_etag = s3.head_object(Bucket=config.bucket, Key=config.final_path)['ETag']
+        stored = DedupIndex.load(SETTINGS, update.transfer, config.final_dir, final_etag)
+        assert stored is not None and len(stored.frame) == 202
+        assert DedupIndex.load(SETTINGS, update.transfer, config.final_dir, '"stale"') is None
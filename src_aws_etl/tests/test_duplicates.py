@@ -2,10 +2,8 @@
 Duplicate Checker - Quick analysis of Historical and Incremental files
 """
 
-import os
 import sys
 from pathlib import Path
-from dotenv import load_dotenv
 import polars as pl
 
 # Add project root
@@ -14,6 +12,7 @@ sys.path.append(str(project_root))
 
 sys.path.append(str(Path(__file__).parent.parent / 'etl'))
 from config_loader import ETLConfig
+from s3_client import polars_storage_options
 
 
 def check_duplicates():
@@ -21,13 +20,8 @@ def check_duplicates():
     
     config = ETLConfig()
     
-    # Load credentials
-    secrets_path = Path(__file__).parent.parent / '.aws_secrets' / 'aws_credentials.env'
-    load_dotenv(secrets_path)
-    
-    storage_options = {
-        'aws_region': os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
-    }
+    # Load credentials (same region / endpoint as the ETL client)
+    storage_options = polars_storage_options(config)
     
     print("=" * 70)
     print("DUPLICATE ANALYSIS")
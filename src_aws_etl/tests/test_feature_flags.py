@@ -0,0 +1,111 @@
+"""
+Feature Flags - Polars engine parity with SECTION D of 31_run_stratified.sql
+The UPDATE statements are read from the SQL file itself and run in DuckDB.
+
+python -m pytest src_aws_etl/tests/test_feature_flags.py -q
+"""
+
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+from feature_flags import FLAGS, SCORE_COLUMN, add_feature_flags, duckdb_update_sql
+
+duckdb = pytest.importorskip('duckdb')
+
+SQL_FILE = Path(__file__).parent.parent.parent / 'duckdb-finsight-data' / 'sql' / '31_run_stratified.sql'
+TABLE = 'sample_1m_finrag'
+
+EDGE_CASES = [
+    "Revenue increased 12% compared to the prior year.",
+    "Net income was $4,512.3 million, up 3 bps y/y versus 2019.",
+    "We expect guidance to remain unchanged; actual results may differ.",
+    "This report contains forward-looking statements under the safe harbor provisions.",
+    "Risks include volatility, exposure to FX, and regulatory scrutiny.",
+    "REVENUES grew (no word boundary after revenue)",
+    "Café revenue rose",              # non-ASCII letter next to a keyword
+    "xérisk and risqué",              # \b is ASCII in RE2: é is not a word char
+    "Total     assets",               # run of spaces → table-like
+    "1 2 3 4 5 6 7 8",                # digit run → table-like
+    "12 million",                 # NBSP is not RE2 \s
+    "٣٤ million in Arabic digits",    # not RE2 \d
+    "vs. last year; Q/Q change",
+    "material adverse effect",
+    "KPI: EPS, ROE and ROA",
+    "1,234,567",
+    "$5",
+    "plain text with nothing in it",
+    "",
+    "x" * 1001,
+    None,
+]
+
+WORDS = ['revenue', 'Revenues', 'cost', 'EPS', 'increase', 'prior', 'vs.', 'growth', 'decline', 'plans',
+         'outlook', 'targeted', 'risk', 'risks', 'uncertainty', 'key', 'material', 'safe harbor', '$12',
+         '1,200', '3.5%', '45 million', '(12.5) billion', '2021', '1987', '\t', '  ', 'é', 'x', 'and', '7']
+
+
+def sql_section_d():
+    """The Section D UPDATE statements exactly as written in the SQL file"""
+    text = SQL_FILE.read_text()
+    section = text[text.index('SECTION D: FEATURE ENGINEERING (Derived'):text.index('EXPORT TO PARQUET')]
+    return [m.group(0) for m in re.finditer(rf'UPDATE {TABLE}\s+SET.*?;', section, re.S)]
+
+
+def corpus(n=3000, seed=0):
+    rng = np.random.default_rng(seed)
+    random_rows = [' '.join(rng.choice(WORDS, rng.integers(1, 12))) for _ in range(n)]
+    sentences = EDGE_CASES + random_rows
+    return pl.DataFrame({
+        'sentence': sentences,
+        'report_year': rng.integers(2012, 2024, len(sentences)).astype(np.int32),
+    })
+
+
+def run_duckdb(frame, statements):
+    con = duckdb.connect()
+    con.register('src', frame.to_arrow())
+    columns = ', '.join(f"CAST(NULL AS BOOLEAN) AS {f}" for f in FLAGS)
+    con.execute(f"""
+        CREATE TABLE {TABLE} AS
+        SELECT row_number() OVER () AS rid, sentence, report_year, LENGTH(sentence) AS char_count,
+               {columns}, CAST(NULL AS INTEGER) AS {SCORE_COLUMN}
+        FROM src
+    """)
+    for statement in statements:
+        con.execute(statement)
+    return con.sql(f"SELECT * FROM {TABLE} ORDER BY rid").pl().select(*FLAGS, SCORE_COLUMN)
+
+
+def test_sql_file_has_flag_and_score_updates():
+    statements = sql_section_d()
+    assert len(statements) == 2
+    assert all(f"{f} =" in statements[0] for f in FLAGS)
+    assert f"{SCORE_COLUMN} =" in statements[1]
+
+
+@pytest.mark.parametrize('source', ['sql_file', 'generated'])
+def test_polars_flags_match_duckdb(source):
+    frame = corpus()
+    statements = sql_section_d() if source == 'sql_file' else duckdb_update_sql(TABLE)
+    expected = run_duckdb(frame, statements)
+    got = add_feature_flags(frame).select(*FLAGS, SCORE_COLUMN).with_columns(pl.col(SCORE_COLUMN).cast(pl.Int32))
+
+    for column in expected.columns:
+        mismatch = frame.with_columns(want=expected[column], got=got[column]).filter(
+            pl.col('want').ne_missing(pl.col('got'))
+        )
+        assert mismatch.is_empty(), f"{column}:\n{mismatch.head(5)}"
+
+
+def test_lazy_frame_and_custom_columns():
+    frame = pl.LazyFrame({'text': ["Revenue grew 5% year-over-year", None], 'yr': [2019, 2010]})
+    out = add_feature_flags(frame, text_col='text', year_col='yr').collect()
+    assert out['likely_kpi'].to_list() == [True, None]
+    assert out['is_recent'].to_list() == [True, False]
+    assert out[SCORE_COLUMN].to_list() == [3 + 2 + 2 + 1, None]
@@ -0,0 +1,67 @@
+"""
+Flag Matcher - bitmask parity with feature_flags and SECTION D of 31_run_stratified.sql
+Python API, Polars expression and the DuckDB UDF must flag the same rows.
+
+python -m pytest src_aws_etl/tests/test_flag_matcher.py -q
+"""
+
+import sys
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent))
+from feature_flags import flag_exprs
+from flag_matcher import BITS, TEXT_FLAGS, decode, flags_from_mask, mask_expr, mask_sql, match_mask, register_duckdb
+from test_feature_flags import TABLE, corpus, run_duckdb, sql_section_d
+
+duckdb = pytest.importorskip('duckdb')
+
+FOLD_CASES = [
+    "RISK in Kelvin: risK, Key",     # Kelvin sign folds to k in RE2 but is not a \b word char
+    "riſk and ſales",                 # long s folds to s
+    "costİ and İncome",               # İ lowercases to i + U+0307
+    "Revenue grew; Kelvin",
+]
+
+
+def matcher_corpus():
+    frame = corpus()
+    return pl.concat([frame, pl.DataFrame({'sentence': FOLD_CASES, 'report_year': [2020] * len(FOLD_CASES)},
+                                          schema=frame.schema)])
+
+
+def assert_same(frame, expected, got):
+    for column in TEXT_FLAGS:
+        mismatch = frame.with_columns(want=expected[column], got=got[column]).filter(
+            pl.col('want').ne_missing(pl.col('got'))
+        )
+        assert mismatch.is_empty(), f"{column}:\n{mismatch.head(5)}"
+
+
+def test_mask_matches_polars_flags():
+    frame = matcher_corpus()
+    expected = frame.select(flag_exprs(TEXT_FLAGS))
+    got = frame.select(mask_expr()).select(flags_from_mask())
+    assert_same(frame, expected, got)
+
+
+def test_duckdb_udf_matches_section_d():
+    frame = matcher_corpus()
+    expected = run_duckdb(frame, sql_section_d())
+
+    con = register_duckdb(duckdb.connect())
+    con.register('src', frame.to_arrow())
+    flags = ', '.join(f"{mask_sql(f)} AS {f}" for f in TEXT_FLAGS)
+    got = con.sql(f"SELECT {flags} FROM (SELECT flag_mask(sentence) AS flag_mask FROM src)").pl()
+    assert_same(frame, expected, got)
+
+
+def test_python_api():
+    mask = match_mask(pl.Series('s', ["Revenue increased 5% compared to 2019.", None, "nothing"]))
+    assert mask.dtype == pl.UInt16 and mask.name == 's'
+    assert decode(mask[0]) == ['likely_kpi', 'has_numbers', 'has_comparison', 'mentions_years']
+    assert mask[1] is None and mask[2] == 0
+    assert len(set(BITS.values())) == len(TEXT_FLAGS) == 9
@@ -0,0 +1,76 @@
+"""
+Stage Instrumentation - per-step records, S3 byte deltas, run log + Chrome trace
+Runs against moto's in-process S3 mock (no AWS credentials needed).
+
+python -m pytest src_aws_etl/tests/test_instrumentation.py -q
+"""
+
+import json
+import sys
+from pathlib import Path
+
+from moto import mock_aws
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent))
+from config_loader import ETLConfig
+from instrumentation import Profiler
+from merge_pipeline import MergePipeline
+from run_log import RunLog, stage_history
+from s3_client import build_s3_client, call_stats
+from test_streaming_merge import make_base, make_incremental
+
+
+def test_stage_records_time_memory_and_s3_bytes():
+    with mock_aws():
+        s3 = build_s3_client()
+        s3.create_bucket(Bucket='profiler-test')
+        profiler = Profiler(call_stats(s3))
+
+        with profiler.stage('upload') as st:
+            s3.put_object(Bucket='profiler-test', Key='k', Body=b'x' * 1000)
+            st.rows_out = 7
+        profiler.step('download')
+        s3.get_object(Bucket='profiler-test', Key='k')['Body'].read()
+        profiler.end_step()
+
+    upload, download = profiler.records
+    assert upload['name'] == 'upload' and upload['rows_out'] == 7
+    assert upload['s3_calls'] == 1 and upload['s3_bytes_out'] == 1000
+    assert download['s3_bytes_in'] == 1000 and download['s3_bytes_out'] == 0
+    assert upload['wall_sec'] >= 0 and upload['peak_rss_mb'] > 0
+
+
+def test_pipeline_stages_reach_stats_run_log_and_trace(tmp_path):
+    with mock_aws():
+        config = ETLConfig()
+        config.cfg['profiling'] = {'chrome_trace_dir': str(tmp_path / 'traces')}
+        config.cfg['dedup'] = dict(config.cfg.get('dedup') or {}, enabled=True)   # off by default
+        s3 = build_s3_client(config)
+        s3.create_bucket(Bucket=config.bucket)
+
+        base_path, incr_path = tmp_path / 'base.parquet', tmp_path / 'incr.parquet'
+        make_base(200).write_parquet(base_path)
+        make_incremental(['doc0_s0', 'new_1']).write_parquet(incr_path)
+        s3.upload_file(str(base_path), config.bucket, config.hist_path)
+        s3.upload_file(str(incr_path), config.bucket, config.incr_path)
+
+        pipeline = MergePipeline(config, s3)
+        assert pipeline.run()
+        history = RunLog(config, s3).load_history()
+
+    names = [r['name'] for r in pipeline.stats['stages']]
+    assert names == ['STEP 1: PRE-FLIGHT CHECKS', 'STEP 2: DETERMINE MERGE INPUTS', 'STEP 3: LOAD DATA',
+                     'STEP 4: TRANSFORM INCREMENTAL', 'STEP 5: MERGE', 'STEP 6: VALIDATE', 'STEP 6b: DEDUP INDEX',
+                     'STEP 7: WRITE OUTPUT']
+    by_name = {r['name']: r for r in pipeline.stats['stages']}
+    assert by_name['STEP 3: LOAD DATA']['s3_bytes_in'] > 0
+    assert by_name['STEP 5: MERGE']['rows_out'] == 201
+    assert by_name['STEP 7: WRITE OUTPUT']['s3_bytes_out'] > 0
+
+    stages = stage_history(history)
+    assert stages['name'].to_list() == names
+
+    trace = json.loads((tmp_path / 'traces' / f"merge_{pipeline.run_id}.json").read_text())
+    spans = [e['name'] for e in trace['traceEvents'] if e['ph'] == 'X']
+    assert spans == names    # the trace and the run log list the same stages
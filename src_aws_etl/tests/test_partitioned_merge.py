@@ -0,0 +1,139 @@
+"""
+Partitioned Merge - only touched partitions are read/rewritten
+Runs against moto's in-process S3 mock (no AWS credentials needed).
+
+python -m pytest src_aws_etl/tests/test_partitioned_merge.py -q
+"""
+
+import sys
+from pathlib import Path
+
+import polars as pl
+import pytest
+from moto import mock_aws
+
+# Add project root
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+from config_loader import ETLConfig
+from partitioned_merge import PartitionedMerger
+from s3_client import build_s3_client
+
+
+def make_rows(ids, year, cik, text='orig'):
+    n = len(ids)
+    return pl.DataFrame({
+        'sentenceID': ids,
+        'sentence': [f"{text} {i}" for i in ids],
+        'cik_int': [cik] * n,
+        'report_year': [year] * n,
+        'name': [f"Company {cik}"] * n,
+    }).with_columns(pl.col('cik_int').cast(pl.Int32), pl.col('report_year').cast(pl.Int32))
+
+
+@pytest.fixture
+def merger():
+    with mock_aws():
+        config = ETLConfig()
+        s3 = build_s3_client(config)
+        s3.create_bucket(Bucket=config.bucket)
+        yield PartitionedMerger(config, s3)
+
+
+def test_bootstrap_then_incremental_touches_one_partition(merger):
+    base = pl.concat([
+        make_rows([f"a{i}" for i in range(50)], 2018, 1),
+        make_rows([f"b{i}" for i in range(50)], 2019, 2),
+        make_rows([f"c{i}" for i in range(50)], 2020, 3),
+    ])
+    partitions = merger.bootstrap(base.lazy())
+    merger.save_manifest(partitions, base.columns)
+    assert len(partitions) == 3
+    assert merger.table_stats(partitions)['rows'] == 150
+
+    # New run: one updated key + one new key, both in (2019, cik 2)
+    merger.stats = {'partitions_read': 0, 'partitions_written': 0, 'bytes_written': 0}
+    manifest = merger.load_manifest()
+    partitions = manifest['partitions']
+    incr = make_rows(['b0', 'b_new'], 2019, 2, text='updated')
+
+    touched = merger.touched_partitions(incr)
+    written = merger.merge(incr, partitions)
+
+    assert touched == written == [merger.partition_key(2019, 2)]
+    assert merger.stats['partitions_read'] == 1
+    assert merger.stats['partitions_written'] == 1
+
+    part = merger.read_partition(written[0], partitions)
+    assert len(part) == 51
+    assert part.filter(pl.col('sentenceID') == 'b0')['sentence'].item() == 'updated b0'
+
+    stats = merger.table_stats(partitions)
+    assert stats['rows'] == 151
+    assert (stats['year_min'], stats['year_max']) == (2018, 2020)
+    assert stats['companies'] == 3
+
+
+def test_archive_keeps_max_backups(merger):
+    base = make_rows(['x1', 'x2'], 2020, 5)
+    partitions = merger.bootstrap(base.lazy())
+    pkey = merger.partition_key(2020, 5)
+
+    for _ in range(3):
+        merger.archive_partitions([pkey], partitions)
+
+    response = merger.s3.list_objects_v2(
+        Bucket=merger.config.bucket,
+        Prefix=f"{merger.config.archive_path}/partitions_",
+        Delimiter='/'
+    )
+    assert len(response.get('CommonPrefixes', [])) <= merger.config.max_backups
+
+
+def test_rewrite_leaves_live_file_until_manifest_commits(merger):
+    base = make_rows(['x1', 'x2'], 2020, 5)
+    partitions = merger.bootstrap(base.lazy())
+    merger.save_manifest(partitions, base.columns)
+    pkey = merger.partition_key(2020, 5)
+    old_key = partitions[pkey]['key']
+
+    # Next run: the rewrite goes to a new key, the committed manifest still reads the old one
+    merger = PartitionedMerger(merger.config, merger.s3)
+    partitions = merger.load_manifest()['partitions']
+    merger.merge(make_rows(['x3'], 2020, 5), partitions)
+    new_key = partitions[pkey]['key']
+    assert new_key != old_key
+    committed = merger.load_manifest()['partitions']
+    assert len(merger.read_partition(pkey, committed)) == 2
+
+    merger.save_manifest(partitions, base.columns)
+    merger.delete_superseded()
+    assert len(merger.read_partition(pkey, merger.load_manifest()['partitions'])) == 3
+    listing = merger.s3.list_objects_v2(Bucket=merger.config.bucket, Prefix=f"{merger.root}/{pkey}/")
+    assert [o['Key'] for o in listing['Contents']] == [new_key]
+
+
+def test_null_report_year_gets_its_own_partition(merger):
+    base = pl.concat([make_rows(['a1'], 2020, 1), make_rows(['n1', 'n2'], None, 1)])
+    partitions = merger.bootstrap(base.lazy())
+    null_key = merger.partition_key(None, 1)
+    assert null_key == 'year=__null__/cik_bucket=01'
+    assert partitions[null_key]['rows'] == 2
+
+    merger.merge(make_rows(['n3'], None, 1), partitions)
+    assert partitions[null_key]['rows'] == 3
+    assert merger.table_stats(partitions)['year_min'] == 2020
+
+
+def test_archive_with_zero_max_backups_keeps_none(merger):
+    merger.config.cfg['output']['archive']['retention']['max_backups'] = 0
+    partitions = merger.bootstrap(make_rows(['x1'], 2020, 5).lazy())
+    merger.archive_partitions([merger.partition_key(2020, 5)], partitions)
+
+    response = merger.s3.list_objects_v2(
+        Bucket=merger.config.bucket,
+        Prefix=f"{merger.config.archive_path}/partitions_",
+    )
+    assert response.get('KeyCount', 0) == 0
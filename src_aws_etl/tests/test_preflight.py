@@ -0,0 +1,81 @@
+"""
+Footer-only Preflight - schema, row counts, row-group stats and codecs from Parquet footers
+Runs against moto's in-process S3 mock (no AWS credentials needed).
+
+python -m pytest src_aws_etl/tests/test_preflight.py -q
+"""
+
+import sys
+from pathlib import Path
+
+import polars as pl
+import pytest
+from moto import mock_aws
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent))
+from config_loader import ETLConfig
+from preflight_check import PreflightChecker
+from s3_client import build_s3_client, call_stats
+from test_streaming_merge import make_base, make_incremental
+
+
+@pytest.fixture
+def env(tmp_path):
+    with mock_aws():
+        config = ETLConfig()
+        s3 = build_s3_client(config)
+        s3.create_bucket(Bucket=config.bucket)
+        base_path = tmp_path / 'base.parquet'
+        make_base(20_000).write_parquet(base_path, compression='uncompressed', row_group_size=5_000)
+        s3.upload_file(str(base_path), config.bucket, config.hist_path)
+
+        def put_incremental(df):
+            path = tmp_path / 'incr.parquet'
+            df.write_parquet(path)
+            s3.upload_file(str(path), config.bucket, config.incr_path)
+
+        yield config, s3, put_incremental
+
+
+def test_good_inputs_pass_from_footers_only(env):
+    config, s3, put_incremental = env
+    put_incremental(make_incremental(['a', 'b', 'c']))
+    stats = call_stats(s3)
+    stats.reset()
+
+    checker = PreflightChecker(config, s3)
+    assert checker.run_checks()
+
+    hist = checker.footers[config.hist_path]
+    assert hist.rows == 20_000 and hist.row_groups == 4
+    assert (hist.year_min, hist.year_max) == (2015, 2019)
+    assert hist.id_nulls == 0 and hist.codecs == {'UNCOMPRESSED'}
+    assert checker.footers[config.incr_path].year_min == 2021
+
+    ops = stats.snapshot()
+    hist_size = s3.head_object(Bucket=config.bucket, Key=config.hist_path)['ContentLength']
+    assert ops['GetObject']['calls'] == 3   # hist + incr + (missing) final
+    assert ops['GetObject']['bytes_in'] < hist_size / 4
+
+
+@pytest.mark.parametrize('incr, error', [
+    (make_incremental(['a', None]), 'NULL sentenceID'),
+    (make_incremental(['a']).drop('sentence'), 'missing: sentence'),
+    (make_incremental(['a']).clear(), 'no rows'),
+])
+def test_bad_incremental_fails_preflight(env, capsys, incr, error):
+    config, s3, put_incremental = env
+    put_incremental(incr)
+    assert not PreflightChecker(config, s3).run_checks()
+    assert error in capsys.readouterr().out
+
+
+def test_missing_and_non_parquet_inputs(env, capsys):
+    config, s3, _ = env
+    assert not PreflightChecker(config, s3).run_checks()
+    assert f"MISSING: {config.incr_path}" in capsys.readouterr().out
+
+    s3.put_object(Bucket=config.bucket, Key=config.incr_path, Body=b'sentenceID,sentence\na,b\n')
+    assert not PreflightChecker(config, s3).run_checks()
+    assert 'unreadable footer' in capsys.readouterr().out
@@ -0,0 +1,46 @@
+"""
+Row Hash Parity - every backend must match hashlib / DuckDB MD5 byte for byte
+
+python -m pytest src_aws_etl/tests/test_row_hash.py -q
+"""
+
+import hashlib
+import sys
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+from row_hash import POLARS_HASH_AVAILABLE, row_hash_expr
+
+
+ROWS = pl.DataFrame({
+    'sentenceID': ['1652044_10K_2019_0', '320193_10K_2020_7', 'x', None],
+    'sentence': ['Revenue grew 12% year-over-year.', 'Café — “smart quotes” ✓', '', 'orphan'],
+})
+
+BACKENDS = ['python', 'batched'] + (['native'] if POLARS_HASH_AVAILABLE else [])
+
+
+def expected():
+    out = []
+    for sid, text in ROWS.iter_rows():
+        out.append(None if sid is None or text is None else hashlib.md5((sid + text).encode()).hexdigest())
+    return out
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_backend_matches_hashlib(backend):
+    got = ROWS.select(row_hash_expr(backend=backend))['row_hash'].to_list()
+    assert got[:3] == expected()[:3]
+    assert got[3] is None
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_backend_matches_duckdb(backend):
+    duckdb = pytest.importorskip('duckdb')
+    frame = ROWS.head(3)
+    duck = duckdb.sql("SELECT MD5(sentenceID || sentence) AS row_hash FROM frame").pl()
+    got = frame.select(row_hash_expr(backend=backend))
+    assert got['row_hash'].to_list() == duck['row_hash'].to_list()
@@ -0,0 +1,108 @@
+"""
+Run Log - append-only objects, compaction and history queries
+Runs against moto's in-process S3 mock (no AWS credentials needed).
+
+python -m pytest src_aws_etl/tests/test_run_log.py -q
+"""
+
+import sys
+from pathlib import Path
+
+import polars as pl
+import pytest
+from moto import mock_aws
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+from config_loader import ETLConfig
+from run_log import RunLog, flag_regressions
+from s3_client import build_s3_client, call_stats
+
+
+@pytest.fixture
+def log():
+    with mock_aws():
+        config = ETLConfig()
+        config.cfg['output']['logging']['compact_every'] = 5
+        s3 = build_s3_client(config)
+        s3.create_bucket(Bucket=config.bucket)
+        yield RunLog(config, s3)
+
+
+def entry(i, duration=10.0, rows=1000):
+    return {'run_id': f"r{i:03d}", 'timestamp': f"2025-11-01 00:00:{i:02d}", 'status': 'SUCCESS',
+            'merge_type': 'incremental_update', 'final_rows': rows, 'duration_sec': duration}
+
+
+def test_append_is_one_put_and_never_reads_history(log):
+    for i in range(3):
+        log.append(entry(i))
+
+    ops = call_stats(log.s3).snapshot()
+    assert ops['PutObject']['calls'] == 3
+    assert 'GetObject' not in ops
+    assert len(log._list(log.runs_prefix)) == 3
+
+
+def test_compaction_folds_runs_into_parquet(log):
+    for i in range(12):
+        log.append(entry(i))
+
+    # compacted at the 5th and 10th run, 2 still pending
+    assert len(log._list(log.compacted_prefix)) == 2
+    assert len(log._list(log.runs_prefix)) == 2
+
+    history = log.load_history()
+    assert history['run_id'].to_list() == [f"r{i:03d}" for i in range(12)]
+
+
+def test_history_drops_race_duplicates_and_keeps_legacy_csv(log):
+    legacy = pl.DataFrame({'timestamp': ['2025-10-01 00:00:00'], 'status': ['SUCCESS'],
+                           'merge_type': ['initial_bootstrap'], 'final_rows': [900], 'duration_sec': [30.0]})
+    log.s3.put_object(Bucket=log.config.bucket, Key=f"{log.config.log_path}/merge_history.csv",
+                      Body=legacy.write_csv().encode('utf-8'))
+    for i in range(3):
+        log.append(entry(i))
+    # A second compactor raced on the same runs: same rows twice in compacted/
+    runs = log._read_runs(log._list(log.runs_prefix))
+    log.transfer.write_parquet(runs, f"{log.compacted_prefix}history_dup.parquet")
+
+    history = log.load_history()
+    assert len(history) == 4
+    assert history['run_id'].null_count() == 1
+
+
+def test_compaction_skips_while_leased_and_tolerates_vanished_runs(log, monkeypatch):
+    for i in range(3):
+        log.append(entry(i))
+    held = log._acquire_lease()
+    assert log.compact() is None                      # another compactor holds the lease
+    assert len(log._list(log.runs_prefix)) == 3
+    log._release_lease(held)
+
+    # A racer compacted one run between our LIST and GET
+    keys = log._list(log.runs_prefix)
+    log.s3.delete_object(Bucket=log.config.bucket, Key=keys[0])
+    monkeypatch.setattr(log, '_list', lambda prefix, max_keys=None: keys if prefix == log.runs_prefix
+                        else RunLog._list(log, prefix, max_keys))
+    assert log.compact() is not None
+    monkeypatch.undo()
+
+    assert log.load_history()['run_id'].to_list() == ['r001', 'r002']
+    assert not log._list(log.runs_prefix)
+    assert log._acquire_lease() is not None           # released after compacting
+
+
+def test_stale_lease_is_taken_over(log, monkeypatch):
+    log.append(entry(0))
+    log._acquire_lease()                              # compactor died holding it
+    monkeypatch.setattr('run_log.LEASE_TTL_SEC', -1)
+    assert log.compact() is not None
+    assert log.load_history()['run_id'].to_list() == ['r000']
+
+
+def test_flag_regressions():
+    history = pl.DataFrame([entry(i) for i in range(10)] + [entry(10, duration=40.0, rows=300)])
+    slow = flag_regressions(history, metric='duration_sec')
+    shrunk = flag_regressions(history, metric='final_rows', direction='down')
+    assert slow['run_id'].to_list() == ['r010']
+    assert shrunk['run_id'].to_list() == ['r010']
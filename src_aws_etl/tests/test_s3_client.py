@@ -0,0 +1,72 @@
+"""
+S3 Client Factory - pooled config, shared instance and per-operation call stats
+Runs against moto's in-process S3 mock (no AWS credentials needed).
+
+python -m pytest src_aws_etl/tests/test_s3_client.py -q
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from moto import mock_aws
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+import s3_client
+from config_loader import ETLConfig
+from merge_pipeline import MergePipeline
+from preflight_check import PreflightChecker
+from s3_client import build_s3_client, call_stats, get_s3_client, polars_storage_options
+
+
+@pytest.fixture
+def config():
+    return ETLConfig()
+
+
+@pytest.fixture
+def s3(config):
+    with mock_aws():
+        client = build_s3_client(config)
+        client.create_bucket(Bucket=config.bucket)
+        yield client
+
+
+def test_client_config_is_tuned(config, s3):
+    settings = s3.meta.config
+    assert settings.max_pool_connections >= config.transfer['max_concurrency']
+    assert settings.retries['mode'] == config.s3_client['retry_mode']
+    assert settings.tcp_keepalive is True
+
+
+def test_call_stats_count_operations_and_errors(config, s3):
+    s3.put_object(Bucket=config.bucket, Key='a.txt', Body=b'x')
+    s3.get_object(Bucket=config.bucket, Key='a.txt')['Body'].read()
+    with pytest.raises(s3.exceptions.ClientError):
+        s3.head_object(Bucket=config.bucket, Key='missing.txt')
+
+    ops = call_stats(s3).snapshot()
+    assert ops['PutObject']['calls'] == 1
+    assert ops['GetObject']['calls'] == 1
+    assert ops['HeadObject']['errors'] == 1
+    assert call_stats(s3).totals()['calls'] == 4   # includes CreateBucket
+
+
+def test_shared_client_reused_by_pipeline(config, s3, monkeypatch):
+    monkeypatch.setattr(s3_client, '_client', s3)
+
+    assert get_s3_client(config) is s3
+    pipeline = MergePipeline(config)
+    checker = PreflightChecker(pipeline.config, pipeline.s3)
+    assert pipeline.s3 is s3 and checker.s3 is s3
+    assert checker.config is config
+
+
+def test_endpoint_override(config, monkeypatch):
+    monkeypatch.setenv('AWS_ENDPOINT_URL', 'http://127.0.0.1:5000')
+    client = build_s3_client(config)
+    assert client.meta.endpoint_url == 'http://127.0.0.1:5000'
+
+    options = polars_storage_options(config)
+    assert options['aws_endpoint_url'] == 'http://127.0.0.1:5000'
+    assert options['aws_allow_http'] == 'true'
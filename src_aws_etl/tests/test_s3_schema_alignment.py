@@ -3,10 +3,8 @@ Schema Inspector for S3 Parquet Files
 Compare historical and incremental data schemas with smart matching
 """
 
-import os
 import sys
 from pathlib import Path
-from dotenv import load_dotenv
 
 # Add project root
 project_root = Path(__file__).parent.parent.parent
@@ -15,28 +13,14 @@ sys.path.append(str(project_root))
 # Import config
 sys.path.append(str(Path(__file__).parent.parent / 'etl'))
 from config_loader import ETLConfig
+from s3_client import polars_storage_options
+from schema_align import SchemaAlignment, footer_schema
 
-# Import polars
-import polars as pl
 
-
-# Column mapping rules
-COLUMN_MAPPINGS = {
-    # Incremental → Historical
-    'SIC': 'sic',  # Case normalization
-    'section_item': 'section_name',  # Special case: section_item becomes section_name
-}
-
-# Derived columns (can be computed, not critical for merge)
-DERIVED_COLUMNS = {
-    'cik_int',  # Derived from: CAST(cik AS INT)
-    'has_comparison',  # Derived from: sentence text analysis
-    'has_numbers',  # Derived from: sentence text analysis
-    'likely_kpi',  # Derived from: sentence text analysis
-    'row_hash',  # Derived from: MD5(sentenceID || sentence)
-    'tickers',  # Derived from: company lookup/mapping
-    'sentence_index',  # Derived from: ROW_NUMBER() or ordering
-}
+# Column mapping rules: the same schema_alignment config the merge pipeline compiles
+ALIGNMENT = SchemaAlignment.from_config(ETLConfig())
+COLUMN_MAPPINGS = ALIGNMENT.rename          # Incremental → Historical
+DERIVED_COLUMNS = ALIGNMENT.derived_columns  # Computed during merge (or staging-only)
 
 
 def normalize_column_name(col):
@@ -66,21 +50,13 @@ def inspect_schemas():
     print(f"\n📁 Historical: {config.hist_path}")
     print(f"📁 Incremental: {config.incr_path}")
     
-    # Load AWS credentials
-    secrets_path = Path(__file__).parent.parent / '.aws_secrets' / 'aws_credentials.env'
-    load_dotenv(secrets_path)
-    
-    storage_options = {
-        'aws_region': os.getenv('AWS_DEFAULT_REGION', 'us-east-1')
-    }
+    # Load credentials (same region / endpoint as the ETL client)
+    storage_options = polars_storage_options(config)
     
-    # Read schemas
+    # Read schemas (Parquet footers only)
     print("\n⏳ Reading schemas...")
-    hist_df = pl.read_parquet(hist_uri, n_rows=1, storage_options=storage_options)
-    incr_df = pl.read_parquet(incr_uri, n_rows=1, storage_options=storage_options)
-    
-    hist_schema = hist_df.schema
-    incr_schema = incr_df.schema
+    hist_schema = footer_schema(hist_uri, storage_options)
+    incr_schema = footer_schema(incr_uri, storage_options)
     
     print(f"✓ Historical: {len(hist_schema)} columns")
     print(f"✓ Incremental: {len(incr_schema)} columns")
@@ -226,6 +202,13 @@ def inspect_schemas():
     
     critical_issues = len(critical_hist_only) + len(critical_incr_only) + len([c for c in type_diffs if 'Datetime' not in str(hist_schema.get(c, ''))])
     
+    # The exact check the merge pipeline runs at STEP 2
+    try:
+        ALIGNMENT.validate(hist_schema, incr_schema)
+    except ValueError as e:
+        print(f"\n❌ {e}")
+        critical_issues = max(critical_issues, 1)
+    
     if critical_issues == 0:
         print("\n✅ SCHEMAS ARE COMPATIBLE FOR MERGE!")
         print("   - All critical columns present")
@@ -0,0 +1,70 @@
+"""
+Schema Alignment - config-driven rules, footer validation, single-projection plan
+No S3 access needed: footers are read from local Parquet files.
+
+python -m pytest src_aws_etl/tests/test_schema_align.py -q
+"""
+
+import sys
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent))
+from config_loader import ETLConfig
+from row_hash import row_hash_expr
+from schema_align import DEFAULT_RULES, SchemaAlignment, footer_schema
+from test_streaming_merge import make_base, make_incremental
+
+
+def test_config_rules_match_defaults():
+    alignment = SchemaAlignment.from_config(ETLConfig())
+    default = SchemaAlignment(DEFAULT_RULES)
+    assert alignment.rename == default.rename
+    assert alignment.drop == default.drop
+    assert alignment.derived == default.derived
+    assert {'cik_int', 'row_hash', 'sentence_index'} <= alignment.derived_columns
+
+
+def test_alignment_matches_base_schema_and_rules(tmp_path):
+    base = make_base(3)
+    incr = make_incremental(['a', 'b'])
+    base.write_parquet(tmp_path / 'base.parquet')
+    incr.write_parquet(tmp_path / 'incr.parquet')
+
+    alignment = SchemaAlignment(DEFAULT_RULES, row_hash_backend='batched')
+    report = alignment.validate(footer_schema(str(tmp_path / 'base.parquet')),
+                                footer_schema(str(tmp_path / 'incr.parquet')))
+    assert 'SIC → sic' in report['renamed'] and 'section_item → section_name' in report['renamed']
+    assert report['datetime'] == ['filingDate']
+    assert report['unmapped'] == ['section_name']   # staging long title, replaced by section_item
+
+    aligned, _ = alignment.apply(pl.scan_parquet(tmp_path / 'incr.parquet'), base.schema)
+    out = aligned.collect()
+    assert out.schema == base.schema
+    assert out['section_name'].to_list() == ['ITEM_7', 'ITEM_7']
+    assert out['row_hash'].to_list() == incr.select(row_hash_expr(backend='batched'))['row_hash'].to_list()
+    assert out['cik_int'].to_list() == [2000, 2000]
+    # Section D flags are computed, not NULL placeholders
+    assert out.select('has_numbers', 'has_comparison', 'likely_kpi').null_count().sum_horizontal().item() == 0
+    assert out['tickers'].null_count() == 2
+
+
+def test_alignment_is_one_projection():
+    alignment = SchemaAlignment(DEFAULT_RULES, row_hash_backend='batched')
+    plan = alignment.apply(make_incremental(['a']).lazy(), make_base(1).schema)[0].explain(optimized=False)
+    assert plan.count('SELECT') == 1 and 'WITH_COLUMNS' not in plan
+
+
+def test_missing_or_mistyped_columns_fail_before_reading_rows():
+    alignment = SchemaAlignment(DEFAULT_RULES)
+    base = make_base(1).schema
+    incr = make_incremental(['a']).drop('sentence').schema
+    with pytest.raises(ValueError, match='missing: sentence'):
+        alignment.validate(base, incr)
+
+    incr = make_incremental(['a']).with_columns(pl.col('report_year').cast(pl.String)).schema
+    with pytest.raises(ValueError, match='type mismatch: report_year'):
+        alignment.validate(base, incr)
@@ -0,0 +1,97 @@
+"""
+Snapshot Archive Mode - content-addressed snapshots + pointer flip, no copy_object
+Runs against moto's in-process S3 mock (no AWS credentials needed).
+
+python -m pytest src_aws_etl/tests/test_snapshot_archive.py -q
+"""
+
+import sys
+from pathlib import Path
+
+import polars as pl
+import pytest
+from moto import mock_aws
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent))
+from config_loader import ETLConfig
+from merge_pipeline import MergePipeline
+from s3_client import build_s3_client, call_stats
+from snapshot_store import SnapshotStore
+from test_streaming_merge import make_base, make_incremental
+
+
+@pytest.fixture
+def env():
+    with mock_aws():
+        config = ETLConfig()
+        config.cfg['output']['archive']['mode'] = 'snapshot'
+        config.cfg['output']['archive']['retention']['max_backups'] = 2
+        s3 = build_s3_client(config)
+        s3.create_bucket(Bucket=config.bucket)
+        yield config, s3
+
+
+def write_local(tmp_path, name, text):
+    path = tmp_path / name
+    pl.DataFrame({'sentenceID': ['a'], 'sentence': [text]}).write_parquet(path)
+    return str(path)
+
+
+def live_snapshots(config, s3):
+    prefix = f"{config.final_dir}/{SnapshotStore.SNAPSHOT_DIR}/"
+    response = s3.list_objects_v2(Bucket=config.bucket, Prefix=prefix)
+    return sorted(o['Key'] for o in response.get('Contents', []))
+
+
+def test_publish_flips_pointer_and_enforces_retention(env, tmp_path):
+    config, s3 = env
+    store = SnapshotStore(config, s3)
+
+    keys = [store.publish(write_local(tmp_path, f"v{i}.parquet", f"v{i}"))['key'] for i in range(4)]
+
+    ops = call_stats(s3).snapshot()
+    assert 'CopyObject' not in ops
+    assert 'ListObjectsV2' not in ops
+    assert ops['DeleteObjects']['calls'] == 1   # only the 4th publish drops one (v0)
+
+    pointer = store.load_pointer()
+    assert pointer['current']['key'] == keys[3]
+    assert [h['key'] for h in pointer['history']] == [keys[2], keys[1]]
+    assert live_snapshots(config, s3) == sorted(keys[1:])
+
+
+def test_identical_content_is_not_reuploaded(env, tmp_path):
+    config, s3 = env
+    store = SnapshotStore(config, s3)
+
+    first = store.publish(write_local(tmp_path, 'a.parquet', 'same'))
+    uploaded = store.transfer.stats['bytes_uploaded']
+    second = store.publish(write_local(tmp_path, 'b.parquet', 'same'))
+
+    assert first['key'] == second['key']
+    assert store.stats['snapshot_reused'] is True
+    assert store.transfer.stats['bytes_uploaded'] == uploaded
+    assert store.load_pointer()['history'] == []
+
+
+def test_pipeline_snapshot_mode_end_to_end(env, tmp_path):
+    config, s3 = env
+    base_path, incr_path = tmp_path / 'base.parquet', tmp_path / 'incr.parquet'
+    make_base(200).write_parquet(base_path)
+    s3.upload_file(str(base_path), config.bucket, config.hist_path)
+
+    # Run 1 bootstraps from historical, run 2 merges into the published snapshot
+    for ids in (['doc0_s0', 'new_1'], ['new_2']):
+        make_incremental(ids).write_parquet(incr_path)
+        s3.upload_file(str(incr_path), config.bucket, config.incr_path)
+        assert MergePipeline(config, s3).run()
+
+    store = SnapshotStore(config, s3)
+    current = store.current()
+    assert current['rows'] == 202
+    assert len(store.load_pointer()['history']) == 1
+    assert 'CopyObject' not in call_stats(s3).snapshot()
+
+    merged = store.transfer.read_parquet(current['key'])
+    assert merged.filter(pl.col('sentenceID') == 'doc0_s0')['sentence'].item() == "Updated sentence doc0_s0."
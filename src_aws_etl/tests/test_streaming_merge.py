@@ -0,0 +1,111 @@
+"""
+Streaming vs Eager Merge - parity check on small local Parquet files
+No S3 access needed: both merge paths accept any Polars-readable source.
+
+python -m pytest src_aws_etl/tests/test_streaming_merge.py -q
+"""
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import polars as pl
+
+# Add project root
+project_root = Path(__file__).parent.parent.parent
+sys.path.append(str(project_root))
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+from merge_pipeline import MergePipeline
+
+
+def make_base(n):
+    """Base fact table rows in the final (historical) schema"""
+    return pl.DataFrame({
+        'cik': [str(1000 + i % 7) for i in range(n)],
+        'sentence': [f"Revenue grew {i} percent." for i in range(n)],
+        'sentenceID': [f"doc{i % 7}_s{i}" for i in range(n)],
+        'name': [f"Company {i % 7}" for i in range(n)],
+        'report_year': [2015 + i % 5 for i in range(n)],
+        'section_name': ['ITEM_7'] * n,
+        'sic': ['7370'] * n,
+        'filingDate': [datetime(2020, 1, 1)] * n,
+        'cik_int': [1000 + i % 7 for i in range(n)],
+        'row_hash': ['x'] * n,
+        'has_numbers': [True] * n,
+        'has_comparison': [None] * n,
+        'likely_kpi': [None] * n,
+        'tickers': [['T']] * n,
+    }).with_columns(
+        pl.col('filingDate').dt.cast_time_unit('us').dt.replace_time_zone('UTC'),
+        pl.col('cik_int').cast(pl.Int32),
+        pl.col('report_year').cast(pl.Int32),
+        pl.col('has_comparison').cast(pl.Boolean),
+        pl.col('likely_kpi').cast(pl.Boolean),
+    )
+
+
+def make_incremental(ids):
+    """Incremental rows in the API staging schema (SIC, section_item, ns datetimes)"""
+    n = len(ids)
+    return pl.DataFrame({
+        'cik': ['2000'] * n,
+        'sentence': [f"Updated sentence {s}." for s in ids],
+        'sentenceID': ids,
+        'name': ['Incremental Co'] * n,
+        'report_year': [2021] * n,
+        'section_name': ['Item 7: MD&A'] * n,
+        'section_item': ['ITEM_7'] * n,
+        'SIC': ['7370'] * n,
+        'sentence_index': list(range(n)),
+        'filingDate': [datetime(2021, 6, 1)] * n,
+    }).with_columns(
+        pl.col('filingDate').dt.cast_time_unit('ns'),
+        pl.col('report_year').cast(pl.Int32),
+    )
+
+
+def run_both(tmp_path, merge_type='incremental_update'):
+    base = make_base(500)
+    # 3 overlapping keys (incremental wins), 2 new keys, 1 duplicate inside the increment
+    incr = make_incremental(['doc0_s0', 'doc1_s1', 'doc2_s2', 'new_1', 'new_2', 'new_2'])
+    base_path, incr_path = tmp_path / 'base.parquet', tmp_path / 'incr.parquet'
+    base.write_parquet(base_path)
+    incr.write_parquet(incr_path)
+
+    results = {}
+    for mode in ('eager', 'streaming'):
+        pipeline = MergePipeline()
+        pipeline.storage_options = None
+        pipeline.stats['merge_type'] = merge_type
+        merge = pipeline._merge_streaming if mode == 'streaming' else pipeline._merge_eager
+        output = merge(str(base_path), str(incr_path), 'Base', 'base.parquet')
+        # eager hands back the DataFrame, streaming the Parquet file it sank to
+        merged = output if isinstance(output, pl.DataFrame) else pl.read_parquet(output)
+        results[mode] = (merged, dict(pipeline.stats))
+    return results
+
+
+def test_streaming_matches_eager_rows(tmp_path):
+    results = run_both(tmp_path)
+    eager_df, _ = results['eager']
+    stream_df, _ = results['streaming']
+
+    key = ['report_year', 'sentenceID']
+    assert stream_df.columns == eager_df.columns
+    assert stream_df.sort(key).equals(eager_df.sort(key))
+
+    # Incremental wins on overlapping keys
+    updated = stream_df.filter(pl.col('sentenceID') == 'doc1_s1')
+    assert updated['sentence'].item() == "Updated sentence doc1_s1."
+
+
+def test_streaming_matches_eager_stats(tmp_path):
+    results = run_both(tmp_path)
+    _, eager_stats = results['eager']
+    _, stream_stats = results['streaming']
+
+    for key in ('base_rows', 'incr_rows', 'final_rows', 'duplicates_removed',
+                'companies', 'year_min', 'year_max'):
+        assert stream_stats[key] == eager_stats[key], key
+    assert stream_stats['final_rows'] == 502
@@ -0,0 +1,110 @@
+"""
+Incremental Validation - delta-maintained table stats must equal a full rescan
+Local Parquet files for the merge paths, moto for the persisted-stats round trip.
+
+python -m pytest src_aws_etl/tests/test_table_stats.py -q
+"""
+
+import sys
+from pathlib import Path
+
+import polars as pl
+import pytest
+from moto import mock_aws
+
+sys.path.append(str(Path(__file__).parent.parent / 'etl'))
+sys.path.append(str(Path(__file__).parent))
+from config_loader import ETLConfig
+from merge_pipeline import MergePipeline
+from s3_client import build_s3_client
+from table_stats import TableStats
+from test_streaming_merge import make_base, make_incremental
+
+
+def as_dict(stats):
+    return {'rows': stats.rows, 'years': stats.years, 'companies': stats.companies,
+            'groups': {k: g['rows'] for k, g in stats.groups.items()}}
+
+
+@pytest.mark.parametrize('mode', ['eager', 'streaming'])
+def test_incremental_validation_matches_full_rebuild(tmp_path, mode):
+    base = make_base(500)
+    base_path, incr_path = tmp_path / 'base.parquet', tmp_path / 'incr.parquet'
+    base.write_parquet(base_path)
+    # doc1_s1 moves to another company/year; new_2 is duplicated inside the increment
+    make_incremental(['doc0_s0', 'doc1_s1', 'new_1', 'new_2', 'new_2']).write_parquet(incr_path)
+
+    pipeline = MergePipeline()
+    pipeline.storage_options = None
+    pipeline.stats['merge_type'] = 'incremental_update'
+    pipeline.base_stats = TableStats.from_frame(base)
+
+    merge = pipeline._merge_streaming if mode == 'streaming' else pipeline._merge_eager
+    output = merge(str(base_path), str(incr_path), 'Base', 'base.parquet')
+    merged = output if isinstance(output, pl.DataFrame) else pl.read_parquet(output)
+
+    assert pipeline.stats['validation'] == 'incremental'
+    assert as_dict(pipeline.table_stats) == as_dict(TableStats.from_frame(merged))
+    assert pipeline.stats['companies'] == merged['name'].n_unique()
+    assert pipeline.stats['year_max'] == merged['report_year'].max()
+
+
+def test_incremental_validation_replaces_null_year_rows(tmp_path):
+    # The replaced base row sits in a (NULL year, cik) group: is_in alone never matches it
+    base = make_base(100).with_columns(
+        pl.when(pl.col('sentenceID') == 'doc0_s0').then(None).otherwise(pl.col('report_year')).alias('report_year')
+    )
+    base_path, incr_path = tmp_path / 'base.parquet', tmp_path / 'incr.parquet'
+    base.write_parquet(base_path)
+    make_incremental(['doc0_s0', 'new_1']).write_parquet(incr_path)
+
+    pipeline = MergePipeline()
+    pipeline.storage_options = None
+    pipeline.stats['merge_type'] = 'incremental_update'
+    pipeline.base_stats = TableStats.from_frame(base)
+
+    merged = pl.read_parquet(pipeline._merge_streaming(str(base_path), str(incr_path), 'Base', 'base.parquet'))
+    assert pipeline.stats['validation'] == 'incremental'
+    assert as_dict(pipeline.table_stats) == as_dict(TableStats.from_frame(merged))
+
+
+def test_incremental_validation_catches_stats_drift(tmp_path):
+    base = make_base(100)
+    # Stats describe a clean base, but the object actually carries a duplicate key
+    base_path, incr_path = tmp_path / 'base.parquet', tmp_path / 'incr.parquet'
+    pl.concat([base, base.head(1)]).write_parquet(base_path)
+    make_incremental(['new_1']).write_parquet(incr_path)
+
+    pipeline = MergePipeline()
+    pipeline.storage_options = None
+    pipeline.stats['merge_type'] = 'incremental_update'
+    pipeline.base_stats = TableStats.from_frame(base)
+
+    with pytest.raises(AssertionError, match='Duplicates'):
+        pipeline._merge_streaming(str(base_path), str(incr_path), 'Base', 'base.parquet')
+
+
+def test_pipeline_persists_stats_and_validates_incrementally(tmp_path):
+    with mock_aws():
+        config = ETLConfig()
+        s3 = build_s3_client(config)
+        s3.create_bucket(Bucket=config.bucket)
+
+        base_path, incr_path = tmp_path / 'base.parquet', tmp_path / 'incr.parquet'
+        make_base(200).write_parquet(base_path)
+        s3.upload_file(str(base_path), config.bucket, config.hist_path)
+
+        validation = []
+        for ids in (['doc0_s0', 'new_1'], ['doc3_s3', 'new_2']):
+            make_incremental(ids).write_parquet(incr_path)
+            s3.upload_file(str(incr_path), config.bucket, config.incr_path)
+            pipeline = MergePipeline(config, s3)
+            assert pipeline.run()
+            validation.append(pipeline.stats['validation'])
+
+        assert validation == ['full', 'incremental']
+
+        stored = TableStats.load(config, s3)
+        final = pipeline.transfer.read_parquet(config.final_path)
+        assert as_dict(stored) == as_dict(TableStats.from_frame(final))
+        assert stored.source_etag == s3.head_object(Bucket=config.bucket, Key=config.final_path)['ETag']